@@ -0,0 +1,66 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+from bisect import bisect_left, insort
+from collections import Counter
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class PrefixIndex:
+    """In-memory index of string values answering prefix queries
+
+    The values are kept in a list sorted by their case folded form, so the values starting with a prefix are a contiguous run found with a single binary search. Values shared by several books (e.g. an author) are stored once and counted, so they're only dropped when the last book holding them is.
+    """
+    def __init__(self, values=()):
+        # Count the books holding each value
+        self._counts = Counter(value for value in values if value)
+
+        # Sorted (folded value, value) pairs
+        self._keys = sorted((value.casefold(), value) for value in self._counts)
+
+    def add(self, value):
+        """Adds a value of a book to the index"""
+        if not value:
+            return
+
+        self._counts[value] += 1
+        if self._counts[value] == 1:
+            insort(self._keys, (value.casefold(), value))
+
+    def remove(self, value):
+        """Removes a value of a book from the index"""
+        if not self._counts.get(value):
+            return
+
+        self._counts[value] -= 1
+        if self._counts[value] == 0:
+            del self._counts[value]
+            del self._keys[bisect_left(self._keys, (value.casefold(), value))]
+
+    def complete(self, prefix, limit=10):
+        """Gets the values starting with the prefix, ignoring case, in alphabetical order
+
+        Args:
+            prefix (str): The start of the values typed so far.
+            limit (int): Maximum number of values returned.
+
+        Returns:
+            list: The matching values.
+        """
+        prefix = prefix.casefold()
+        values = []
+
+        # Walk the run of keys starting with the prefix
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(values) < limit:
+            key, value = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            values.append(value)
+            position += 1
+
+        return values
+
+    def __len__(self):
+        return len(self._keys)
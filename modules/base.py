@@ -0,0 +1,10 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+from sqlalchemy.ext.declarative import declarative_base
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Declarative base of every class, in its own module so the modules user depends on can define tables too
+Base = declarative_base()
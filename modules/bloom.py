@@ -0,0 +1,288 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import math
+from hashlib import blake2b
+from sqlalchemy import Column, Integer, Float, String, LargeBinary, event, text
+from sqlalchemy.orm import Mapper, object_session
+from modules.base import Base
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Default target false positive rate of the filters and smallest number of keys they are sized for
+BLOOM_ERROR_RATE = 0.01
+BLOOM_CAPACITY = 10000
+
+# Filtered keys: filter name to the table and unique column holding the keys
+FILTERED_KEYS = {
+    'isbn': ('books', '_isbn_key'),
+    'username': ('users', '_username'),
+}
+
+# Filter name of each keys table
+FILTERED_TABLES = {table: name for name, (table, _) in FILTERED_KEYS.items()}
+
+# Number of keys read per batch while rebuilding a filter
+REBUILD_BATCH_SIZE = 10000
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class BloomFilter:
+    """Set membership filter answering "definitely missing" or "maybe present" in constant time and space
+
+    The filter is sized for a capacity and a target false positive rate, past its capacity the false positive rate grows and the filter should be rebuilt. Keys are never removed, so deleted keys only cost a false positive.
+    """
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # Optimal number of bits and hash functions for the capacity and false positive rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+        self.covered = 0    # Inserts of the keys table counted by the triggers the filter holds
+        self.last_id = 0    # Highest row id of the keys table the filter holds every key up to
+
+        # Lookups, definite misses and maybe present answers the database didn't confirm
+        self.probes = 0
+        self.misses = 0
+        self.false_positives = 0
+
+    def _positions(self, key):
+        # Double hashing, the hash functions are derived from the two halves of a single digest
+        digest = blake2b(str(key).encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + number * second) % self.size for number in range(self.hashes)]
+
+    def add(self, key):
+        """Adds a key to the filter"""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def stats(self):
+        """Gets the size of the filter, its expected false positive rate and the observed one"""
+        maybe = self.probes - self.misses
+        return {
+            "keys": self.count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "bytes": len(self.bits),
+            "hashes": self.hashes,
+            "target_error_rate": self.error_rate,
+            "expected_error_rate": (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes,
+            "probes": self.probes,
+            "misses": self.misses,
+            "false_positives": self.false_positives,
+            "false_positive_rate": self.false_positives / maybe if maybe else 0.0,
+        }
+
+
+class KeyFilter(Base):
+    __tablename__ = 'key_filters'
+    _name = Column(String, primary_key=True)    # Filter name, one of FILTERED_KEYS
+    _capacity = Column(Integer)
+    _error_rate = Column(Float)
+    _count = Column(Integer)
+    _bits = Column(LargeBinary)
+    _covered = Column(Integer)                  # Inserts of the keys table the saved filter holds
+    _inserts = Column(Integer)                  # Inserts of the keys table, counted by the triggers of the migration
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def get_filter(session, name):
+    """Gets the filter of a session, loaded from the database or rebuilt on first use
+
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        name (str): Name of the filter, one of FILTERED_KEYS.
+
+    Returns:
+        filter: The BloomFilter of the keys.
+
+    The filters are saved in the key_filters table, next to the number of inserts of each keys table counted by triggers. The saved filter is only trusted if it covers every insert counted, so keys inserted since it was saved, by any process, cause a rebuild instead of false negatives.
+    """
+    filters = session.info.setdefault('key_filters', {})
+    if name not in filters:
+        # Read the highest row id before the counter, rows inserted in between are then caught by refresh_filter
+        last_id = max_row_id(session, name)
+        row = session.execute(text("SELECT * FROM key_filters WHERE _name = :name"), {"name": name}).first()
+        if row is None or row._bits is None or row._covered != row._inserts or row._count > row._capacity:
+            filters[name] = rebuild_filter(session, name, row._error_rate if row is not None and row._error_rate else BLOOM_ERROR_RATE)
+        else:
+            filters[name] = BloomFilter(row._capacity, row._error_rate, row._bits, row._count)
+            filters[name].covered = row._inserts
+            filters[name].last_id = last_id
+    return filters[name]
+
+
+def max_row_id(session, name):
+    """Gets the highest row id of the keys table of a filter, 0 if it's empty"""
+    table, _ = FILTERED_KEYS[name]
+    return session.execute(text(f"SELECT MAX(rowid) FROM {table}")).scalar() or 0
+
+
+def refresh_filter(session, name):
+    """Catches up a filter with the keys inserted since it was built, by any session or process
+
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        name (str): Name of the filter, one of FILTERED_KEYS.
+
+    Returns:
+        filter: The up to date BloomFilter, None if the database has no insert counter to check it against.
+
+    This function reads the insert counter of the keys table maintained by the triggers of the migration. When it moved past the inserts the filter holds, the keys of the rows above the highest row id the filter holds are added. If those rows don't account for every counted insert, e.g. a row id was reused after a delete, the filter is rebuilt instead.
+    """
+    bloom = get_filter(session, name)
+    inserts = session.execute(text("SELECT _inserts FROM key_filters WHERE _name = :name"), {"name": name}).scalar()
+    if inserts is None:
+        return None
+    if inserts == bloom.covered:
+        return bloom
+
+    # Add the keys of the rows inserted since the filter was built
+    table, column = FILTERED_KEYS[name]
+    last_id = max_row_id(session, name)
+    rows = session.execute(text(f"SELECT {column} FROM {table} WHERE rowid > :first AND rowid <= :last"), {"first": bloom.last_id, "last": last_id}).scalars().all()
+    if len(rows) < inserts - bloom.covered:
+        return rebuild_stats(session, name, bloom)
+
+    for key in rows:
+        if key is not None:
+            bloom.add(key)
+    bloom.covered, bloom.last_id = inserts, last_id
+
+    # A filter filled past its capacity is rebuilt larger
+    if bloom.count > bloom.capacity:
+        return rebuild_stats(session, name, bloom)
+    return bloom
+
+
+def rebuild_stats(session, name, bloom):
+    """Rebuilds a filter keeping the lookup statistics of the one it replaces"""
+    rebuilt = rebuild_filter(session, name, bloom.error_rate)
+    rebuilt.probes, rebuilt.misses, rebuilt.false_positives = bloom.probes, bloom.misses, bloom.false_positives
+    return rebuilt
+
+
+def rebuild_filter(session, name, error_rate=BLOOM_ERROR_RATE):
+    """Rebuilds a filter from the keys in the database, save_filters persists it
+
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        name (str): Name of the filter, one of FILTERED_KEYS.
+        error_rate (float): Target false positive rate of the filter.
+
+    Returns:
+        filter: The rebuilt BloomFilter, sized for twice the current keys so it absorbs new ones.
+    """
+    table, column = FILTERED_KEYS[name]
+
+    # Get the highest row id and the inserts counted so far, keys inserted while reading are then caught by refresh_filter
+    last_id = max_row_id(session, name)
+    inserts = session.execute(text("SELECT _inserts FROM key_filters WHERE _name = :name"), {"name": name}).scalar() or 0
+
+    count = session.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    bloom = BloomFilter(max(BLOOM_CAPACITY, 2 * count), error_rate)
+
+    # Stream the keys into the filter
+    result = session.execute(text(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL"))
+    for keys in result.scalars().partitions(REBUILD_BATCH_SIZE):
+        for key in keys:
+            bloom.add(key)
+    bloom.covered, bloom.last_id = inserts, last_id
+
+    session.info.setdefault('key_filters', {})[name] = bloom
+    return bloom
+
+
+def save_filters(session):
+    """Saves and commits the filters loaded by a session, so the next process doesn't rebuild them
+
+    Only the rows created by the migration along with the insert counter triggers are updated, a filter saved without a counter could never be checked for staleness.
+    """
+    statement = text("""
+        UPDATE key_filters SET _capacity = :capacity, _error_rate = :error_rate, _count = :count, _bits = :bits, _covered = :covered
+        WHERE _name = :name
+    """)
+    for name, bloom in session.info.get('key_filters', {}).items():
+        session.execute(statement, {"name": name, "capacity": bloom.capacity, "error_rate": bloom.error_rate, "count": bloom.count, "bits": bytes(bloom.bits), "covered": bloom.covered})
+    session.commit()
+
+
+def add_keys(session, name, keys):
+    """Adds the keys inserted by a session to its filter, if loaded
+
+    The keys inserted through the ORM are added on flush, this function is for the bulk inserts bypassing it. A filter filled past its capacity is dropped, so it is rebuilt larger on next use.
+    """
+    bloom = session.info.get('key_filters', {}).get(name)
+    if bloom is None:
+        return
+
+    for key in keys:
+        bloom.add(key)
+        bloom.covered += 1
+
+    if bloom.count > bloom.capacity:
+        del session.info['key_filters'][name]
+
+
+def might_exist(session, name, key):
+    """Checks the filter for a key, False means the key is definitely not in the database
+
+    A miss is only trusted once the filter is checked against the insert counter, so keys inserted by other sessions or processes since the filter was built are never reported missing. Databases without the counter fall back to the query.
+    """
+    bloom = get_filter(session, name)
+    bloom.probes += 1
+    if key in bloom:
+        return True
+
+    bloom = refresh_filter(session, name)
+    if bloom is None or key in bloom:
+        return True
+    bloom.misses += 1
+    return False
+
+
+def probe(session, name, key, query):
+    """Runs an existence query unless the filter rules the key out
+
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        name (str): Name of the filter, one of FILTERED_KEYS.
+        key (str): The key looked up.
+        query (callable): Function running the query, called without arguments, returning None if the key doesn't exist.
+
+    Returns:
+        The result of the query, None without querying if the key is definitely missing.
+    """
+    if not might_exist(session, name, key):
+        return None
+
+    result = query()
+    if result is None:
+        get_filter(session, name).false_positives += 1
+    return result
+
+
+def filter_stats(session):
+    """Gets the statistics of the filters, keyed by filter name"""
+    return {name: get_filter(session, name).stats() for name in FILTERED_KEYS}
+
+
+@event.listens_for(Mapper, 'after_insert')
+def _add_inserted_key(mapper, connection, target):
+    # Keep the loaded filter of the session in step with the ORM inserts, e.g. Book.register and User.register
+    name = FILTERED_TABLES.get(mapper.local_table.name)
+    session = object_session(target)
+    if name is not None and session is not None:
+        add_keys(session, name, [getattr(target, FILTERED_KEYS[name][1])])
@@ -2,9 +2,17 @@
 #######################################       IMPORTS       #######################################
 ###################################################################################################
 import re
-from sqlalchemy import Column, Integer, Float, String
+import math
+import heapq
+import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, Date, cast, false, func, inspect, select, text
 from sqlalchemy.orm import relationship
 from modules.user import Base
+from modules.autocomplete import PrefixIndex
+from modules.pagination import PAGE_SIZE, paginate
+from modules.facet import FACET_ATTRIBUTES, BookFacet, Facet
+from modules.cache import MISSING, get_cache, get_isbn_cache
+from modules.bloom import probe
 from tabulate import tabulate
 
 ###################################################################################################
@@ -31,6 +39,133 @@ def basic_string_attribute_validation(string, attribute):
     # Valid string
     return True
 
+# Helper function to parse a publication date given as mm-dd-yyyy, dd-mm-yyyy when the first number can't be a month, or yyyy-mm-dd
+def parse_publication_date(publication_date):
+    # Check if publication date is string
+    if not isinstance(publication_date, str):
+        raise ValueError("Publication date must be a string")
+    
+    # Ensure input is not empty
+    if not publication_date:
+        raise ValueError("Publication date cannot be empty")
+    
+    # Ensure input follows the format mm-dd-yyyy
+    if len(publication_date) != 10 or publication_date.count('-') != 2:
+        raise ValueError("Publication date must be of format mm-dd-yyyy")
+    
+    # Split the input after initial checks
+    parts = publication_date.split('-')
+    
+    # Validate day, month, and year components
+    if not all(part.isdigit() for part in parts):
+        raise ValueError("Publication date components must be integers")
+    
+    if len(parts[0]) == 4:
+        year, month, day = parts
+    else:
+        month, day, year = parts
+        if int(month) > 12:
+            day, month = month, day
+    
+    day, month, year = int(day), int(month), int(year)
+    
+    if not 1 <= day <= 31:
+        raise ValueError("Publication date day must be in between 1 and 31")
+    
+    if not 1 <= month <= 12:
+        raise ValueError("Publication date month must be in between 1 and 12")
+        
+    if not 1800 <= year <= 2100:
+        raise ValueError("Publication date year must be in between 1800 and 2100")
+    
+    # Ensure the day exists in the month
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        raise ValueError("Publication date day must exist in the month")
+
+# Helper function to convert a price to the integer cents it is stored as, so prices compare exactly
+def to_cents(price):
+    return round(price * 100)
+
+# Helper function to compute the ISBN-13 check digit of the first 12 digits, weighted alternately by 1 and 3
+def isbn_check_digit(digits):
+    total = sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(digits))
+    return (10 - total % 10) % 10
+
+# Helper function to parse an ISBN-13, with or without hyphens, into the integer key it is stored and looked up by
+def parse_isbn(isbn):
+    # Check if ISBN is string
+    if not isinstance(isbn, str):
+        raise ValueError("ISBN must be a string")
+    
+    # Ensure input is not empty
+    if not isbn:
+        raise ValueError("ISBN cannot be empty")
+    
+    # Ensure input has 13 digits once the hyphens are removed, however they are grouped
+    digits = isbn.replace('-', '')
+    if len(digits) != 13 or not (digits.isascii() and digits.isdigit()):
+        raise ValueError("ISBN must have 13 digits, e.g. 978-0-13-235088-4")
+    
+    # Validate the check digit
+    if isbn_check_digit(digits[:12]) != int(digits[12]):
+        raise ValueError("ISBN check digit is invalid")
+    
+    return int(digits)
+
+# Helper function to get the key of an ISBN looked up, None if it isn't a valid ISBN since no book can have it
+def isbn_key(isbn):
+    try:
+        return parse_isbn(isbn)
+    except ValueError:
+        return None
+
+# Helper function to format an ISBN key as xxx-x-xx-xxxxxx-x
+def format_isbn(key):
+    digits = f"{key:013d}"
+    return f"{digits[:3]}-{digits[3]}-{digits[4:6]}-{digits[6:12]}-{digits[12]}"
+
+# Attributes the authenticate finders cache their results by, keyed by the stored value
+CACHED_ATTRIBUTES = ('title', 'author', 'publisher', 'genre', 'edition', 'publication_date', 'price', 'id')
+
+# Attributes the combined search filters by equality and orders by
+SEARCH_ATTRIBUTES = ('title', 'author', 'publisher', 'genre', 'edition', 'publication_date', 'price', 'isbn', 'quantity')
+
+# Attributes the combined search filters by range, with the min_ and max_ prefixes
+RANGE_ATTRIBUTES = ('edition', 'publication_date', 'price', 'quantity')
+
+# Number of candidates fetched from the trigram index and ranked by similarity per book returned
+FUZZY_CANDIDATES = 5
+
+# Helper function to get the trigrams of a string, ignoring case
+def trigrams(string):
+    string = string.casefold()
+    return {string[index:index + 3] for index in range(len(string) - 2)}
+
+# Helper function to measure how similar a string is to the searched trigrams, as a pair of shares from 0.0 to 1.0
+def trigram_similarity(searched, string):
+    found = trigrams(string or '')
+    
+    # Share of the searched trigrams found first, their share of both strings breaks the ties
+    common = len(searched & found)
+    return common / len(searched), common / len(searched | found)
+
+# Helper function to build the full-text query of the keywords, every word must match the start of a word of the book
+def full_text_query(keywords):
+    words = re.findall(r'\w+', keywords)
+    return ' '.join(f'"{word}"*' for word in words) or None
+
+# Weights of the books_fts columns in the bm25 relevance of the ranked search, in the column order of the index
+FIELD_WEIGHTS = {'title': 10.0, 'author': 5.0, 'genre': 2.0, 'description': 1.0}
+
+# Relevance boost of the rentals of a book, logarithmic so popular books rise among close matches without burying better ones
+POPULARITY_WEIGHT = 0.2
+
+# Helper function to score a ranked search match, bm25 is negative and lower for better matches
+def relevance(match):
+    return -match.score * (1 + POPULARITY_WEIGHT * math.log1p(match.rentals))
+
 ###################################################################################################
 #######################################       CLASSES       #######################################
 ###################################################################################################
@@ -43,16 +178,20 @@ class Book(Base):
     _publisher = Column(String)
     _genre = Column(String)
     _edition = Column(Integer)
-    _publication_date = Column(String)
+    _publication_date = Column(Date)
     _description = Column(String)
-    _price = Column(Float)
+    _price = Column(Integer)    # Price in cents
     # Unique attributes to each book object
-    _isbn = Column(String, unique=True)
+    _isbn = Column(String)                      # ISBN formatted as xxx-x-xx-xxxxxx-x
+    _isbn_key = Column(BigInteger, unique=True) # ISBN-13 digits as an integer, every ISBN lookup goes through it
     _quantity = Column(Integer)
     
     # Define relationship with transactions
     transactions = relationship("Transaction", back_populates="book")
     
+    # Autocomplete indexes of the titles and authors, None until loaded
+    completions = None
+    
     # Define setter methods for attributes
     def set_title(self, title):
         # Call auxiliar function to validate basic string attribute features
@@ -106,35 +245,12 @@ class Book(Base):
         self._edition = edition
         
     def set_publication_date(self, publication_date):
-        # Check if publication date is string
-        if not isinstance(publication_date, str):
-            raise ValueError("Publication date must be a string")
-        
-        # Ensure input is not empty
-        if not publication_date:
-            raise ValueError("Publication date cannot be empty")
-        
-        # Ensure input follows the format dd-mm-yyyy
-        if len(publication_date) != 10 or publication_date.count('-') != 2:
-            raise ValueError("Publication date must be of format mm-dd-yyyy")
-
-        # Split the input after initial checks
-        month, day, year = publication_date.split('-')
-        
-        # Validate day, month, and year components
-        if not (day.isdigit() and month.isdigit() and year.isdigit()):
-            raise ValueError("Publication date components must be integers")
-        
-        day, month, year = int(day), int(month), int(year)
-        
-        if not 1 <= day <= 31:
-            raise ValueError("Publication date day must be in between 1 and 31")
-        
-        if not 1 <= month <= 12:
-            raise ValueError("Publication date month must be in between 1 and 12")
-            
-        if not 1800 <= year <= 2100:
-            raise ValueError("Publication date year must be in between 1800 and 2100")
+        # Dates are validated as they are, strings are parsed into dates
+        if isinstance(publication_date, datetime.date):
+            if not 1800 <= publication_date.year <= 2100:
+                raise ValueError("Publication date year must be in between 1800 and 2100")
+        else:
+            publication_date = parse_publication_date(publication_date)
         
         # Set publication date attribute
         self._publication_date = publication_date
@@ -164,31 +280,19 @@ class Book(Base):
         if price <= 0.0:
             raise ValueError("Price must be a positive float")
         
-        # Set price attribute
-        self._price = price
+        if to_cents(price) == 0:
+            raise ValueError("Price must be of at least one cent")
+        
+        # Set price attribute in cents
+        self._price = to_cents(price)
 
     def set_isbn(self, isbn):
-        # ISBN attribute validation
-        if not isinstance(isbn, str):
-            raise ValueError("ISBN must be a string")
-        
-        # Ensure input is not empty
-        if not isbn:
-            raise ValueError("ISBN cannot be empty")
-        
-        # Ensure input follows the format xxx-x-xx-xxxxxx-x
-        parts = isbn.split('-')
-        if len(parts) != 5 or not all(part.isdigit() for part in parts):
-            raise ValueError("ISBN must be of format xxx-x-xx-xxxxxx-x")
-        
-        # Validate length of each set of digits
-        lengths = [3, 1, 2, 6, 1]
-        for part, length in zip(parts, lengths):
-            if len(part) != length:
-                raise ValueError(f"ISBN set must be a number of {length} digits")
+        # ISBN attribute validation, the hyphens are optional and the check digit must match
+        key = parse_isbn(isbn)
         
-        # Set ISBN attribute
-        self._isbn = isbn
+        # Set ISBN attribute in the format xxx-x-xx-xxxxxx-x and its integer key
+        self._isbn = format_isbn(key)
+        self._isbn_key = key
             
     def set_quantity(self, quantity):
         # Quantity attribute validation
@@ -227,7 +331,7 @@ class Book(Base):
         return self._description
     
     def get_price(self):
-        return self._price
+        return self._price / 100 if self._price is not None else None
     
     def get_isbn(self):
         return self._isbn
@@ -268,8 +372,8 @@ class Book(Base):
             
         This method checks if there's any books with a specific title in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given title and distinct isbn
-        books = session.query(Book).filter(Book._title == title).distinct(Book._isbn).all()
+        # Query to get all books with the given title and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('title', title), lambda: session.query(Book).filter(Book._title == title).distinct(Book._isbn))
         
         # Check if there's any book with the given title in the database
         if books:
@@ -291,8 +395,8 @@ class Book(Base):
             
         This method checks if there's any books with a specific author in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given author and distinct isbn
-        books = session.query(Book).filter(Book._author == author).distinct(Book._isbn).all()
+        # Query to get all books with the given author and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('author', author), lambda: session.query(Book).filter(Book._author == author).distinct(Book._isbn))
         
         # Check if book exists in the database
         if books:
@@ -314,8 +418,8 @@ class Book(Base):
             
         This method checks if there's any books with a specific publisher in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given publisher and distinct isbn
-        books = session.query(Book).filter(Book._publisher == publisher).distinct(Book._isbn).all()
+        # Query to get all books with the given publisher and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('publisher', publisher), lambda: session.query(Book).filter(Book._publisher == publisher).distinct(Book._isbn))
         
         # Check if book exists in the database
         if books:
@@ -337,8 +441,8 @@ class Book(Base):
             
         This method checks if there's any books with a specific genre in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given genre and distinct isbn
-        books = session.query(Book).filter(Book._genre == genre).distinct(Book._isbn).all()
+        # Query to get all books with the given genre and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('genre', genre), lambda: session.query(Book).filter(Book._genre == genre).distinct(Book._isbn))
         
         # Check if book exists in the database
         if books:
@@ -360,8 +464,8 @@ class Book(Base):
             
         This method checks if there's any books with a specific edition in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given edition and distinct isbn
-        books = session.query(Book).filter(Book._edition == edition).distinct(Book._isbn).all()
+        # Query to get all books with the given edition and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('edition', edition), lambda: session.query(Book).filter(Book._edition == edition).distinct(Book._isbn))
         
         # Check if book exists in the database
         if books:
@@ -375,7 +479,7 @@ class Book(Base):
         
         Args: 
             session (Session): The SQLAlchemy session object to perform database queries.
-            publication_date (str): The publication date provided for authentication.
+            publication_date (str): The publication date provided for authentication, as a string or a date.
         
         Returns:
             book (list): If book with specific publication date exists in the database.
@@ -383,8 +487,12 @@ class Book(Base):
             
         This method checks if there's any books with a specific publication date in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given publication date and distinct isbn
-        books = session.query(Book).filter(Book._publication_date == publication_date).distinct(Book._isbn).all()
+        # Convert the publication date string to a date
+        if isinstance(publication_date, str):
+            publication_date = parse_publication_date(publication_date)
+        
+        # Query to get all books with the given publication date and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('publication_date', publication_date), lambda: session.query(Book).filter(Book._publication_date == publication_date).distinct(Book._isbn))
         
         # Check if book exists in the database
         if books:
@@ -392,6 +500,45 @@ class Book(Base):
         else:
             return None
     
+    @classmethod
+    def published_between(cls, session, start, end, limit=None):
+        """Gets the books published in a period
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            start (date): The first day of the period, as a date or a publication date string.
+            end (date): The last day of the period, as a date or a publication date string.
+            limit (int): Maximum number of books returned, None for every book of the period.
+        
+        Returns:
+            books (list): The books published in the period, oldest first.
+            None: If no book was published in the period.
+            
+        This method runs a range query on the publication date index, so only the books of the period are read.
+        """
+        # Convert the publication date strings to dates
+        if isinstance(start, str):
+            start = parse_publication_date(start)
+        if isinstance(end, str):
+            end = parse_publication_date(end)
+        
+        # Query the books of the period in publication order
+        query = session.query(Book).filter(Book._publication_date.between(start, end)).order_by(Book._publication_date, Book._id)
+        if limit is not None:
+            query = query.limit(limit)
+        books = query.all()
+        
+        # Check if any book was published in the period
+        if books:
+            return books
+        else:
+            return None
+    
+    @classmethod
+    def published_in_year(cls, session, year, limit=None):
+        """Gets the books published in a year, oldest first, None if no book was published in it"""
+        return cls.published_between(session, datetime.date(year, 1, 1), datetime.date(year, 12, 31), limit)
+    
     @classmethod
     def authenticate_price(cls, session, price):
         """Authenticates book price
@@ -406,8 +553,8 @@ class Book(Base):
             
         This method checks if there's any books with a specific price in the database and filters them by uniqueness.
         """
-        # Query to get all books with the given price and distinct isbn
-        books = session.query(Book).filter(Book._price == price).distinct(Book._isbn).all()
+        # Query to get all books with the given price in cents and distinct isbn, served from the result cache when repeated
+        books = cls.cached_books(session, ('price', to_cents(price)), lambda: session.query(Book).filter(Book._price == to_cents(price)).distinct(Book._isbn))
         
         # Check if book exists in the database
         if books:
@@ -415,6 +562,362 @@ class Book(Base):
         else:
             return None
     
+    @classmethod
+    def search(cls, session, keywords, limit=20):
+        """Searches books by keywords
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            keywords (str): The keywords to search for in the title, author, genre and description of the books.
+            limit (int): Maximum number of books returned.
+        
+        Returns:
+            books (list): The matching books, best ranked first.
+            None: If no book matches the keywords.
+            
+        This method queries the books_fts full-text index, so every keyword is a prefix lookup in the index instead of a scan of the books table, and ranks the matches by their bm25 relevance weighted by FIELD_WEIGHTS. The index is created by the schema migrations.
+        """
+        # Build the full-text query, keywords without any word match nothing
+        query = full_text_query(keywords)
+        if query is None:
+            return None
+        
+        # Query the full-text index for the best ranked books
+        weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS.values())
+        statement = text(f"""
+            SELECT books.* FROM books_fts JOIN books ON books._id = books_fts.rowid
+            WHERE books_fts MATCH :query ORDER BY bm25(books_fts, {weights}) LIMIT :limit
+        """)
+        books = session.query(Book).from_statement(statement).params(query=query, limit=limit).all()
+        
+        # Check if any book matches the keywords
+        if books:
+            return books
+        else:
+            return None
+    
+    @classmethod
+    def ranked_search(cls, session, keywords, limit=20, attributes=None):
+        """Searches the most relevant books for keywords
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            keywords (str): The keywords to search for.
+            limit (int): Number of books returned, the best ranked ones.
+            attributes (tuple): The FIELD_WEIGHTS attributes the keywords are searched in, all of them by default, e.g. ("title",).
+        
+        Returns:
+            books (list): The most relevant books, best first.
+            None: If no book matches the keywords.
+            
+        This method scores the matches of the books_fts index by bm25 with the FIELD_WEIGHTS of each column, boosted by the rentals of each book. The matches are streamed through a heap of the limit best ones, so they are never sorted, and only the books returned are loaded.
+        """
+        # Build the full-text query, keywords without any word match nothing
+        query = full_text_query(keywords)
+        if query is None:
+            return None
+        
+        # Restrict the query to the columns of the attributes
+        if attributes is not None:
+            for attribute in attributes:
+                if attribute not in FIELD_WEIGHTS:
+                    raise ValueError(f"Books can't be searched by {attribute}")
+            query = f"{{{' '.join('_' + attribute for attribute in attributes)}}} : ({query})"
+        
+        # Score the matches, the rentals of each book are counted through the transactions book index
+        weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS.values())
+        statement = text(f"""
+            SELECT books_fts.rowid AS id, bm25(books_fts, {weights}) AS score,
+                (SELECT COUNT(*) FROM transactions WHERE transactions._book_id = books_fts.rowid AND transactions._type = 'Rental') AS rentals
+            FROM books_fts WHERE books_fts MATCH :query
+        """)
+        matches = heapq.nlargest(limit, session.execute(statement, {"query": query}), key=relevance)
+        
+        # Check if any book matches the keywords
+        if not matches:
+            return None
+        
+        # Load the best books only, in the order of their relevance
+        books = {book._id: book for book in session.query(Book).filter(Book._id.in_([match.id for match in matches]))}
+        return [books[match.id] for match in matches]
+    
+    @classmethod
+    def fuzzy_search(cls, session, string, limit=10, threshold=0.5):
+        """Searches books by a title or author that may be misspelled
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            string (str): The title or author, or part of them, e.g. "Harry Poter" or "Orwel".
+            limit (int): Maximum number of books returned.
+            threshold (float): Minimum share of the trigrams of the string a title or author must have to match.
+        
+        Returns:
+            books (list): The matching books, most similar first.
+            None: If no book is similar enough to the string.
+            
+        This method probes the books_trigram index once per trigram of the string, which finds the books sharing any of them without reading the other rows. Only the best ranked candidates are compared with the string, by the share of its trigrams found in their title or author. The index is created by the schema migrations.
+        """
+        # Strings shorter than a trigram can't be matched
+        searched = trigrams(string)
+        if not searched:
+            return None
+        
+        # Query the trigram index for the books sharing the most trigrams with the string
+        query = ' OR '.join('"' + trigram.replace('"', '""') + '"' for trigram in searched)
+        statement = text("""
+            SELECT books.* FROM books_trigram JOIN books ON books._id = books_trigram.rowid
+            WHERE books_trigram MATCH :query ORDER BY books_trigram.rank LIMIT :limit
+        """)
+        candidates = session.query(Book).from_statement(statement).params(query=query, limit=limit * FUZZY_CANDIDATES).all()
+        
+        # Rank the candidates by the similarity of their title or author, whichever is closest
+        ranked = []
+        for book in candidates:
+            similarity = max(trigram_similarity(searched, book.get_title()), trigram_similarity(searched, book.get_author()))
+            if similarity[0] >= threshold:
+                ranked.append((similarity, book))
+        ranked.sort(key=lambda pair: pair[0], reverse=True)
+        
+        # Check if any book is similar enough to the string
+        if ranked:
+            return [book for _, book in ranked[:limit]]
+        else:
+            return None
+    
+    @classmethod
+    def search_filters(cls, session, order_by=None, limit=None, **criteria):
+        """Searches books matching every given criteria
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            order_by (str): Attribute the books are ordered by, prefixed with '-' for descending order, e.g. "-price".
+            limit (int): Maximum number of books returned, None for every match.
+            **criteria: Any of the SEARCH_ATTRIBUTES to be matched exactly, min_ or max_ prefixed RANGE_ATTRIBUTES to be matched by range (inclusive), e.g. max_price=20.0, and available=True to keep only the books with copies in stock.
+        
+        Returns:
+            books (list): The books matching every criteria.
+            None: If no book matches the criteria.
+            
+        This method combines every criteria into a single query, built by filters_query, so sqlite filters the books with the most selective index instead of one scan per attribute.
+        """
+        books = cls.filters_query(session, order_by, limit, **criteria).all()
+        
+        # Check if any book matches the criteria
+        if books:
+            return books
+        else:
+            return None
+    
+    @classmethod
+    def filters_query(cls, session, order_by=None, limit=None, **criteria):
+        """Builds the query of the books matching every given criteria, the arguments are the ones of search_filters"""
+        query = session.query(Book).filter(*cls.filter_conditions(**criteria))
+        
+        # Order the books by the given attribute, ties are broken by id for a stable order
+        if order_by is not None:
+            if order_by.lstrip('-') not in SEARCH_ATTRIBUTES:
+                raise ValueError(f"Books can't be ordered by {order_by.lstrip('-')}")
+            column = getattr(Book, '_' + order_by.lstrip('-'))
+            query = query.order_by(column.desc() if order_by.startswith('-') else column, Book._id)
+        
+        if limit is not None:
+            query = query.limit(limit)
+        
+        return query
+    
+    @classmethod
+    def filter_conditions(cls, **criteria):
+        """Builds the conditions of the search criteria, converting the values to the way they are stored, the criteria are the ones of search_filters"""
+        conditions = []
+        for name, value in criteria.items():
+            # Convert the publication date strings to dates and the prices to cents
+            if name.endswith('publication_date') and isinstance(value, str):
+                value = parse_publication_date(value)
+            elif name.endswith('price'):
+                value = to_cents(value)
+            
+            # ISBNs that don't parse match no book, rather than the books without a key
+            if name == 'isbn':
+                key = isbn_key(value)
+                conditions.append(Book._isbn_key == key if key is not None else false())
+            elif name in SEARCH_ATTRIBUTES:
+                conditions.append(getattr(Book, '_' + name) == value)
+            elif name.startswith('min_') and name[4:] in RANGE_ATTRIBUTES:
+                conditions.append(getattr(Book, '_' + name[4:]) >= value)
+            elif name.startswith('max_') and name[4:] in RANGE_ATTRIBUTES:
+                conditions.append(getattr(Book, '_' + name[4:]) <= value)
+            elif name == 'available':
+                conditions.append(Book._quantity > 0 if value else Book._quantity == 0)
+            else:
+                raise ValueError(f"Unknown search criteria {name}")
+        
+        return conditions
+    
+    @classmethod
+    def load_completions(cls, session, snapshot=None):
+        """Builds the autocomplete indexes of the titles and authors from the books table
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            snapshot (CatalogSnapshot): Catalog snapshot matching the books table, read instead of querying it when given.
+        
+        Returns:
+            No return value.
+        
+        This method reads the titles and authors as plain values and sorts them once, afterwards the indexes are kept up to date by the registering and deleting of books.
+        """
+        if snapshot is not None:
+            cls.completions = {attribute: PrefixIndex(snapshot.values(attribute)) for attribute in ('title', 'author')}
+            return
+        
+        cls.completions = {
+            'title': PrefixIndex(session.scalars(select(Book._title))),
+            'author': PrefixIndex(session.scalars(select(Book._author))),
+        }
+    
+    @classmethod
+    def index_completions(cls, title, author, remove=False):
+        """Adds (or removes) the title and author of a book to the autocomplete indexes, if they were loaded"""
+        if cls.completions is None:
+            return
+        
+        for attribute, value in (('title', title), ('author', author)):
+            if remove:
+                cls.completions[attribute].remove(value)
+            else:
+                cls.completions[attribute].add(value)
+    
+    @classmethod
+    def complete(cls, prefix, limit=10, attribute='title'):
+        """Completes a title or author
+        
+        Args:
+            prefix (str): The start of the title or author typed so far, case is ignored.
+            limit (int): Maximum number of completions returned.
+            attribute (str): The attribute to be completed, this being, title or author.
+        
+        Returns:
+            list: The titles or authors starting with the prefix, in alphabetical order.
+        
+        This method binary searches the in-memory autocomplete indexes, loaded with load_completions, so no query runs per keystroke.
+        """
+        if cls.completions is None:
+            raise RuntimeError("The autocomplete indexes must be loaded with load_completions")
+        
+        if attribute not in cls.completions:
+            raise ValueError("Attribute must be title or author")
+        
+        return cls.completions[attribute].complete(prefix, limit)
+    
+    @classmethod
+    def price_between(cls, session, low=None, high=None, order='asc', limit=None):
+        """Gets the books priced in a range
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            low (float): The lowest price (inclusive), None for no lower bound.
+            high (float): The highest price (inclusive), None for no upper bound.
+            order (str): 'asc' for the cheapest books first, 'desc' for the most expensive first.
+            limit (int): Maximum number of books returned, None for every book of the range.
+        
+        Returns:
+            books (list): The books priced in the range, in price order.
+            None: If no book is priced in the range.
+            
+        This method runs a range query on the price index in cents, which also hands the books over in price order, so the cheapest or most expensive books are found without sorting the table.
+        """
+        if order not in ('asc', 'desc'):
+            raise ValueError("Order must be asc or desc")
+        
+        # Filter the books by the price range in cents
+        query = session.query(Book)
+        if low is not None:
+            query = query.filter(Book._price >= to_cents(low))
+        if high is not None:
+            query = query.filter(Book._price <= to_cents(high))
+        
+        # Order the books by price, ties are broken by id for a stable order
+        if order == 'asc':
+            query = query.order_by(Book._price, Book._id)
+        else:
+            query = query.order_by(Book._price.desc(), Book._id.desc())
+        
+        if limit is not None:
+            query = query.limit(limit)
+        books = query.all()
+        
+        # Check if any book is priced in the range
+        if books:
+            return books
+        else:
+            return None
+    
+    @classmethod
+    def cheapest(cls, session, limit=10):
+        """Gets the cheapest books, None if there's no books in the database"""
+        return cls.price_between(session, order='asc', limit=limit)
+    
+    @classmethod
+    def most_expensive(cls, session, limit=10):
+        """Gets the most expensive books, None if there's no books in the database"""
+        return cls.price_between(session, order='desc', limit=limit)
+    
+    @classmethod
+    def facets(cls, session, attribute, limit=None):
+        """Gets the number of titles and copies of each value of an attribute
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            attribute (str): One of the FACET_ATTRIBUTES, this being, genre, author, publisher or edition.
+            limit (int): Maximum number of values returned, None for every value.
+        
+        Returns:
+            list: The Facet (value, titles, copies) of each value, most titles first.
+            
+        This method reads the book_facets summary table, which the schema migrations keep up to date with triggers as books are registered, added, removed or deleted, so the counts cost one small read instead of grouping the books table.
+        """
+        if attribute not in FACET_ATTRIBUTES:
+            raise ValueError(f"Attribute must be one of {', '.join(FACET_ATTRIBUTES)}")
+        
+        # Query the summary of the attribute, most titles first
+        query = (
+            session.query(BookFacet._value, BookFacet._titles, BookFacet._copies)
+            .filter(BookFacet._attribute == attribute)
+            .order_by(BookFacet._titles.desc(), BookFacet._value)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        
+        # Editions are stored as text in the summary
+        return [Facet(int(value) if attribute == 'edition' else value, titles, copies) for value, titles, copies in query]
+    
+    @classmethod
+    def count_facets(cls, session, attribute):
+        """Counts the titles and copies of each value of an attribute grouping the books table
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            attribute (str): One of the FACET_ATTRIBUTES, this being, genre, author, publisher or edition.
+        
+        Returns:
+            list: The Facet (value, titles, copies) of each value, most titles first.
+            
+        This method runs the GROUP BY the book_facets summary caches, to check it against the books table.
+        """
+        if attribute not in FACET_ATTRIBUTES:
+            raise ValueError(f"Attribute must be one of {', '.join(FACET_ATTRIBUTES)}")
+        
+        # Group the books by the attribute
+        column = getattr(Book, '_' + attribute)
+        titles = func.count(Book._id)
+        query = (
+            session.query(column, titles, func.total(Book._quantity))
+            .filter(column.is_not(None))
+            .group_by(column)
+            .order_by(titles.desc(), cast(column, String))
+        )
+        return [Facet(value, titles, int(copies)) for value, titles, copies in query]
+    
     @classmethod
     def authenticate_isbn(cls, session, isbn):
         """Authenticates book existence
@@ -427,10 +930,28 @@ class Book(Base):
             book: If book with specific ISBN exists in the database.
             None: If publication date does not exist in the database.
             
-        This method checks if there's a book in the database with the specified ISBN since ISBN is unique for each book, which means, checking if the book exists in the database or not.
+        This method checks if there's a book in the database with the specified ISBN since ISBN is unique for each book, which means, checking if the book exists in the database or not. The ISBN is looked up by its integer key, with or without hyphens. The id of a found ISBN is cached, so the book is taken from the session identity map without a query while it's loaded and not expired by a commit. Missing ISBNs aren't cached, another session may register them at any time, the Bloom filter answers for them instead.
         """
-        # Query the database to find a book with the specified isbn
-        book = session.query(Book).filter(Book._isbn == isbn).first()
+        # Get the key of the isbn, an invalid isbn can't match any book
+        key = isbn_key(isbn)
+        if key is None:
+            return None
+        
+        # Get the cached id of the isbn
+        cache = get_isbn_cache(session)
+        book_id = cache.get(key)
+        
+        if book_id is MISSING:
+            # Query the database to find a book with the specified isbn unless the filter rules it out, and remember the id of a found book
+            book = probe(session, 'isbn', key, lambda: session.query(Book).filter(Book._isbn_key == key).first())
+            if book is not None:
+                cache.put(key, book._id)
+        else:
+            # Get the book from the identity map, a book deleted by another writer is queried again
+            book = session.get(Book, book_id)
+            if book is None:
+                cache.invalidate(key)
+                return Book.authenticate_isbn(session, isbn)
         
         # Check if book with specific isbn exists in the database
         if book:
@@ -452,8 +973,9 @@ class Book(Base):
             
         This method checks if there's a book in the database with the specified id since id is unique for each book, which means, checking if the book exists in the database or not.
         """
-        # Query the database to find a book with the specified id
-        book = session.query(Book).filter(Book._id == book_id).first()
+        # Query the database to find a book with the specified id, served from the result cache when repeated
+        books = cls.cached_books(session, ('id', book_id), lambda: session.query(Book).filter(Book._id == book_id))
+        book = books[0] if books else None
         
         # Check if book with specific id exists in the database
         if book:
@@ -503,11 +1025,95 @@ class Book(Base):
             
             # Commit the changes to the database
             session.commit()
+            
+            # Drop the cached results the new book belongs to and remember its id
+            Book.invalidate_results(session, new_book)
+            get_isbn_cache(session).put(new_book._isbn_key, new_book._id)
+            
+            # Offer the new title and author in the autocompletion
+            Book.index_completions(title, author)
 
             return new_book    # Successfully registered a new book
         else:
             return False    # Failed to register a new book
         
+    @classmethod
+    def cached_books(cls, session, key, query):
+        """Runs a finder query through the result cache of the session
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            key (tuple): The finder kind and its normalized value, e.g. ("genre", "Fiction").
+            query (callable): Function building the finder query, called without arguments on a miss.
+        
+        Returns:
+            list: The books found, in the order of the query.
+        
+        This method caches the ids of the books found rather than the books, which every commit expires. A hit returns the books straight from the identity map while they are loaded and not expired, otherwise it loads them back with a single IN query by primary key.
+        """
+        cache = get_cache(session)
+        ids = cache.get(key)
+        if ids is MISSING:
+            books = query().all()
+            cache.put(key, [book._id for book in books])
+            return books
+        
+        # Serve the books from the identity map when none of their columns was expired and none was evicted
+        books = [session.identity_map.get(session.identity_key(Book, book_id)) for book_id in ids]
+        if all(book is not None and not inspect(book).expired_attributes.intersection(Book.__table__.columns.keys()) for book in books):
+            return books
+        
+        # Load the books with a single query, books deleted since are left out
+        loaded = {book._id: book for book in session.query(Book).filter(Book._id.in_(ids))} if ids else {}
+        return [loaded[book_id] for book_id in ids if book_id in loaded]
+    
+    @classmethod
+    def invalidate_results(cls, session, book):
+        """Drops the cached finder results a change to a book affects
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            book: The book object that was registered, changed or is about to be deleted.
+        
+        Returns:
+            No return value.
+        
+        This method drops only the results cached under the values of the book, e.g. ("genre", "Fiction"), the results of other values can't hold it.
+        """
+        cache = get_cache(session)
+        for attribute in CACHED_ATTRIBUTES:
+            cache.invalidate((attribute, getattr(book, '_' + attribute)))
+    
+    @classmethod
+    def normalize(cls, record):
+        """Validates and normalizes a raw book record
+        
+        Args:
+            record (dict): Raw book data with the title, author, publisher, genre, edition, publication_date, description, price and isbn keys.
+        
+        Returns:
+            dict: The validated column values of a single copy of the book, keyed by column name.
+            
+        This method runs the book setters on a transient book object, raising ValueError on invalid data, and returns the resulting column values so they can be written in bulk without keeping ORM objects around.
+        """
+        # Create a transient book object to run the setters validation
+        book = Book()
+        
+        # Set book attributes
+        book.set_title(record['title'])
+        book.set_author(record['author'])
+        book.set_publisher(record['publisher'])
+        book.set_genre(record['genre'])
+        book.set_edition(record['edition'])
+        book.set_publication_date(record['publication_date'])
+        book.set_description(record['description'])
+        book.set_price(record['price'])
+        book.set_isbn(record['isbn'])
+        book.set_quantity(1)
+        
+        # Get the column values of the book, the id is assigned by the database
+        return {column.key: getattr(book, column.key) for column in cls.__table__.columns if column.key != '_id'}
+    
     @classmethod
     def add(cls, session, book):
         """Add a new book to the database
@@ -524,6 +1130,9 @@ class Book(Base):
         # Update the quantity of the book
         book.set_quantity(book.get_quantity() + 1)
         
+        # Drop the cached results holding the book
+        Book.invalidate_results(session, book)
+        
         # Commit the changes to the database
         session.commit()
 
@@ -546,6 +1155,9 @@ class Book(Base):
             # Update the quantity of the book
             book.set_quantity(book.get_quantity() - 1)
             
+            # Drop the cached results holding the book
+            Book.invalidate_results(session, book)
+            
             # Commit the changes to the database
             session.commit()
         
@@ -567,12 +1179,22 @@ class Book(Base):
         This method deletes the book from the database (irreversibly).
         """
         if book.get_quantity() == 0:
+            # Get the title and author before the book is deleted
+            title, author = book.get_title(), book.get_author()
+            
+            # Drop the cached results and id of the book
+            Book.invalidate_results(session, book)
+            get_isbn_cache(session).invalidate(book._isbn_key)
+            
             # Remove the book from the database
             session.delete(book)
             
             # Commit the changes to the database
             session.commit()
             
+            # Stop offering the title and author in the autocompletion
+            Book.index_completions(title, author, remove=True)
+            
             return True    # Successfully deleted a book
         else:
             return False    # Failed to delete a book
@@ -621,6 +1243,62 @@ class Book(Base):
         else:
             return None
     
+    @classmethod
+    def get_all_page(cls, session, after=None, before=None, size=PAGE_SIZE):
+        """Get a page of all books in the database
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            after (int): Id of the last book of the previous page, None for the first page.
+            before (int): Id of the first book of the next page, to page backwards.
+            size (int): Number of books per page.
+            
+        Returns:
+            page: The Page with the books, ordered by id, and the cursors of the pages around it.
+            
+        This method is the paginated variant of get_all, each page seeks to its cursor by id so memory and latency don't grow with the table.
+        """
+        return paginate(session.query(Book), Book._id, after, before, size)
+    
+    @classmethod
+    def get_all_available_page(cls, session, after=None, before=None, size=PAGE_SIZE):
+        """Get a page of all available books in the database
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            after (int): Id of the last book of the previous page, None for the first page.
+            before (int): Id of the first book of the next page, to page backwards.
+            size (int): Number of books per page.
+            
+        Returns:
+            page: The Page with the available books, ordered by id, and the cursors of the pages around it.
+            
+        This method is the paginated variant of get_all_available.
+        """
+        return paginate(session.query(Book).filter(Book._quantity > 0), Book._id, after, before, size)
+    
+    @classmethod
+    def authenticate_page(cls, session, attribute, value, after=None, before=None, size=PAGE_SIZE):
+        """Get a page of the books with a specific attribute value
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            attribute (str): One of the SEARCH_ATTRIBUTES, e.g. "genre".
+            value: The value of the attribute to be matched exactly.
+            after (int): Id of the last book of the previous page, None for the first page.
+            before (int): Id of the first book of the next page, to page backwards.
+            size (int): Number of books per page.
+            
+        Returns:
+            page: The Page with the matching books, ordered by id, and the cursors of the pages around it.
+            
+        This method is the paginated variant of the authenticate_* finders, the attribute index keeps the matching books in id order so each page reads only its own rows. The value is converted like the search_filters criteria, so prices are given in dollars, publication dates as strings or dates and ISBNs with or without hyphens.
+        """
+        if attribute not in SEARCH_ATTRIBUTES:
+            raise ValueError(f"Books can't be searched by {attribute}")
+        
+        return paginate(session.query(Book).filter(*cls.filter_conditions(**{attribute: value})), Book._id, after, before, size)
+    
     def rent_book(self, session):
         """Rents a book
         
@@ -638,6 +1316,9 @@ class Book(Base):
         # Set the quantity of the book
         self.set_quantity(quantity - 1)
         
+        # Drop the cached results holding the book
+        Book.invalidate_results(session, self)
+        
         # Commit the changes to the database
         session.commit()
         
@@ -660,6 +1341,9 @@ class Book(Base):
         # Set the quantity of the book
         self.set_quantity(quantity + 1)
         
+        # Drop the cached results holding the book
+        Book.invalidate_results(session, self)
+        
         # Commit the changes to the database
         session.commit()
         
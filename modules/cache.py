@@ -0,0 +1,132 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import time
+from collections import OrderedDict
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Default maximum number of results kept and seconds each result is served for
+CACHE_SIZE = 1024
+CACHE_TTL = 300.0
+
+# Maximum number of ISBNs whose book id is kept, only found ISBNs are kept and an id whose book is gone is dropped on use, so they don't expire
+ISBN_CACHE_SIZE = 4096
+
+# Marker of a key missing from the cache, results may be None
+MISSING = object()
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class ResultCache:
+    """Process-local cache of query results with least recently used eviction and a time to live
+
+    Results are keyed by (query kind, normalized arguments), e.g. ("genre", "Fiction"). The writers invalidate the keys a changed row affects, and the time to live bounds how stale a result changed by any other path can get. A time to live of None keeps the results until they are evicted or invalidated.
+    """
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # Key to (expiry time, result), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        """Gets the result of a key, default if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, result = entry
+            if expires > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+
+        self.misses += 1
+        return default
+
+    def put(self, key, result):
+        """Stores the result of a key, evicting the least recently used results over the size bound"""
+        self._entries[key] = (self.clock() + self.ttl if self.ttl is not None else float('inf'), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def fetch(self, key, query):
+        """Gets the result of a key, running the query and storing its result on a miss
+
+        Args:
+            key (tuple): The query kind and its normalized arguments.
+            query (callable): Function running the query, called without arguments.
+
+        Returns:
+            The cached or fresh result of the query.
+        """
+        result = self.get(key)
+        if result is MISSING:
+            result = query()
+            self.put(key, result)
+        return result
+
+    def invalidate(self, key):
+        """Drops the result of a key"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drops every result"""
+        self._entries.clear()
+
+    def stats(self):
+        """Gets the hit and miss counters, evictions and size of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def get_cache(session):
+    """Gets the result cache of a session, created with the default bounds on first use
+
+    The cache lives in the session info next to the identity map the cached book ids are resolved through.
+    """
+    cache = session.info.get('result_cache')
+    if cache is None:
+        cache = session.info['result_cache'] = ResultCache()
+    return cache
+
+
+def configure_cache(session, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+    """Replaces the result cache of a session by an empty one with the given size bound and time to live"""
+    session.info['result_cache'] = ResultCache(maxsize, ttl)
+    return session.info['result_cache']
+
+
+def get_isbn_cache(session):
+    """Gets the ISBN to book id cache of a session, created on first use
+
+    The ids are resolved through the identity map of the session, so a hot ISBN costs no query while its book is loaded and not expired by a commit, and a primary key lookup otherwise.
+    """
+    cache = session.info.get('isbn_cache')
+    if cache is None:
+        cache = session.info['isbn_cache'] = ResultCache(ISBN_CACHE_SIZE, ttl=None)
+    return cache
+
+
+def clear_caches(session):
+    """Drops every cached result and book id of a session, for writers bypassing the invalidation"""
+    get_cache(session).clear()
+    get_isbn_cache(session).clear()
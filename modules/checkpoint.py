@@ -0,0 +1,124 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import os
+import sys
+import time
+from sqlalchemy import Column, Integer, String, inspect
+from modules.user import Base
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class ImportCheckpoint(Base):
+    __tablename__ = 'import_checkpoints'
+    _source = Column(String, primary_key=True)  # Kind of import and absolute path of the source file
+    _size = Column(Integer)
+    _mtime = Column(Integer)
+    _offset = Column(Integer)  # Number of records of the source already committed
+
+    # Define Class methods/instances
+    @classmethod
+    def resume(cls, session, kind, file_path):
+        """Gets the checkpoint of an import
+
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            kind (str): Kind of import, e.g. "books" or "transactions".
+            file_path (str): Path of the source file of the import.
+
+        Returns:
+            checkpoint: The checkpoint of the import, with offset 0 if the import was not started or the source file changed since.
+
+        This class method identifies the source by its path, size and modification time, so a checkpoint left by an interrupted import is only resumed for the very same file.
+        """
+        path = os.path.abspath(file_path)
+        status = os.stat(path)
+
+        # Query the database to find the checkpoint of the source
+        checkpoint = session.get(ImportCheckpoint, f"{kind}:{path}")
+
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(_source=f"{kind}:{path}", _offset=0)
+            session.add(checkpoint)
+
+        # Start over if the source changed since the checkpoint was recorded
+        if checkpoint._size != status.st_size or checkpoint._mtime != status.st_mtime_ns:
+            checkpoint._size, checkpoint._mtime, checkpoint._offset = status.st_size, status.st_mtime_ns, 0
+
+        return checkpoint
+
+    def get_offset(self):
+        return self._offset
+
+    def advance(self, offset):
+        """Records the offset of the records committed, the caller commits it with the chunk it belongs to"""
+        self._offset = offset
+
+    def finish(self, session):
+        """Removes the checkpoint of a completed import"""
+        # An import without any chunk never stored its checkpoint, only drop it from the session
+        if inspect(self).persistent:
+            session.delete(self)
+        elif inspect(self).pending:
+            session.expunge(self)
+        session.commit()
+
+
+class ImportProgress:
+    """Reports the records per second, rejected records and ETA of a running import"""
+    def __init__(self, total=None, interval=1.0, stream=None, resumed=0):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.start = time.perf_counter()
+        self.last = 0.0
+        self.records = 0
+        self.rejected = 0
+        
+        # Part of the total processed before this run, e.g. by the interrupted import it resumes
+        self.resumed = resumed
+        self.done = resumed
+
+    def update(self, records, rejected=0, done=None):
+        """Updates the counters, printing a progress line at most once per interval
+
+        Args:
+            records (int): Number of records processed in this run.
+            rejected (int): Number of records rejected in this run.
+            done (int): Part of the total already processed (e.g. bytes of the source read), used for the ETA.
+        """
+        self.records, self.rejected = records, rejected
+        if done is not None:
+            self.done = done
+
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.stream.write(self.line() + '\r')
+            self.stream.flush()
+
+    def finish(self):
+        """Prints the final progress line"""
+        self.done = self.total or self.done
+        self.stream.write(self.line() + '\n')
+        self.stream.flush()
+
+    def rate(self):
+        """Gets the records processed per second"""
+        seconds = time.perf_counter() - self.start
+        return self.records / seconds if seconds > 0 else 0.0
+
+    def eta(self):
+        """Gets the estimated seconds left at the rate of this run, None if unknown"""
+        processed = self.done - self.resumed
+        if not self.total or processed <= 0:
+            return None
+        seconds = time.perf_counter() - self.start
+        return max(0.0, seconds * (self.total - self.done) / processed)
+
+    def line(self):
+        """Formats the progress line"""
+        eta = self.eta()
+        eta = f"{int(eta) // 60:02d}:{int(eta) % 60:02d}" if eta is not None else "--:--"
+        return f"{self.records} records ({self.rate():.0f} records/s), {self.rejected} rejected, ETA {eta}"
@@ -1,40 +1,149 @@
 ###################################################################################################
 #######################################       IMPORTS       #######################################
 ###################################################################################################
+import os
 import json
-from modules.user import User
-from modules.book import Book
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from sqlalchemy import bindparam, insert, select, update
+from modules.user import User, hash_password
+from modules.book import Book, isbn_key
 from modules.transaction import Transaction
-from datetime import datetime
+from modules.reader import open_reader
+from modules.cache import clear_caches
+from modules.bloom import add_keys, might_exist
+from modules.checkpoint import ImportCheckpoint, ImportProgress
+from datetime import date
+
 ###################################################################################################
-#####################################       FUNCTIONS        ######################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Number of records written per transaction by the bulk loaders
+CHUNK_SIZE = 10000
+
+# Number of keys per IN query, kept below the sqlite host parameter limit
+IN_QUERY_SIZE = 900
+
+# Helper function to split an iterable into lists of a given size
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+###################################################################################################
+#######################################       CLASSES       #######################################
 ###################################################################################################
-def load_admin_accounts(session, file_path):
-    """Loads the admin accounts from the json file"""
+class ReferenceCache:
+    """In-memory lookup of user and book ids by id, username or ISBN"""
+    def __init__(self, session):
+        self.session = session
+        # Resolved references, None marks a reference known not to exist
+        self.user_ids = {}
+        self.usernames = {}
+        self.book_ids = {}
+        self.isbns = {}
     
-    # Opens configuration file
-    with open(file_path, 'r') as file:
-        data = json.load(file)
+    def prefetch(self, records):
+        """Resolves the references of a chunk of records not cached yet, with one IN query per kind of reference"""
+        self._fetch(self.user_ids, User._id, User._id, {record['user_id'] for record in records if 'user_id' in record})
+        self._fetch(self.usernames, User._username, User._id, {record['username'] for record in records if 'user_id' not in record and 'username' in record})
+        self._fetch(self.book_ids, Book._id, Book._id, {record['book_id'] for record in records if 'book_id' in record})
+        self._fetch(self.isbns, Book._isbn_key, Book._id, {isbn_key(record['isbn']) for record in records if 'book_id' not in record and 'isbn' in record} - {None})
+    
+    def _fetch(self, cache, key_column, id_column, keys):
+        """Queries the keys missing from the cache and caches the ids found"""
+        missing = [key for key in keys if key not in cache]
+        for batch in chunked(missing, IN_QUERY_SIZE):
+            # Keys not found in the database are cached as None
+            cache.update(dict.fromkeys(batch))
+            for key, id in self.session.execute(select(key_column, id_column).where(key_column.in_(batch))):
+                cache[key] = id
+    
+    def user_id(self, record):
+        """Gets the user id referenced by a prefetched record, None if the user doesn't exist"""
+        if 'user_id' in record:
+            return self.user_ids.get(record['user_id'])
+        return self.usernames.get(record.get('username'))
+    
+    def book_id(self, record):
+        """Gets the book id referenced by a prefetched record, None if the book doesn't exist"""
+        if 'book_id' in record:
+            return self.book_ids.get(record['book_id'])
+        return self.isbns.get(isbn_key(record.get('isbn')))
 
-    # Gets the list of admin accounts
-    admin_accounts = data.get("admins", [])
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def load_admin_accounts(session, file_path, workers=None):
+    """Loads the admin accounts from the json, json lines or csv file
+    
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        file_path (str): Path of the json, json lines or csv file with the admin accounts.
+        workers (int): Number of password hashing processes, defaults to the number of cores.
     
-    for admin in admin_accounts:
-        # Validates if the admin account doesn't exist
-        if User.validate(session , admin['username'], admin['password'], admin['password']):
-            # Register admin account
-            User.register(session, admin['username'], admin['password'], admin=True)
+    Returns:
+        int: Number of admin accounts registered.
+        
+    Each account has a username and either a plaintext password or a password_hash produced by werkzeug generate_password_hash. The existing usernames are checked with one IN query per chunk, for the usernames the Bloom filter doesn't rule out, so a warm start does no hashing at all, and the plaintext passwords of the new accounts are hashed in parallel in a process pool before a single insert.
+    """
+    registered = 0
+    
+    # Streams the admin accounts from the configuration file
+    for chunk in chunked(open_reader(file_path, "admins"), CHUNK_SIZE):
+        # Gets the usernames of the chunk that already exist in the database, skipping the ones the filter rules out
+        existing = set()
+        for usernames in chunked({admin['username'] for admin in chunk if might_exist(session, 'username', admin['username'])}, IN_QUERY_SIZE):
+            existing.update(session.scalars(select(User._username).where(User._username.in_(usernames))))
+        
+        # Validates the new admin accounts, the first account of a repeated username is kept
+        admins, passwords = [], []
+        for admin in chunk:
+            if admin['username'] in existing:
+                continue
+            existing.add(admin['username'])
+            
+            new_admin = User()
+            new_admin.set_username(admin['username'])
+            new_admin.set_is_admin(True)
+            
+            if 'password_hash' in admin:
+                new_admin.set_password_hash(admin['password_hash'])
+            else:
+                passwords.append((new_admin, admin['password']))
+            admins.append(new_admin)
+        
+        # Hashes the plaintext passwords in parallel
+        if len(passwords) > 1:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+                hashes = list(executor.map(hash_password, [password for _, password in passwords]))
+        else:
+            hashes = [hash_password(password) for _, password in passwords]
+        
+        for (new_admin, _), password_hash in zip(passwords, hashes):
+            new_admin.set_password_hash(password_hash)
+        
+        # Register the admin accounts in a single executemany
+        if admins:
+            session.execute(insert(User), [{"_username": admin.get_username(), "_password": admin.get_password(), "_is_admin": True, "_total_fee": 0.0} for admin in admins])
+            session.commit()
+            add_keys(session, 'username', [admin.get_username() for admin in admins])
+        
+        registered += len(admins)
+    
+    return registered
             
 
-def load_books(session, file_path):
-    """Loads the books from the json file"""
+def load_books(session, file_path, format=None, column_map=None):
+    """Loads the books from the json, json lines or csv file"""
     
-    # Opens configuration file
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-        
-    # Gets the list of books
-    books = data.get("books", [])
+    # Streams the books from the configuration file
+    books = open_reader(file_path, "books", format, column_map)
     
     for book in books:
         # Validates if the book exists
@@ -45,21 +154,379 @@ def load_books(session, file_path):
         else:
             # Adds copy of the book
             Book.add(session, existing_book)
+
+
+def validate_book(record):
+    """Validates a raw book record
+    
+    Args:
+        record (dict): Raw book record as read from the configuration file.
+    
+    Returns:
+        tuple: The normalized column values of the book and None if it's valid, None and the rejected record with the validator error message otherwise.
+    """
+    try:
+        return Book.normalize(record), None
+    except KeyError as error:
+        return None, {"record": record, "error": f"Missing {error.args[0]} attribute"}
+    except (ValueError, TypeError) as error:
+        return None, {"record": record, "error": str(error)}
+
+
+def validate_books(records):
+    """Validates a chunk of raw book records
+    
+    Args:
+        records (list): Raw book records as read from the configuration file.
+    
+    Returns:
+        tuple: The normalized column values of the valid books and the rejected records with the validator error message.
+        
+    This function only depends on its arguments so it can run in the worker processes of the import pipeline.
+    """
+    valid, rejected = [], []
+    for record in records:
+        # Keep the invalid records and the reason they were rejected for the report
+        row, entry = validate_book(record)
+        if entry is None:
+            valid.append(row)
+        else:
+            rejected.append(entry)
+    
+    return valid, rejected
+
+
+def write_books(session, books):
+    """Writes a chunk of validated books to the database
+    
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        books (list): Normalized column values of the books, one entry per copy.
+    
+    Returns:
+        tuple: The column values of the books inserted and number of existing books updated.
+        
+    This function collapses duplicate ISBNs into quantities, checks the existing ISBN keys with one set-based query, registers the new books with a single insert and adds the copies of the existing books with a single update. The caller commits the chunk, together with its import checkpoint, and then offers the inserted books in the autocompletion with index_books.
+    """
+    # Collapse duplicate ISBNs into copies, keeping the first record of each ISBN
+    catalog, copies = {}, Counter()
+    for book in books:
+        catalog.setdefault(book['_isbn_key'], book)
+        copies[book['_isbn_key']] += 1
+    
+    # Gets the ISBNs of the chunk that already exist in the database, skipping the ones the filter rules out
+    existing = set()
+    for keys in chunked([key for key in catalog if might_exist(session, 'isbn', key)], IN_QUERY_SIZE):
+        existing.update(session.scalars(select(Book._isbn_key).where(Book._isbn_key.in_(keys))))
+    
+    # Sets the quantity of the new books to the number of copies
+    new_books = []
+    for key, book in catalog.items():
+        if key not in existing:
+            new_books.append(dict(book, _quantity=copies[key]))
+    
+    # Register the new books in a single executemany
+    if new_books:
+        session.execute(insert(Book), new_books)
+        
+        # Bulk inserts bypass the finders invalidation, drop every cached result and add the ISBNs to the filter
+        clear_caches(session)
+        add_keys(session, 'isbn', [book['_isbn_key'] for book in new_books])
+    
+    # Adds the copies of the existing books in a single executemany
+    if existing:
+        books_table = Book.__table__
+        statement = (
+            update(books_table)
+            .where(books_table.c._isbn_key == bindparam('key'))
+            .values(_quantity=books_table.c._quantity + bindparam('copies'))
+        )
+        session.execute(statement, [{'key': key, 'copies': copies[key]} for key in existing])
+    
+    return new_books, len(existing)
+
+
+def index_books(books):
+    """Offers the titles and authors of committed books in the autocompletion, so a rolled back chunk never shows up in it"""
+    for book in books:
+        Book.index_completions(book['_title'], book['_author'])
+
+
+def open_import(session, kind, file_path, report_path=None, progress=False, format=None, column_map=None):
+    """Opens the source of a resumable import
     
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        kind (str): Kind of import and key of the records array, e.g. "books" or "transactions".
+        file_path (str): Path of the json, json lines or csv file with the records.
+        report_path (str): Path of the rejected records report, None to skip the report.
+        progress (bool): True to print the import progress while it runs.
+        format (str): Format of the file (json, jsonl or csv), picked by the file extension when None.
+        column_map (dict): Source column names mapped to the record keys.
     
-def load_transactions(session, file_path):
-    """Load the transactions from the json file"""
-    # Opens configuration file
-    with open(file_path, 'r') as file:
-        data = json.load(file)
+    Returns:
+        tuple: The import checkpoint, the reader, the records left to import, the opened report (or None) and the progress reporter (or None).
         
-    # Gets the list of transactions
-    transactions = data.get("transactions", [])
+    The records already committed by an interrupted import of the same file are skipped and the report is appended to instead of truncated.
+    """
+    checkpoint = ImportCheckpoint.resume(session, kind, file_path)
+    reader = open_reader(file_path, kind, format, column_map)
+    
+    # Skips the records committed before the import was interrupted
+    records = iter(reader)
+    for _ in islice(records, checkpoint.get_offset()):
+        pass
+    
+    # Opens the rejected records report
+    report = None
+    if report_path:
+        report = open(report_path, 'a' if checkpoint.get_offset() else 'w')
+    
+    # Creates the progress reporter, the ETA is based on the characters of the file read since the skipped records
+    reporter = ImportProgress(total=os.path.getsize(file_path), resumed=reader.position) if progress else None
+    
+    return checkpoint, reader, records, report, reporter
+
+
+def load_stats(start, records, inserted, updated, rejected=0):
+    """Builds the statistics of a load started at the given perf_counter time"""
+    seconds = time.perf_counter() - start
+    return {
+        "records": records,
+        "inserted": inserted,
+        "updated": updated,
+        "rejected": rejected,
+        "seconds": seconds,
+        "rows_per_second": records / seconds if seconds > 0 else 0.0,
+    }
+
+
+def bulk_load_books(session, file_path, chunk_size=CHUNK_SIZE, progress=False, format=None, column_map=None):
+    """Bulk loads the books from the json, json lines or csv file
+    
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        file_path (str): Path of the json, json lines or csv file with the books to be loaded.
+        chunk_size (int): Number of records written and committed at once.
+        progress (bool): True to print the records per second and ETA while loading.
+        format (str): Format of the file (json, jsonl or csv), picked by the file extension when None.
+        column_map (dict): Source column names mapped to the book keys, e.g. {"Book Title": "title"}.
+    
+    Returns:
+        dict: Load statistics, this being, records read, books inserted, books updated, elapsed seconds and rows per second.
+        
+    This function streams the same catalog as load_books but validates and writes it a chunk at a time, with one set-based existence query, a single insert, a single update and one commit per chunk. Each commit records the import checkpoint, so an interrupted load resumes after the last committed chunk.
+    """
+    # Start load timer
+    start = time.perf_counter()
+    
+    # Opens the books source, resuming an interrupted load
+    checkpoint, reader, books, _, reporter = open_import(session, "books", file_path, progress=progress, format=format, column_map=column_map)
+    
+    records, inserted, updated = 0, 0, 0
+    for chunk in chunked(books, chunk_size):
+        records += len(chunk)
+        
+        # Validates the chunk, raising ValueError on the first invalid book
+        new_books, chunk_updated = write_books(session, [Book.normalize(book) for book in chunk])
+        
+        # Commit the chunk to the database along with its checkpoint
+        checkpoint.advance(checkpoint.get_offset() + len(chunk))
+        session.commit()
+        index_books(new_books)
+        
+        inserted += len(new_books)
+        updated += chunk_updated
+        
+        if reporter:
+            reporter.update(records, done=reader.position)
+    
+    # Completed load doesn't need to be resumed
+    checkpoint.finish(session)
+    if reporter:
+        reporter.finish()
+    
+    # Calculate load throughput
+    return load_stats(start, records, inserted, updated)
+
+
+def import_books(session, file_path, report_path=None, workers=None, chunk_size=CHUNK_SIZE, progress=False, format=None, column_map=None):
+    """Imports the books from the json, json lines or csv file validating them in parallel
+    
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        file_path (str): Path of the json, json lines or csv file with the books to be imported.
+        report_path (str): Path of the json lines file where the rejected records are written, None to skip the report.
+        workers (int): Number of validation processes, defaults to the number of cores.
+        chunk_size (int): Number of records validated by a worker and committed at once.
+        progress (bool): True to print the records per second, rejected records and ETA while importing.
+        format (str): Format of the file (json, jsonl or csv), picked by the file extension when None.
+        column_map (dict): Source column names mapped to the book keys, e.g. {"Book Title": "title"}.
+    
+    Returns:
+        dict: Import statistics, this being, records read, books inserted, books updated, records rejected, elapsed seconds and rows per second.
+        
+    This function runs the book validation and normalisation of each chunk in a process pool while this process is the single database writer. Only a couple of chunks per worker are in flight at once so memory stays bounded, and invalid records are written to the report with the validator error message instead of stopping the import. Each commit records the import checkpoint, so an interrupted import resumes after the last committed chunk.
+    """
+    # Start import timer
+    start = time.perf_counter()
+    
+    workers = workers or os.cpu_count() or 1
+    records, inserted, updated, rejected = 0, 0, 0, 0
+    
+    # Opens the books source, resuming an interrupted import
+    checkpoint, reader, books, report, reporter = open_import(session, "books", file_path, report_path, progress, format, column_map)
+    
+    def write(future, offset, position):
+        nonlocal inserted, updated, rejected
+        valid, invalid = future.result()
+        
+        # Writes the valid books of the chunk
+        new_books, chunk_updated = write_books(session, valid)
+        inserted += len(new_books)
+        updated += chunk_updated
+        
+        # Reports the rejected records
+        rejected += len(invalid)
+        if report:
+            for entry in invalid:
+                report.write(json.dumps(entry) + '\n')
+            report.flush()
+        
+        # Commit the chunk to the database along with its checkpoint
+        checkpoint.advance(offset)
+        session.commit()
+        index_books(new_books)
+        
+        if reporter:
+            reporter.update(records, rejected, done=position)
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            offset = checkpoint.get_offset()
+            for chunk in chunked(books, chunk_size):
+                records += len(chunk)
+                offset += len(chunk)
+                pending.append((executor.submit(validate_books, chunk), offset, reader.position))
+                
+                # Writes the oldest chunk once enough chunks are in flight, keeping the file order
+                if len(pending) >= workers * 2:
+                    write(*pending.popleft())
+            
+            # Writes the remaining chunks
+            while pending:
+                write(*pending.popleft())
+    finally:
+        if report:
+            report.close()
+    
+    # Completed import doesn't need to be resumed
+    checkpoint.finish(session)
+    if reporter:
+        reporter.finish()
+    
+    # Calculate import throughput
+    return load_stats(start, records, inserted, updated, rejected)
+
+
+def load_transactions(session, file_path, format=None, column_map=None):
+    """Load the transactions from the json, json lines or csv file"""
+    # Streams the transactions from the configuration file
+    transactions = open_reader(file_path, "transactions", format, column_map)
     
     for transaction in transactions:
         # Convert date strings to datetime.date objects
-        checkout_date = datetime.strptime(transaction['checkout_date'], '%Y-%m-%d').date()
-        return_date = datetime.strptime(transaction['return_date'], '%Y-%m-%d').date()
+        checkout_date = date.fromisoformat(transaction['checkout_date'])
+        return_date = date.fromisoformat(transaction['return_date'])
         
         # Registers transaction
         Transaction.register(session, transaction['user_id'], transaction['book_id'], checkout_date, return_date, transaction['fee'], transaction['status'], transaction['type'])
+
+
+def bulk_load_transactions(session, file_path, report_path=None, chunk_size=CHUNK_SIZE, progress=False, format=None, column_map=None):
+    """Bulk loads the transactions history from the json, json lines or csv file
+    
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        file_path (str): Path of the json, json lines or csv file with the transactions to be loaded.
+        report_path (str): Path of the json lines file where the rejected records are written, None to skip the report.
+        chunk_size (int): Number of records written and committed at once.
+        progress (bool): True to print the records per second, rejected records and ETA while loading.
+        format (str): Format of the file (json, jsonl or csv), picked by the file extension when None.
+        column_map (dict): Source column names mapped to the transaction keys, e.g. {"Member": "username"}.
+    
+    Returns:
+        dict: Load statistics, this being, records read, transactions inserted, records rejected, elapsed seconds and rows per second.
+        
+    Each record references its user by user_id or username and its book by book_id or isbn. The references of a chunk are resolved set-wise through a ReferenceCache, so each user or book is only queried once per load, dates are parsed with date.fromisoformat and memoized, and each chunk is written with a single insert and one commit. Records referencing a missing user or book, or failing validation, are rejected into the report. Each commit records the import checkpoint, so an interrupted load resumes after the last committed chunk.
+    """
+    # Start load timer
+    start = time.perf_counter()
+    
+    references = ReferenceCache(session)
+    dates = {}
+    records, inserted, rejected = 0, 0, 0
+    
+    # Helper function to parse the repeated ISO dates once
+    def parse_date(value):
+        if value not in dates:
+            dates[value] = date.fromisoformat(value)
+        return dates[value]
+    
+    # Opens the transactions source, resuming an interrupted load
+    checkpoint, reader, transactions, report, reporter = open_import(session, "transactions", file_path, report_path, progress, format, column_map)
+    
+    try:
+        for chunk in chunked(transactions, chunk_size):
+            records += len(chunk)
+            
+            # Resolves the users and books of the chunk
+            references.prefetch(chunk)
+            
+            rows = []
+            for record in chunk:
+                try:
+                    user_id = references.user_id(record)
+                    book_id = references.book_id(record)
+                    if user_id is None or book_id is None:
+                        raise ValueError("Transaction user or book doesn't exist")
+                    
+                    rows.append(Transaction.normalize(user_id, book_id, parse_date(record['checkout_date']), parse_date(record['return_date']), record['fee'], record['status'], record['type']))
+                
+                except KeyError as error:
+                    message = f"Missing {error.args[0]} attribute"
+                except (ValueError, TypeError) as error:
+                    message = str(error)
+                else:
+                    continue
+                
+                # Reports the rejected record
+                rejected += 1
+                if report:
+                    report.write(json.dumps({"record": record, "error": message}) + '\n')
+            
+            # Register the transactions of the chunk in a single executemany
+            if rows:
+                session.execute(insert(Transaction), rows)
+            
+            # Commit the chunk to the database along with its checkpoint
+            if report:
+                report.flush()
+            checkpoint.advance(checkpoint.get_offset() + len(chunk))
+            session.commit()
+            inserted += len(rows)
+            
+            if reporter:
+                reporter.update(records, rejected, done=reader.position)
+    finally:
+        if report:
+            report.close()
+    
+    # Completed load doesn't need to be resumed
+    checkpoint.finish(session)
+    if reporter:
+        reporter.finish()
+    
+    # Calculate load throughput
+    return load_stats(start, records, inserted, 0, rejected)
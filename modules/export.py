@@ -0,0 +1,82 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import csv
+import json
+import datetime
+from sqlalchemy import select
+from modules.user import User
+from modules.book import Book
+from modules.transaction import Transaction
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Number of rows fetched from the database and written at once
+BATCH_SIZE = 10000
+
+# Tables that can be exported
+TABLES = {"books": Book, "users": User, "transactions": Transaction}
+
+# Columns never exported, secret or derived from another column
+EXCLUDED_COLUMNS = {"_password", "_isbn_key"}
+
+# Columns exported converted back to the values of the import files, prices are stored in cents
+CONVERTED_COLUMNS = {"_price": lambda column: (column / 100.0).label(column.key)}
+
+# Helper function to serialize the values json doesn't support
+def json_default(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def export_table(session, table, file_path, format=None, batch_size=BATCH_SIZE):
+    """Exports a table to a csv or json lines file
+
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        table (str): Name of the table to be exported, this being, books, users or transactions.
+        file_path (str): Path of the file to be written.
+        format (str): "csv" or "jsonl", picked by the file extension when None.
+        batch_size (int): Number of rows fetched and written at once.
+
+    Returns:
+        int: Number of rows exported.
+
+    This function streams plain rows (no ORM objects) from the database with yield_per, so sqlite hands them over a batch at a time, and writes each batch before the next one is fetched, keeping memory bounded by the batch size. The column names are written without the leading underscore, e.g. "title", matching the import file keys, and password hashes are never exported.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Table must be one of {', '.join(TABLES)}")
+
+    if format is None:
+        format = "csv" if file_path.endswith('.csv') else "jsonl"
+
+    if format not in ("csv", "jsonl"):
+        raise ValueError("Format must be csv or jsonl")
+
+    # Get the exported columns of the table
+    model = TABLES[table]
+    columns = [column for column in model.__table__.columns if column.key not in EXCLUDED_COLUMNS]
+    names = [column.key.lstrip('_') for column in columns]
+
+    # Stream the rows of the table in primary key order
+    statement = select(*(CONVERTED_COLUMNS[column.key](column) if column.key in CONVERTED_COLUMNS else column for column in columns)).order_by(*model.__table__.primary_key.columns)
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+
+    exported = 0
+    with open(file_path, 'w', newline='') as file:
+        if format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(names)
+            for rows in result.partitions():
+                writer.writerows(rows)
+                exported += len(rows)
+        else:
+            for rows in result.partitions():
+                file.writelines(json.dumps(dict(zip(names, row)), default=json_default) + '\n' for row in rows)
+                exported += len(rows)
+
+    return exported
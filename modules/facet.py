@@ -0,0 +1,25 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+from collections import namedtuple
+from sqlalchemy import Column, Integer, String
+from modules.user import Base
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Book attributes the catalog is counted by
+FACET_ATTRIBUTES = ('genre', 'author', 'publisher', 'edition')
+
+# Count of a facet value: the value, number of titles and total copies of the titles
+Facet = namedtuple('Facet', ('value', 'titles', 'copies'))
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class BookFacet(Base):
+    __tablename__ = 'book_facets'
+    _attribute = Column(String, primary_key=True)   # Book attribute, one of FACET_ATTRIBUTES
+    _value = Column(String, primary_key=True)       # Value of the attribute, editions are stored as text
+    _titles = Column(Integer)                       # Number of books with the value
+    _copies = Column(Integer)                       # Total quantity of the books with the value
@@ -0,0 +1,334 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+from sqlalchemy import text
+from modules.user import Base
+from modules.facet import FACET_ATTRIBUTES
+from modules.bloom import FILTERED_KEYS
+from modules.book import isbn_check_digit, format_isbn, parse_publication_date
+
+# Modules of every class with a table, so migrate creates all the tables whichever modules the caller imported
+import modules.transaction
+import modules.checkpoint
+import modules.sync
+import modules.snapshot
+
+###################################################################################################
+#####################################       MIGRATIONS        #####################################
+###################################################################################################
+# Each migration takes the connection of the migration transaction and must be idempotent, so a migration interrupted before its version was recorded can safely run again
+
+def books_full_text_index(connection):
+    """Creates the books_fts full-text index over the title, author and description of the books, kept in sync by triggers"""
+    # External content table, the index stores only the tokens and reads the text back from the books columns of the same name
+    connection.exec_driver_sql("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts
+        USING fts5(_title, _author, _description, content='books', content_rowid='_id')
+    """)
+
+    # Keep the index in sync with every insert, delete and update of an indexed column
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, _title, _author, _description) VALUES (new._id, new._title, new._author, new._description);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, _title, _author, _description) VALUES ('delete', old._id, old._title, old._author, old._description);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF _title, _author, _description ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, _title, _author, _description) VALUES ('delete', old._id, old._title, old._author, old._description);
+            INSERT INTO books_fts (rowid, _title, _author, _description) VALUES (new._id, new._title, new._author, new._description);
+        END
+    """)
+
+    # Index the books registered before the migration
+    connection.exec_driver_sql("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def secondary_indexes(connection):
+    """Creates the indexes of the columns the books and transactions are filtered by"""
+    # Exact match lookups of the books by attribute
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_title ON books (_title)")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_author ON books (_author)")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_publisher ON books (_publisher)")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_genre ON books (_genre)")
+
+    # Rentals of a user and book, also serves the transactions of a user
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_user_book_type ON transactions (_user_id, _book_id, _type)")
+
+    # Unpaid rentals of a user
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_user_type_status ON transactions (_user_id, _type, _status)")
+
+    # Unpaid rentals of a book, also serves the transactions of a book
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_book_type_status ON transactions (_book_id, _type, _status)")
+
+    # Transactions by type
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_type ON transactions (_type)")
+
+
+def books_trigram_index(connection):
+    """Creates the books_trigram index over the trigrams of the title and author of the books, kept in sync by triggers"""
+    # External content table tokenized in trigrams, so every three characters of a title or author are an index term
+    connection.exec_driver_sql("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_trigram
+        USING fts5(_title, _author, content='books', content_rowid='_id', tokenize='trigram')
+    """)
+
+    # Keep the index in sync with every insert, delete and update of an indexed column
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_trigram_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_trigram (rowid, _title, _author) VALUES (new._id, new._title, new._author);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_trigram_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_trigram (books_trigram, rowid, _title, _author) VALUES ('delete', old._id, old._title, old._author);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_trigram_update AFTER UPDATE OF _title, _author ON books BEGIN
+            INSERT INTO books_trigram (books_trigram, rowid, _title, _author) VALUES ('delete', old._id, old._title, old._author);
+            INSERT INTO books_trigram (rowid, _title, _author) VALUES (new._id, new._title, new._author);
+        END
+    """)
+
+    # Index the books registered before the migration
+    connection.exec_driver_sql("INSERT INTO books_trigram (books_trigram) VALUES ('rebuild')")
+
+
+def publication_dates(connection):
+    """Converts the publication dates of the books to ISO dates and indexes them"""
+    # Rewrite the mm-dd-yyyy strings (dd-mm-yyyy when the first number can't be a month) as yyyy-mm-dd, which is how the Date column stores them and sorts chronologically
+    for book_id, publication_date in connection.exec_driver_sql("SELECT _id, _publication_date FROM books WHERE _publication_date IS NOT NULL").all():
+        # Dates that don't exist, e.g. 02-30-1965, can't be loaded by the Date column and are cleared
+        try:
+            converted = parse_publication_date(publication_date).isoformat()
+        except ValueError:
+            converted = None
+
+        if converted != publication_date:
+            connection.exec_driver_sql("UPDATE books SET _publication_date = ? WHERE _id = ?", (converted, book_id))
+
+    # Range queries by publication date
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_publication_date ON books (_publication_date)")
+
+
+def price_cents(connection):
+    """Converts the prices of the books to integer cents and indexes them"""
+    # Databases created with the integer column already store cents
+    columns = {row.name: row.type for row in connection.exec_driver_sql("PRAGMA table_info(books)")}
+    if columns['_price'] != 'INTEGER':
+        # Replace the real column by an integer one, the real affinity would store the cents back as reals
+        connection.exec_driver_sql("ALTER TABLE books RENAME COLUMN _price TO _price_real")
+        connection.exec_driver_sql("ALTER TABLE books ADD COLUMN _price INTEGER")
+        connection.exec_driver_sql("UPDATE books SET _price = CAST(round(_price_real * 100) AS INTEGER)")
+        connection.exec_driver_sql("ALTER TABLE books DROP COLUMN _price_real")
+
+    # Price ranges and cheapest or most expensive books
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_price ON books (_price)")
+
+
+def book_facets(connection):
+    """Creates the book_facets summary of the titles and copies per genre, author, publisher and edition, kept up to date by triggers"""
+    connection.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS book_facets (
+            _attribute VARCHAR NOT NULL, _value VARCHAR NOT NULL, _titles INTEGER, _copies INTEGER,
+            PRIMARY KEY (_attribute, _value)
+        )
+    """)
+
+    # Statements counting a book in (or out of) the summary of each attribute, for the row named new (or old)
+    count_in = "".join(f"""
+        INSERT INTO book_facets (_attribute, _value, _titles, _copies)
+        SELECT '{attribute}', new._{attribute}, 1, coalesce(new._quantity, 0) WHERE new._{attribute} IS NOT NULL
+        ON CONFLICT (_attribute, _value) DO UPDATE SET _titles = _titles + 1, _copies = _copies + excluded._copies;
+    """ for attribute in FACET_ATTRIBUTES)
+    count_out = "".join(f"""
+        UPDATE book_facets SET _titles = _titles - 1, _copies = _copies - coalesce(old._quantity, 0) WHERE _attribute = '{attribute}' AND _value = old._{attribute};
+        DELETE FROM book_facets WHERE _attribute = '{attribute}' AND _value = old._{attribute} AND _titles = 0;
+    """ for attribute in FACET_ATTRIBUTES)
+
+    # Registered books are counted in, deleted books out, and updated books out with their old values and in with the new ones
+    columns = ", ".join(f"_{attribute}" for attribute in FACET_ATTRIBUTES)
+    connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS book_facets_insert AFTER INSERT ON books BEGIN {count_in} END")
+    connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS book_facets_delete AFTER DELETE ON books BEGIN {count_out} END")
+    connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS book_facets_update AFTER UPDATE OF {columns}, _quantity ON books BEGIN {count_out} {count_in} END")
+
+    # Count the books registered before the migration
+    connection.exec_driver_sql("DELETE FROM book_facets")
+    for attribute in FACET_ATTRIBUTES:
+        connection.exec_driver_sql(f"""
+            INSERT INTO book_facets (_attribute, _value, _titles, _copies)
+            SELECT '{attribute}', _{attribute}, COUNT(*), TOTAL(coalesce(_quantity, 0)) FROM books WHERE _{attribute} IS NOT NULL GROUP BY _{attribute}
+        """)
+
+
+
+def key_filter_counters(connection):
+    """Counts the inserts of the filtered keys tables by triggers, so a saved Bloom filter missing keys is detected and rebuilt"""
+    connection.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS key_filters (
+            _name VARCHAR NOT NULL PRIMARY KEY, _capacity INTEGER, _error_rate FLOAT, _count INTEGER, _bits BLOB, _covered INTEGER, _inserts INTEGER
+        )
+    """)
+
+    for name, (table, _) in FILTERED_KEYS.items():
+        # No filter is saved yet, it covers no insert so the first use rebuilds it
+        connection.exec_driver_sql(f"INSERT OR IGNORE INTO key_filters (_name, _covered, _inserts) VALUES ('{name}', -1, 0)")
+
+        connection.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS key_filters_{table}_insert AFTER INSERT ON {table} BEGIN
+                UPDATE key_filters SET _inserts = _inserts + 1 WHERE _name = '{name}';
+            END
+        """)
+
+
+
+def isbn_keys(connection):
+    """Corrects the check digits of the stored ISBNs, merging the books whose ISBNs become the same, and adds their ISBN-13 digits as a uniquely indexed integer key, and rebuilds the ISBN filter over the keys"""
+    # Databases created with the key column already have it filled and indexed
+    columns = {row.name for row in connection.exec_driver_sql("PRAGMA table_info(books)")}
+    if '_isbn_key' not in columns:
+        connection.exec_driver_sql("ALTER TABLE books ADD COLUMN _isbn_key BIGINT")
+
+        # Key the stored ISBNs of 13 digits, rewritten with the check digit the lookups validate, as the catalog files were
+        books = []
+        for book_id, isbn in connection.exec_driver_sql("SELECT _id, _isbn FROM books WHERE _isbn IS NOT NULL ORDER BY _id"):
+            digits = isbn.replace('-', '')
+            if len(digits) == 13 and digits.isascii() and digits.isdigit():
+                books.append((isbn_check_digit(digits[:12]) != int(digits[12]), book_id, int(digits[:12] + str(isbn_check_digit(digits[:12])))))
+
+        # ISBNs only differing by their check digit become the same book, the one with the valid ISBN, else the first one, is kept
+        kept = {}
+        for _, book_id, key in sorted(books):
+            if key not in kept:
+                kept[key] = book_id
+                connection.exec_driver_sql("UPDATE books SET _isbn = ?, _isbn_key = ? WHERE _id = ?", (format_isbn(key), key, book_id))
+                continue
+
+            # Merge the copies and the transactions of the duplicate into the kept book
+            connection.exec_driver_sql("""
+                UPDATE books SET _quantity = coalesce(_quantity, 0) + (SELECT coalesce(_quantity, 0) FROM books WHERE _id = ?) WHERE _id = ?
+            """, (book_id, kept[key]))
+            connection.exec_driver_sql("UPDATE transactions SET _book_id = ? WHERE _book_id = ?", (kept[key], book_id))
+            connection.exec_driver_sql("DELETE FROM books WHERE _id = ?", (book_id,))
+        connection.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_books_isbn_key ON books (_isbn_key)")
+
+    # The saved ISBN filter holds the ISBN strings
+    connection.exec_driver_sql("UPDATE key_filters SET _covered = -1 WHERE _name = 'isbn'")
+
+
+
+def books_full_text_genre(connection):
+    """Recreates the books_fts full-text index with the genre of the books, so the ranked search scores genre matches"""
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS books_fts_insert")
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS books_fts_delete")
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS books_fts_update")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS books_fts")
+
+    # Columns in the order of the FIELD_WEIGHTS of the ranked search
+    connection.exec_driver_sql("""
+        CREATE VIRTUAL TABLE books_fts
+        USING fts5(_title, _author, _genre, _description, content='books', content_rowid='_id')
+    """)
+
+    # Keep the index in sync with every insert, delete and update of an indexed column
+    connection.exec_driver_sql("""
+        CREATE TRIGGER books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, _title, _author, _genre, _description) VALUES (new._id, new._title, new._author, new._genre, new._description);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, _title, _author, _genre, _description) VALUES ('delete', old._id, old._title, old._author, old._genre, old._description);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER books_fts_update AFTER UPDATE OF _title, _author, _genre, _description ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, _title, _author, _genre, _description) VALUES ('delete', old._id, old._title, old._author, old._genre, old._description);
+            INSERT INTO books_fts (rowid, _title, _author, _genre, _description) VALUES (new._id, new._title, new._author, new._genre, new._description);
+        END
+    """)
+
+    # Index the books registered before the migration
+    connection.exec_driver_sql("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def catalog_versions(connection):
+    """Counts the changes of the books table by triggers, so a catalog snapshot of an older content is detected and regenerated"""
+    connection.exec_driver_sql("CREATE TABLE IF NOT EXISTS catalog_versions (_table VARCHAR NOT NULL PRIMARY KEY, _version INTEGER)")
+    connection.exec_driver_sql("INSERT OR IGNORE INTO catalog_versions (_table, _version) VALUES ('books', 0)")
+
+    # Every insert, delete and update of a book moves the version, whichever columns it changes
+    for operation in ('insert', 'delete', 'update'):
+        connection.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS catalog_versions_books_{operation} AFTER {operation.upper()} ON books BEGIN
+                UPDATE catalog_versions SET _version = _version + 1 WHERE _table = 'books';
+            END
+        """)
+
+
+# Migrations in order, the schema version of a database is the number of migrations applied to it
+MIGRATIONS = [
+    books_full_text_index,
+    secondary_indexes,
+    books_trigram_index,
+    publication_dates,
+    price_cents,
+    book_facets,
+    key_filter_counters,
+    isbn_keys,
+    books_full_text_genre,
+    catalog_versions,
+]
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def get_version(connection):
+    """Gets the schema version of the database"""
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def explain(session, statement):
+    """Gets the sqlite query plan of a statement
+    
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        statement (Select): The statement to be explained, e.g. the statement attribute of a query.
+    
+    Returns:
+        list: The detail of each step of the plan, e.g. "SEARCH books USING INDEX ix_books_author (_author=?)".
+    """
+    # Render the parameters inline, the plan doesn't depend on their values
+    compiled = statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    return [row.detail for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+def migrate(engine):
+    """Creates the tables and applies the pending schema migrations
+
+    Args:
+        engine (Engine): The SQLAlchemy engine of the sqlite database.
+
+    Returns:
+        int: The schema version of the database after the migration.
+
+    This function creates the missing tables of every class and then applies, in order, the migrations newer than the version stored in the sqlite user_version pragma, recording the version after each one. Databases already up to date only pay for reading the pragma.
+    """
+    # Create the Base tables for each class
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        version = get_version(connection)
+
+        # Apply the pending migrations recording the version of each one
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {number}")
+            version = number
+
+    return version
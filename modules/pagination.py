@@ -0,0 +1,55 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+from collections import namedtuple
+from sqlalchemy import Row
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Default number of rows per page
+PAGE_SIZE = 20
+
+# Page of a listing: its rows, the cursor of the next page (pass as after) and of the previous page (pass as before), None at either end
+Page = namedtuple('Page', ('items', 'next', 'previous'))
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def paginate(query, key, after=None, before=None, size=PAGE_SIZE):
+    """Gets a page of a query by keyset pagination
+
+    Args:
+        query (Query): The query of the listing, filtered but not ordered.
+        key (Column): The unique column the listing is ordered by, e.g. Book._id, rows of several entities are keyed by their first entity.
+        after (any): Key of the last row of the previous page, the page starts after it.
+        before (any): Key of the first row of the next page, the page ends before it.
+        size (int): Number of rows per page.
+
+    Returns:
+        page: The Page with the rows and the cursors of the pages around it.
+
+    This function seeks straight to the cursor through the index of the key instead of skipping rows with an offset, so every page costs the same however deep into the listing it is. One row past the page is fetched to know whether there's a page after it.
+    """
+    # Get the key of a row, the first entity of a row of several
+    def cursor(row):
+        return getattr(row[0] if isinstance(row, Row) else row, key.key)
+
+    if before is not None:
+        # Walk backwards from the cursor and restore the order of the page
+        rows = query.filter(key < before).order_by(key.desc()).limit(size + 1).all()
+        more = len(rows) > size
+        rows = rows[:size][::-1]
+        if not rows:
+            return Page(rows, None, None)
+        return Page(rows, cursor(rows[-1]), cursor(rows[0]) if more else None)
+
+    if after is not None:
+        query = query.filter(key > after)
+
+    rows = query.order_by(key).limit(size + 1).all()
+    more = len(rows) > size
+    rows = rows[:size]
+    if not rows:
+        return Page(rows, None, None)
+    return Page(rows, cursor(rows[-1]) if more else None, cursor(rows[0]) if after is not None else None)
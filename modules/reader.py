@@ -0,0 +1,261 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import os
+import csv
+import json
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Number of characters read from the file at once
+BLOCK_SIZE = 65536
+
+# Characters skipped in between json values
+WHITESPACE = ' \t\n\r'
+
+# Decoder used to parse one json value at a time
+decoder = json.JSONDecoder()
+
+# Helper function to parse the boolean values of csv files
+def parse_bool(value):
+    if value.strip().lower() in ('true', '1', 'yes'):
+        return True
+    if value.strip().lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"{value!r} is not a boolean")
+
+# Types of the non-string values of each kind of csv record, csv files only hold strings
+CSV_TYPES = {
+    "books": {"edition": int, "price": float},
+    "transactions": {"user_id": int, "book_id": int, "fee": float, "status": parse_bool},
+}
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class JSONArrayReader:
+    """Streams the records of an array nested under a key of a json file
+
+    The position attribute holds the number of characters of the file consumed so far, for progress reporting.
+    """
+    def __init__(self, file_path, key):
+        self.file_path = file_path
+        self.key = key
+        self.position = 0
+
+    def __iter__(self):
+        """Yields the records of the array one at a time
+
+        The file is read in blocks and each record is decoded as soon as it is complete, so memory stays bounded by the size of a single record no matter the size of the file.
+        """
+        with open(self.file_path, 'r') as file:
+            self._file = file
+            self._buffer = ''
+            self._pos = 0
+            self._consumed = 0
+            self._eof = False
+
+            # The document must be an object holding the array
+            self._expect('{')
+
+            while True:
+                if self._peek() == '}':
+                    return
+
+                # Get the next key of the object
+                key = self._value()
+                self._expect(':')
+
+                if key == self.key:
+                    yield from self._array()
+                    return
+
+                # Skip the value of any other key
+                self._value()
+                if self._peek() == ',':
+                    self._pos += 1
+
+    def _array(self):
+        """Yields the values of the array at the current position"""
+        self._expect('[')
+
+        if self._peek() == ']':
+            return
+
+        while True:
+            value = self._value()
+            self.position = self._consumed + self._pos
+            yield value
+
+            # Each value is followed by a comma or by the end of the array
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Invalid json in {self.file_path}: expected ',' or ']' but found {char!r}")
+
+    def _fill(self):
+        """Reads the next block of the file into the buffer, returns False at the end of the file"""
+        if self._eof:
+            return False
+
+        # Drop the consumed part of the buffer
+        block = self._file.read(BLOCK_SIZE)
+        self._buffer = self._buffer[self._pos:] + block
+        self._consumed += self._pos
+        self._pos = 0
+
+        if not block:
+            self._eof = True
+
+        return bool(block)
+
+    def _peek(self):
+        """Skips whitespace and returns the next character without consuming it"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                raise ValueError(f"Invalid json in {self.file_path}: unexpected end of file")
+
+    def _expect(self, char):
+        """Consumes the expected character"""
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Invalid json in {self.file_path}: expected {char!r} but found {found!r}")
+        self._pos += 1
+
+    def _value(self):
+        """Decodes the json value at the current position, reading more blocks while it is incomplete"""
+        self._peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self._buffer, self._pos)
+
+                # A value that touches the end of the buffer may be truncated (e.g. a number)
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+
+            self._fill()
+
+
+class JSONLinesReader:
+    """Streams the records of a json lines file, one json object per line
+
+    The position attribute holds the number of characters of the file consumed so far, for progress reporting.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.position = 0
+
+    def __iter__(self):
+        """Yields the records of the file one at a time"""
+        with open(self.file_path, 'r') as file:
+            for line in file:
+                self.position += len(line)
+
+                # Skip blank lines
+                if line.strip():
+                    yield json.loads(line)
+
+class CSVReader:
+    """Streams the records of a csv file with a header row
+
+    The position attribute holds the number of characters of the file consumed so far, for progress reporting.
+    """
+    def __init__(self, file_path, types=None, column_map=None):
+        self.file_path = file_path
+        self.types = types or {}
+        self.column_map = column_map or {}
+        self.position = 0
+
+    def __iter__(self):
+        """Yields the records of the file one at a time, keyed by the header columns renamed through the column map"""
+        with open(self.file_path, 'r', newline='') as file:
+            reader = csv.DictReader(self._lines(file))
+
+            # Rename the header columns once instead of every record, before the typed values are looked up
+            if reader.fieldnames is not None:
+                reader.fieldnames = [self.column_map.get(name, name) for name in reader.fieldnames]
+
+            for record in reader:
+                # Convert the typed values, values that fail to convert are left for the validators to reject
+                for key, type in self.types.items():
+                    if record.get(key) is not None:
+                        try:
+                            record[key] = type(record[key])
+                        except ValueError:
+                            pass
+                yield record
+
+    def _lines(self, file):
+        """Yields the lines of the file keeping track of the position"""
+        for line in file:
+            self.position += len(line)
+            yield line
+
+
+class ColumnMapper:
+    """Renames the keys of the records of another reader, e.g. the columns of a supplier file to the record keys"""
+    def __init__(self, reader, column_map):
+        self.reader = reader
+        self.column_map = column_map
+
+    @property
+    def position(self):
+        return self.reader.position
+
+    def __iter__(self):
+        """Yields the records of the reader with their keys renamed, keys not in the map are kept"""
+        for record in self.reader:
+            yield {self.column_map.get(key, key): value for key, value in record.items()}
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def open_reader(file_path, key, format=None, column_map=None):
+    """Opens a streaming reader for the records of a file
+
+    Args:
+        file_path (str): Path of the file with the records.
+        key (str): Kind of records, this being, the key of the records array in json files, e.g. "books" or "transactions".
+        format (str): Format of the file, one of READERS, picked by the file extension when None.
+        column_map (dict): Source column or key names mapped to the record keys, e.g. {"Book Title": "title"}.
+
+    Returns:
+        reader: An iterable yielding one record (dict) at a time, with the position in the file read so far.
+
+    Every reader shares the same streaming record interface, so the loaders handle any format the same way. New formats are plugged in by adding a factory to READERS, which is handed the column map as well.
+    """
+    if format is None:
+        format = os.path.splitext(file_path)[1].lstrip('.').lower()
+
+    if format not in READERS:
+        raise ValueError(f"Format must be one of {', '.join(READERS)}")
+
+    return READERS[format](file_path, key, column_map or None)
+
+# Helper function to rename the keys of the records of a reader when a column map is given
+def mapped(reader, column_map):
+    return ColumnMapper(reader, column_map) if column_map else reader
+
+###################################################################################################
+#####################################       READERS        ########################################
+###################################################################################################
+# Reader factories by format, each taking the file path, the kind of records and the column map
+READERS = {
+    "json": lambda file_path, key, column_map: mapped(JSONArrayReader(file_path, key), column_map),
+    "jsonl": lambda file_path, key, column_map: mapped(JSONLinesReader(file_path), column_map),
+    "csv": lambda file_path, key, column_map: CSVReader(file_path, CSV_TYPES.get(key), column_map),
+}
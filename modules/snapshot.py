@@ -0,0 +1,241 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import os
+import mmap
+import struct
+from collections import namedtuple
+from sqlalchemy import Column, Integer, String, func, select
+from modules.user import Base
+from modules.book import Book, format_isbn, isbn_key
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Snapshot file identification
+MAGIC = b'LMCS'
+VERSION = 3
+
+# Header: magic, version, number of records, catalog signature (content version, count, max id) and section offsets
+HEADER = struct.Struct('<4sHxxI3q5Q')
+
+# Record: id, edition, quantity, price (stored in cents by the books table) and (offset, length) in the string table of each string attribute, the publication date as yyyy-mm-dd
+RECORD = struct.Struct('<qiid14I')
+
+# Record numbers of the sorted indexes
+INDEX = struct.Struct('<I')
+
+# String attributes of a record, in file order
+STRINGS = ('title', 'author', 'publisher', 'genre', 'publication_date', 'description', 'isbn')
+
+# Book columns written to the snapshot, in record order
+COLUMNS = (Book._id, Book._edition, Book._quantity, Book._price, Book._title, Book._author, Book._publisher, Book._genre, Book._publication_date, Book._description, Book._isbn)
+
+# Read-only book record served by the snapshot
+BookRecord = namedtuple('BookRecord', ('id', 'edition', 'quantity', 'price') + STRINGS)
+
+# Helper function to tell if the bytes of a view sort before a key, comparing memoryview slices so the mapped bytes are never copied
+def precedes(view, key):
+    # Find the length of the common prefix by halving, each slice comparison runs without a copy
+    length = min(len(view), len(key))
+    low, high = 0, length
+    while low < high:
+        middle = (low + high + 1) // 2
+        if view[:middle] == key[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    # The first differing byte orders them, else the shorter one is first
+    if low < length:
+        return view[low] < key[low]
+    return len(view) < len(key)
+
+# Helper function to get the signature of the books table, which changes with every insert, update or delete of a book
+def catalog_signature(session):
+    version = session.execute(select(CatalogVersion._version).where(CatalogVersion._table == 'books')).scalar()
+    count, max_id = session.execute(select(func.count(Book._id), func.max(Book._id))).one()
+    return version or 0, count, max_id or 0
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class CatalogVersion(Base):
+    __tablename__ = 'catalog_versions'
+    _table = Column(String, primary_key=True)
+    _version = Column(Integer)  # Changes of the table, counted by the triggers of the migration
+
+
+class CatalogSnapshot:
+    """Read-only catalog of the books table in a memory-mapped binary file
+
+    The file holds a header, fixed-width records, record numbers sorted by ISBN, title and author, and a string table. Lookups binary search the sorted indexes directly in the mapped file, so opening a snapshot costs nothing but the mmap call and no ORM object is hydrated.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+        # Map the snapshot file read-only
+        with open(file_path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, version, self.count, *signature, self._records, isbn_index, title_index, author_index, self._strings = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{file_path} is not a catalog snapshot")
+
+        self.signature = tuple(signature)
+        self._indexes = {'isbn': isbn_index, 'title': title_index, 'author': author_index}
+
+    def close(self):
+        """Unmaps the snapshot file"""
+        self._view.release()
+        self._map.close()
+
+    @classmethod
+    def write(cls, session, file_path):
+        """Exports the books table to a snapshot file
+
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            file_path (str): Path of the snapshot file to be written.
+
+        Returns:
+            No return value.
+
+        This class method reads the books as plain rows, builds the string table and the sorted indexes and writes the file under a temporary name before renaming it, so readers never map a partially written snapshot.
+        """
+        signature = catalog_signature(session)
+        rows = session.execute(select(*COLUMNS).order_by(Book._id)).all()
+
+        # Build the string table, repeated strings (authors, genres, publishers) are stored once
+        strings, offsets, size = [], {}, 0
+        records = []
+        for row in rows:
+            references = []
+            for value in row[4:]:
+                data = str(value).encode() if value is not None else b''
+                if data not in offsets:
+                    offsets[data] = size
+                    strings.append(data)
+                    size += len(data)
+                references += [offsets[data], len(data)]
+            records.append(RECORD.pack(row[0], row[1] or 0, row[2] or 0, (row[3] or 0) / 100, *references))
+
+        # Sort the record numbers by the utf-8 bytes of each key, which is the order the lookups compare in
+        def index(position):
+            order = sorted(range(len(rows)), key=lambda number: (rows[number][position] or '').encode())
+            return b''.join(INDEX.pack(number) for number in order)
+
+        indexes = [index(10), index(4), index(5)]
+
+        # Compute the offset of each section
+        offset = HEADER.size
+        records_offset = offset
+        offset += RECORD.size * len(records)
+        index_offsets = []
+        for data in indexes:
+            index_offsets.append(offset)
+            offset += len(data)
+        strings_offset = offset
+
+        # Write the snapshot under a temporary name and replace the previous one
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(records), *signature, records_offset, *index_offsets, strings_offset))
+            file.writelines(records)
+            file.writelines(indexes)
+            file.writelines(strings)
+        os.replace(temporary_path, file_path)
+
+    @classmethod
+    def load(cls, session, file_path):
+        """Opens the snapshot of the catalog, regenerating it if the catalog changed
+
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            file_path (str): Path of the snapshot file.
+
+        Returns:
+            snapshot: The CatalogSnapshot matching the current books table.
+        """
+        if os.path.exists(file_path):
+            try:
+                snapshot = cls(file_path)
+            except (ValueError, struct.error):
+                snapshot = None
+
+            if snapshot is not None:
+                if snapshot.signature == catalog_signature(session):
+                    return snapshot
+                snapshot.close()
+
+        # Regenerate the missing, unreadable or stale snapshot
+        cls.write(session, file_path)
+        return cls(file_path)
+
+    def _string(self, offset, length):
+        """Gets a string of the string table"""
+        start = self._strings + offset
+        return str(self._view[start:start + length], 'utf-8')
+
+    def _key(self, attribute, number):
+        """Gets a view of the raw bytes of a string attribute of a record, for the index comparisons"""
+        position = STRINGS.index(attribute)
+        offset, length = struct.unpack_from('<II', self._map, self._records + number * RECORD.size + 24 + 8 * position)
+        start = self._strings + offset
+        return self._view[start:start + length]
+
+    def record(self, number):
+        """Gets the record at the given position of the snapshot"""
+        id, edition, quantity, price, *references = RECORD.unpack_from(self._map, self._records + number * RECORD.size)
+        strings = [self._string(references[index], references[index + 1]) for index in range(0, len(references), 2)]
+        return BookRecord(id, edition, quantity, price, *strings)
+
+    def _search(self, attribute, value):
+        """Gets the record numbers whose attribute equals value, by binary search of the attribute index"""
+        key = memoryview(value.encode())
+        index = self._indexes[attribute]
+
+        def number(position):
+            return INDEX.unpack_from(self._map, index + position * INDEX.size)[0]
+
+        # Find the first position whose key is not lower than the searched key
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if precedes(self._key(attribute, number(middle)), key):
+                low = middle + 1
+            else:
+                high = middle
+
+        # Collect every record with an equal key
+        numbers = []
+        while low < self.count and self._key(attribute, number(low)) == key:
+            numbers.append(number(low))
+            low += 1
+        return numbers
+
+    def values(self, attribute):
+        """Gets the value of a string attribute of every record, in record order"""
+        position = STRINGS.index(attribute)
+        for number in range(self.count):
+            offset, length = struct.unpack_from('<II', self._map, self._records + number * RECORD.size + 24 + 8 * position)
+            yield self._string(offset, length)
+
+    def find_isbn(self, isbn):
+        """Gets the book record with the given ISBN, with or without hyphens, None if the snapshot doesn't have it"""
+        key = isbn_key(isbn)
+        numbers = self._search('isbn', format_isbn(key)) if key is not None else []
+        return self.record(numbers[0]) if numbers else None
+
+    def find_title(self, title):
+        """Gets the book records with the given title"""
+        return [self.record(number) for number in self._search('title', title)]
+
+    def find_author(self, author):
+        """Gets the book records of the given author"""
+        return [self.record(number) for number in self._search('author', author)]
+
+    def __len__(self):
+        return self.count
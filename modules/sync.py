@@ -0,0 +1,249 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import os
+import json
+import time
+import hashlib
+from sqlalchemy import Column, Integer, String, bindparam, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from modules.user import Base
+from modules.book import Book, format_isbn, isbn_key, parse_isbn
+from modules.reader import open_reader
+from modules.cache import clear_caches
+from modules.bloom import add_keys
+from modules.config import CHUNK_SIZE, IN_QUERY_SIZE, chunked, index_books, validate_book
+
+###################################################################################################
+#######################################       HELPERS       #######################################
+###################################################################################################
+# Number of bytes hashed at once when fingerprinting the source file
+HASH_BLOCK_SIZE = 1 << 20
+
+# Helper function to fingerprint the content of a record
+def record_digest(record):
+    return hashlib.blake2b(json.dumps(record, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+# Helper function to get the ISBN a record is grouped and fingerprinted by, formatted from its key so every spelling of an ISBN is the same, None if it's missing or invalid
+def record_isbn(record):
+    key = isbn_key(record.get('isbn'))
+    return format_isbn(key) if key is not None else None
+
+# Helper function to fingerprint the content of a file
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+###################################################################################################
+#######################################       CLASSES       #######################################
+###################################################################################################
+class SourceFingerprint(Base):
+    __tablename__ = 'source_fingerprints'
+    _path = Column(String, primary_key=True)
+    _size = Column(Integer)
+    _mtime = Column(Integer)
+    _digest = Column(String)
+
+
+class BookFingerprint(Base):
+    __tablename__ = 'book_fingerprints'
+    _isbn = Column(String, primary_key=True)
+    _digest = Column(String)    # Digest of the first record of the ISBN in the source
+    _copies = Column(Integer)   # Number of records of the ISBN in the source
+
+###################################################################################################
+#####################################       FUNCTIONS        ######################################
+###################################################################################################
+def sync_books(session, file_path, chunk_size=CHUNK_SIZE, format=None, column_map=None, report_path=None):
+    """Synchronizes the books table with a catalog file, applying only what changed
+
+    Args:
+        session (Session): The SQLAlchemy session object to perform database queries.
+        file_path (str): Path of the json, json lines or csv file with the catalog.
+        chunk_size (int): Number of records fingerprinted or written at once.
+        format (str): Format of the file (json, jsonl or csv), picked by the file extension when None.
+        column_map (dict): Source column names mapped to the book keys, e.g. {"Book Title": "title"}.
+        report_path (str): Path of the json lines file where the rejected records are written, None to skip the report.
+
+    Returns:
+        dict: Sync statistics, this being, whether the file was skipped as unchanged, records read, books inserted, books updated, records rejected and elapsed seconds.
+
+    This function skips the file when its size and modification time, or else its content hash, match the last sync. Otherwise it fingerprints every record into a temporary table, finds the new or changed ISBNs (different content or number of copies) with one query against the stored fingerprints and streams the file a second time to upsert only those books. The quantity of a changed book moves by the difference in copies, so rentals are kept; books that exist without a fingerprint (loaded before the first sync) only get their metadata refreshed. Invalid records are rejected with the validator error message instead of failing the sync, and keep no fingerprint so they are retried once the file changes. The whole sync runs in a single transaction.
+    """
+    # Start sync timer
+    start = time.perf_counter()
+    stats = {"skipped": False, "records": 0, "inserted": 0, "updated": 0, "rejected": 0}
+    rejected, new_books = [], []
+
+    # Checks the source file against its fingerprint of the last sync
+    path = os.path.abspath(file_path)
+    status = os.stat(path)
+    source = session.get(SourceFingerprint, path)
+
+    if source is not None and source._size == status.st_size and source._mtime == status.st_mtime_ns:
+        stats["skipped"] = True
+    else:
+        digest = file_digest(path)
+
+        if source is not None and source._digest == digest:
+            stats["skipped"] = True
+        else:
+            _apply_changes(session, open_reader(file_path, "books", format, column_map), chunk_size, stats, rejected, new_books)
+
+        # Stores the source file fingerprint
+        if source is None:
+            source = SourceFingerprint(_path=path)
+            session.add(source)
+        source._size, source._mtime, source._digest = status.st_size, status.st_mtime_ns, digest
+
+        # Commit the sync to the database
+        session.commit()
+        
+        # Bulk writes bypass the finders invalidation, drop every cached result
+        if stats["inserted"] or stats["updated"]:
+            clear_caches(session)
+        
+        # Changed books may have a new title or author, rebuild the autocompletion if it's in use, otherwise only offer the committed new books
+        if stats["updated"] and Book.completions is not None:
+            Book.load_completions(session)
+        else:
+            index_books(new_books)
+        
+        # Reports the rejected records
+        if report_path and rejected:
+            with open(report_path, 'w') as report:
+                for entry in rejected:
+                    report.write(json.dumps(entry) + '\n')
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _apply_changes(session, reader, chunk_size, stats, rejected, inserted):
+    """Finds the new or changed ISBNs of the catalog reader and upserts their books, the reader is iterated twice, the invalid records are appended to rejected and the titles and authors of the new books to inserted"""
+    # Temporary tables live in the connection of the sync transaction
+    session.execute(text("CREATE TEMP TABLE IF NOT EXISTS sync_records (position INTEGER PRIMARY KEY, isbn TEXT, digest TEXT)"))
+    session.execute(text("CREATE TEMP TABLE IF NOT EXISTS sync_changes (isbn TEXT PRIMARY KEY, digest TEXT, copies INTEGER, old_copies INTEGER)"))
+    session.execute(text("DELETE FROM sync_records"))
+    session.execute(text("DELETE FROM sync_changes"))
+
+    # First pass, fingerprints every record of the file
+    statement = text("INSERT INTO sync_records (position, isbn, digest) VALUES (:position, :isbn, :digest)")
+    rows = []
+    for position, record in enumerate(reader):
+        # Records without a valid ISBN can't be matched to a book, reject them straight away
+        try:
+            isbn = format_isbn(parse_isbn(record['isbn']))
+        except KeyError:
+            isbn, error = None, "Missing isbn attribute"
+        except ValueError as exception:
+            isbn, error = None, str(exception)
+
+        if isbn is None:
+            rejected.append({"record": record, "error": error})
+            stats["rejected"] += 1
+            continue
+
+        rows.append({"position": position, "isbn": isbn, "digest": record_digest(record)})
+        if len(rows) == chunk_size:
+            session.execute(statement, rows)
+            rows = []
+    if rows:
+        session.execute(statement, rows)
+
+    # Keeps the ISBNs whose first record or number of copies differ from the stored fingerprint
+    changes = session.execute(text("""
+        INSERT INTO sync_changes (isbn, digest, copies, old_copies)
+        SELECT source.isbn, source.digest, source.copies, fingerprint._copies
+        FROM (SELECT isbn, digest, MIN(position), COUNT(*) AS copies FROM sync_records GROUP BY isbn) AS source
+        LEFT JOIN book_fingerprints AS fingerprint ON fingerprint._isbn = source.isbn
+        WHERE fingerprint._isbn IS NULL OR fingerprint._digest != source.digest OR fingerprint._copies != source.copies
+    """)).rowcount
+    stats["records"] = session.execute(text("SELECT COUNT(*) FROM sync_records")).scalar()
+
+    # Second pass, upserts the changed books until every change was applied
+    select_changes = text("SELECT isbn, digest, copies, old_copies FROM sync_changes WHERE isbn IN :isbns").bindparams(bindparam('isbns', expanding=True))
+    delete_changes = text("DELETE FROM sync_changes WHERE isbn IN :isbns").bindparams(bindparam('isbns', expanding=True))
+    remaining = changes
+    for chunk in chunked(reader, chunk_size):
+        if remaining == 0:
+            break
+
+        # Gets the changes of the chunk that were not applied yet
+        pending = {}
+        for isbns in chunked({record_isbn(record) for record in chunk} - {None}, IN_QUERY_SIZE):
+            for row in session.execute(select_changes, {"isbns": isbns}):
+                pending[row.isbn] = row
+        if not pending:
+            continue
+
+        # Gets the keys of the changed ISBNs that already exist in the books table
+        existing = set()
+        for isbns in chunked(pending, IN_QUERY_SIZE):
+            existing.update(session.scalars(select(Book._isbn_key).where(Book._isbn_key.in_([isbn_key(isbn) for isbn in isbns]))))
+
+        new_books, changed_books, fingerprints, invalid = [], [], [], []
+        for record in chunk:
+            # Only the first record of a changed ISBN is applied
+            change = pending.pop(record_isbn(record), None)
+            if change is None:
+                continue
+
+            # Rejects the invalid record, its ISBN keeps its books and fingerprint as they were
+            row, entry = validate_book(record)
+            if entry is not None:
+                invalid.append(change.isbn)
+                rejected.append(entry)
+                continue
+
+            if row['_isbn_key'] in existing:
+                # Moves the quantity by the difference in copies, books without a fingerprint keep their quantity
+                delta = change.copies - change.old_copies if change.old_copies is not None else 0
+                del row['_quantity']
+                changed_books.append(dict(row, _delta=delta))
+            else:
+                new_books.append(dict(row, _quantity=change.copies))
+
+            fingerprints.append({"_isbn": change.isbn, "_digest": change.digest, "_copies": change.copies})
+
+        # Register the new books in a single executemany
+        if new_books:
+            session.execute(insert(Book), new_books)
+            add_keys(session, 'isbn', [book['_isbn_key'] for book in new_books])
+            
+            # Keep the new titles and authors for the autocompletion, offered once the sync is committed
+            inserted.extend({'_title': book['_title'], '_author': book['_author']} for book in new_books)
+
+        # Updates the changed books in a single executemany
+        if changed_books:
+            books_table = Book.__table__
+            columns = [key for key in changed_books[0] if key not in ('_isbn', '_isbn_key', '_delta')]
+            statement = (
+                update(books_table)
+                .where(books_table.c._isbn_key == bindparam('b_isbn_key'))
+                .values({column: bindparam('b' + column) for column in columns})
+                .values(_quantity=func.max(0, books_table.c._quantity + bindparam('b_delta')))
+            )
+            session.execute(statement, [{'b' + key: value for key, value in book.items()} for book in changed_books])
+
+        # Upserts the fingerprints of the applied books
+        if fingerprints:
+            statement = sqlite_insert(BookFingerprint)
+            statement = statement.on_conflict_do_update(
+                index_elements=[BookFingerprint._isbn],
+                set_={"_digest": statement.excluded._digest, "_copies": statement.excluded._copies},
+            )
+            session.execute(statement, fingerprints)
+
+        # Marks the changes of the chunk as applied or rejected
+        for isbns in chunked([fingerprint["_isbn"] for fingerprint in fingerprints] + invalid, IN_QUERY_SIZE):
+            session.execute(delete_changes, {"isbns": isbns})
+
+        stats["inserted"] += len(new_books)
+        stats["updated"] += len(changed_books)
+        stats["rejected"] += len(invalid)
+        remaining -= len(fingerprints) + len(invalid)
+
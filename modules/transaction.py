@@ -2,9 +2,11 @@
 #######################################       IMPORTS       #######################################
 ###################################################################################################
 import datetime
-from sqlalchemy import Column, Float, Integer, String, Date, Boolean, ForeignKey, or_
+from sqlalchemy import Column, Float, Integer, String, Date, Boolean, ForeignKey, func, or_
 from sqlalchemy.orm import relationship
-from modules.user import Base
+from modules.user import Base, User
+from modules.book import Book
+from modules.pagination import PAGE_SIZE, Page, paginate
 from tabulate import tabulate
 
 ###################################################################################################
@@ -13,6 +15,10 @@ from tabulate import tabulate
 # Headers for table printing
 headers = ["Username", "Book ISBN", "Type", "Checkout Date", "Return Date", "Fee", "Status"]
 
+# Shown instead of the ISBN or username of a deleted book or user
+DELETED_BOOK = "Book doesn't exist anymore"
+DELETED_USER = "User doesn't exist anymore"
+
 ###################################################################################################
 #######################################       CLASSES       #######################################
 ###################################################################################################
@@ -123,13 +129,11 @@ class Transaction(Base):
         return self._status
     
     # Define Class methods/instances
-    def display(transactions, book_isbns, user_usernames):
+    def display(rows):
         """Displays transaction data
         
         Args:
-            transactions: Transaction object that can be a list of objects or a single object to be displayed. 
-            book_isbns (string list): List of book ISBNs to be displayed.
-            user_usernames (string list): List of user usernames to be displayed.
+            rows (list): The (transaction, ISBN, username) rows to be displayed, e.g. from a listing query.
             
         Returns:
             No return value.
@@ -137,7 +141,7 @@ class Transaction(Base):
         This instance method prints the transaction data as a string, this being, username, ISBN, type, checkout date, return date, fee, and status.
         """
         table = []
-        for transaction, isbn, username in zip(transactions, book_isbns, user_usernames):
+        for transaction, isbn, username in rows:
             status = transaction.get_status()
             if status:
                 status = "Active rental"
@@ -149,13 +153,11 @@ class Transaction(Base):
         
         print(tabulate(table, headers, tablefmt="double_outline"))
 
-    def display_active(transactions, book_isbns, user_usernames):
+    def display_active(rows):
         """Displays active transactions data
         
         Args:
-        transactions: Transaction object that can be a list of objects or a single object to be displayed.
-        book_isbns (string list): List of book ISBNs to be displayed.
-        user_usernames (string list): List of user usernames to be displayed.
+        rows (list): The (transaction, ISBN, username) rows to be displayed, e.g. from a listing query.
         
         Returns:
         No return value.
@@ -164,7 +166,7 @@ class Transaction(Base):
         """
         headers = ["Username", "Book ISBN", "Type", "Checkout Date", "Return Date", "Fee"]
         table = []
-        for transaction, isbn, username in zip(transactions, book_isbns, user_usernames):
+        for transaction, isbn, username in rows:
             status = transaction.get_status()
             if status:
                 row = [username, isbn, transaction.get_type(), transaction.get_checkout_date(), transaction.get_return_date(), transaction.get_fee()]
@@ -259,6 +261,39 @@ class Transaction(Base):
         else:
             return None
         
+    @classmethod
+    def normalize(cls, user_id, book_id, checkout_date, return_date, fee, status, type):
+        """Validates the values of a transaction
+        
+        Args:
+            user_id (int): The User ID of the transaction.
+            book_id (int): The Book ID of the transaction.
+            checkout_date (date): The checkout date of the transaction.
+            return_date (date): The return date of the transaction.
+            fee (float): The fee of the transaction.
+            status (bool): The status of the transaction.
+            type (string): The type of transaction.
+        
+        Returns:
+            dict: The validated column values of the transaction, keyed by column name.
+        
+        This class method runs the transaction setters on a transient transaction object, raising ValueError on invalid data, so transactions can be written in bulk without keeping ORM objects around.
+        """
+        # Create a transient transaction object to run the setters validation
+        transaction = Transaction()
+        
+        # Set transaction attributes
+        transaction.set_user_id(user_id)
+        transaction.set_book_id(book_id)
+        transaction.set_type(type)
+        transaction.set_checkout_date(checkout_date)
+        transaction.set_return_date(return_date)
+        transaction.set_fee(fee)
+        transaction.set_status(status)
+        
+        # Get the column values of the transaction, the id is assigned by the database
+        return {column.key: getattr(transaction, column.key) for column in cls.__table__.columns if column.key != '_id'}
+        
     @classmethod
     def register(cls, session, user_id, book_id, checkout_date, return_date, fee, status, type):
         """Register new transaction
@@ -334,6 +369,50 @@ class Transaction(Base):
         # Query the database to get all transactions made by the given user
         return session.query(Transaction).filter(Transaction._book_id == book_id).all()
     
+    @classmethod
+    def listing(cls, session):
+        """Query of the transactions with the ISBN of their book and the username of their user
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            
+        Returns:
+            query: The query of the (transaction, isbn, username) rows, to be filtered and ordered by the caller.
+            
+        This class method outer joins the books and users by their primary keys, so a listing costs a single query however many transactions it shows, and a transaction of a deleted book or user is kept with DELETED_BOOK or DELETED_USER instead of its ISBN or username.
+        """
+        return (
+            session.query(Transaction, func.coalesce(Book._isbn, DELETED_BOOK).label('isbn'), func.coalesce(User._username, DELETED_USER).label('username'))
+            .outerjoin(Book, Book._id == Transaction._book_id)
+            .outerjoin(User, User._id == Transaction._user_id)
+        )
+    
+    @classmethod
+    def get_all_username_listing(cls, session, user_id):
+        """Get the listing rows of all transactions corresponding to the given user
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            user_id (int): User ID to filter transactions by.
+            
+        Returns:
+            rows (list): The (transaction, isbn, username) rows of the transactions of the user, empty if there's none.
+        """
+        return Transaction.listing(session).filter(Transaction._user_id == user_id).order_by(Transaction._id).all()
+    
+    @classmethod
+    def get_all_isbn_listing(cls, session, book_id):
+        """Get the listing rows of all transactions corresponding to the given book
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            book_id (int): Book ID to filter transactions by.
+            
+        Returns:
+            rows (list): The (transaction, isbn, username) rows of the transactions of the book, empty if there's none.
+        """
+        return Transaction.listing(session).filter(Transaction._book_id == book_id).order_by(Transaction._id).all()
+    
     @classmethod
     def get_all_type(cls, session, transaction_type: str = None) -> list:
         """Get all transactions in the database
@@ -368,4 +447,59 @@ class Transaction(Base):
         
         else:
             return []  # Return an empty list if no matching transactions or invalid type
+    
+    @classmethod
+    def get_all_type_page(cls, session, transaction_type=None, status=None, after=None, before=None, size=PAGE_SIZE):
+        """Get a page of the transactions in the database
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            transaction_type (str, optional): Type of transactions to filter (e.g., "Rental", "Return").
+            status (bool, optional): True to get only the active rentals, False for the non-active ones.
+            after (int): Id of the last transaction of the previous page, None for the first page.
+            before (int): Id of the first transaction of the next page, to page backwards.
+            size (int): Number of transactions per page.
+            
+        Returns:
+            page: The Page with the transactions, ordered by id, and the cursors of the pages around it, empty if the transaction type doesn't match any type of transaction types possible.
+            
+        This method is the paginated variant of get_all_type, each page seeks to its cursor by id so memory and latency don't grow with the table.
+        """
+        return Transaction.filter_type_page(session.query(Transaction), transaction_type, status, after, before, size)
+    
+    @classmethod
+    def get_all_type_listing_page(cls, session, transaction_type=None, status=None, after=None, before=None, size=PAGE_SIZE):
+        """Get a page of the listing rows of the transactions in the database
+        
+        Args:
+            session (Session): The SQLAlchemy session object to perform database queries.
+            transaction_type (str, optional): Type of transactions to filter (e.g., "Rental", "Return").
+            status (bool, optional): True to get only the active rentals, False for the non-active ones.
+            after (int): Id of the last transaction of the previous page, None for the first page.
+            before (int): Id of the first transaction of the next page, to page backwards.
+            size (int): Number of transactions per page.
+            
+        Returns:
+            page: The Page with the (transaction, isbn, username) rows, ordered by transaction id, and the cursors of the pages around it.
+            
+        This method is the variant of get_all_type_page with the ISBN and username of each transaction, fetched by the same single query.
+        """
+        return Transaction.filter_type_page(Transaction.listing(session), transaction_type, status, after, before, size)
+    
+    @classmethod
+    def filter_type_page(cls, query, transaction_type, status, after, before, size):
+        """Gets a page of a transactions query filtered by type and status, empty if the transaction type doesn't match any type of transaction types possible"""
+        # Filter the transactions by type
+        if transaction_type == "Rental":
+            query = query.filter(Transaction._type == "Rental")
+        elif transaction_type == "Return":
+            query = query.filter(Transaction._type.in_(["Return", "Early Return", "Late Return"]))
+        elif transaction_type is not None:
+            return Page([], None, None)
+        
+        # Filter the transactions by status
+        if status is not None:
+            query = query.filter(Transaction._status == status)
+        
+        return paginate(query, Transaction._id, after, before, size)
         
\ No newline at end of file
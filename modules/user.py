@@ -3,16 +3,14 @@
 ###################################################################################################
 import re
 from sqlalchemy import Column, Integer, String, Boolean, Float
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from werkzeug.security import check_password_hash, generate_password_hash
 from tabulate import tabulate
+from modules.base import Base
+from modules.bloom import probe
 ###################################################################################################
 #######################################       HELPERS       #######################################
 ###################################################################################################
-# Configuration
-Base = declarative_base()
-
 # Headers for table printing
 headers = ["Username", "Total fee"]
 
@@ -31,6 +29,12 @@ def basic_string_attribute_validation(string, attribute):
     # Valid string
     return True
 
+# Helper function to validate and hash a password, used by the password hashing worker processes
+def hash_password(password):
+    user = User()
+    user.set_password(password)
+    return user.get_password()
+
 ###################################################################################################
 #######################################       CLASSES       #######################################
 ###################################################################################################
@@ -74,6 +78,18 @@ class User(Base):
         # Set password attribute
         self._password = generate_password_hash(password)
     
+    def set_password_hash(self, password_hash):
+        # Password hash attribute validation
+        if not isinstance(password_hash, str):
+            raise ValueError("Password hash must be a string")
+        
+        # Werkzeug hashes are of format method$salt$hash
+        if password_hash.count('$') != 2:
+            raise ValueError("Password hash must be of format method$salt$hash")
+        
+        # Set already hashed password attribute
+        self._password = password_hash
+    
     def set_is_admin(self, is_admin):
         # is admin attribute validation
         if not isinstance(is_admin, bool):
@@ -144,8 +160,8 @@ class User(Base):
         This method checks if the username is available (not already taken) and if the password matches the password confirmation. Additionally, it checks for password complexity requirements.
         
         """
-        # Query the database to find a user with the specified username
-        user = session.query(User).filter(User._username == username).first()
+        # Query the database to find a user with the specified username unless the filter rules it out
+        user = probe(session, 'username', username, lambda: session.query(User).filter(User._username == username).first())
         
         # Check if user was found with the specified username
         if user:
@@ -222,8 +238,8 @@ class User(Base):
             
         This method checks if there's a user in the database with the specified username since username is unique for each user, which means, checking if the user exists in the database or not.
         """
-        # Query the database to find a user with the specified username
-        user = session.query(User).filter(User._username == username).first()
+        # Query the database to find a user with the specified username unless the filter rules it out
+        user = probe(session, 'username', username, lambda: session.query(User).filter(User._username == username).first())
         
         # Check if user was found with the specified username
         if user:
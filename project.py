@@ -4,18 +4,30 @@
 import sys
 import re
 import os
-from modules.user import Base
+import atexit
 from modules.menu import Menu
 from modules.user import User
-from modules.book import Book
+from modules.book import Book, format_isbn, parse_isbn, parse_publication_date
 from modules.transaction import Transaction
-from modules.config import load_admin_accounts, load_books
+from modules.config import load_admin_accounts
+from modules.sync import sync_books
+from modules.snapshot import CatalogSnapshot
+from modules.export import export_table
+from modules.migration import migrate
+from modules.bloom import FILTERED_KEYS, filter_stats, get_filter, save_filters
 from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pyfiglet import Figlet
 from tabulate import tabulate
 
+# Tab completion of the input is only available where the readline module is (not on windows)
+try:
+    import readline
+except ImportError:
+    readline = None
+
 ###################################################################################################
 #################################       APP CONFIGURATION        ##################################
 ###################################################################################################
@@ -23,8 +35,8 @@ from tabulate import tabulate
 # Initialize the SQLAlchemy engine for sqlite
 engine = create_engine('sqlite:///library.db')  # Adjust the database URL as needed
 
-# Create the Base tables for each class
-Base.metadata.create_all(engine)
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
 
 # Create a Session class and bind the engine to it
 Session = sessionmaker(bind=engine)
@@ -32,6 +44,12 @@ Session = sessionmaker(bind=engine)
 # Create session object
 session = Session()
 
+# Catalog snapshot read at startup instead of the books table
+SNAPSHOT_PATH = "catalog.snapshot"
+
+# Invalid books of the catalog rejected by the startup sync
+SYNC_REPORT_PATH = "books_rejected.jsonl"
+
 # Create figlet object, set font and print menu title
 figlet = Figlet()
 figlet.setFont(font="slant")
@@ -59,6 +77,51 @@ def basic_string_attribute_validation(string, attribute):
 def clear_terminal():
     # Clear the terminal screen
     os.system('cls' if os.name == 'nt' else 'clear')
+
+def browse(get_page, display, empty_message):
+    # Display a listing one page at a time with next and previous page navigation
+    page = get_page(None, None)
+    if not page.items:
+        print(empty_message)
+        return
+    
+    while True:
+        display(page.items)
+        
+        # Offer the navigation available from the page
+        options = []
+        if page.previous is not None:
+            options.append("p- previous page")
+        if page.next is not None:
+            options.append("n- next page")
+        if not options:
+            return
+        
+        choice = input(f"{', '.join(options)}, any other key to exit: ").strip().lower()
+        if choice == 'n' and page.next is not None:
+            page = get_page(page.next, None)
+        elif choice == 'p' and page.previous is not None:
+            page = get_page(None, page.previous)
+        else:
+            return
+
+def input_completed(prompt, attribute):
+    # Get user input completing the titles or authors of the library with the tab key
+    if readline is None or Book.completions is None:
+        return input(prompt)
+    
+    # Complete the whole line typed so far, not just its last word
+    def completer(text, state):
+        completions = Book.complete(readline.get_line_buffer(), limit=20, attribute=attribute)
+        return completions[state] if state < len(completions) else None
+    
+    readline.set_completer(completer)
+    readline.set_completer_delims('')
+    readline.parse_and_bind('tab: complete')
+    try:
+        return input(prompt)
+    finally:
+        readline.set_completer(None)
     
 ###################################################################################################
 ###################################       SEARCH BOOKS        #####################################
@@ -69,7 +132,7 @@ def get_title():
         print("Usage example: OOP Python Fundamentals")
         
         # Get user input
-        title = input("Enter title: ")
+        title = input_completed("Enter title: ", "title")
         
         # Call auxiliar function to validate basic string attribute features
         validation_result = basic_string_attribute_validation(title, attribute="Title")
@@ -89,7 +152,7 @@ def get_author():
         print("Usage example: Ricardo Silva")
         
         # Get user input
-        author = input("Enter author: ")
+        author = input_completed("Enter author: ", "author")
         
         # Call auxiliar function to validate basic string attribute features
         validation_result = basic_string_attribute_validation(author, attribute="Author")
@@ -173,40 +236,36 @@ def get_publication_date():
         # Get user input
         publication_date = input("Enter publication date: ")
         
-        # Ensure input is not empty
-        if not publication_date:
-            print("Publication date cannot be empty\n")
-            continue
-            
-        # Ensure input follows the format dd-mm-yyyy
-        if len(publication_date) != 10 or publication_date.count('-') != 2:
-            print("Publication date must be of format mm-dd-yyyy\n")
-            continue
-    
-        # Split the input after initial checks
-        month, day, year = publication_date.split('-')
-        
-        # Validate day, month, and year components
-        if not (day.isdigit() and month.isdigit() and year.isdigit()):
-            print("Publication date components must be integers\n")
+        # Validates publication date attribute - must be a valid mm-dd-yyyy date
+        try:
+            parse_publication_date(publication_date)
+        except ValueError as error:
+            print(f"{error}\n")
             continue
         
-        day, month, year = int(day), int(month), int(year)
+        # Return valid publication date
+        return publication_date
 
-        if not 1 <= day <= 31:
-            print("Publication date day must be in between 1 and 31\n")
-            continue
-            
-        if not 1 <= month <= 12:
-            print("Publication date month must be in between 1 and 12\n")
+
+def get_year(prompt):
+    """Get year input from the user"""
+    # Get user year
+    while True:
+        print("Usage example: 1990")
+        
+        # Validates year - must be an integer in the publication date range
+        try:
+            year = int(input(prompt))
+        except ValueError:
+            print("Year must be an integer\n")
             continue
         
         if not 1800 <= year <= 2100:
-            print("Publication date year must be in between 1800 and 2100\n")
+            print("Year must be in between 1800 and 2100\n")
             continue
         
-        # Return valid publication date
-        return publication_date
+        # Return valid year
+        return year
 
 
 def get_price():
@@ -232,12 +291,8 @@ def get_price():
 
 def show_all_books():
     """Displays all books in the database"""
-    # Get all books from the database
-    books = Book.get_all(session)
-    if books:
-        Book.display_metadata(books)
-    else:
-        print("The library doesn't own any books\n")
+    # Browse all books of the database a page at a time
+    browse(lambda after, before: Book.get_all_page(session, after, before), Book.display_metadata, "The library doesn't own any books\n")
 
 
 def search_by_title():
@@ -245,9 +300,16 @@ def search_by_title():
     # Get user title input
     title = get_title()
     
-    # Authenticates book title by validating the title and searching for books with that title in the database
-    books = Book.authenticate_title(session, title)
+    # Searches the most relevant books for the title
+    books = Book.ranked_search(session, title, attributes=("title",))
+    if books:
+        Book.display_metadata(books)
+        return
+    
+    # Search for similar titles in case of a typo
+    books = Book.fuzzy_search(session, title)
     if books:
+        print("The library doesn't own any book with that title, did you mean:")
         Book.display_metadata(books)
     else:
         print("The library doesn't own any book with that title\n")
@@ -258,10 +320,17 @@ def search_by_author():
     # Get user author input
     author = get_author()
     
-    # Authenticates book author by validating the author and searching for it in the database
-    books = Book.authenticate_author(session, author)
+    # Searches the most relevant books for the author
+    books = Book.ranked_search(session, author, attributes=("author",))
     if books:
         Book.display_metadata(books)
+        return
+    
+    # Search for similar authors in case of a typo
+    books = Book.fuzzy_search(session, author)
+    if books:
+        print("The library doesn't own any books of that author, did you mean:")
+        Book.display_metadata(books)
     else:
         print("The library doesn't own any books of that author\n")
         
@@ -318,6 +387,36 @@ def search_by_publication_date():
         print("The library doesn't own any books of that publication date\n")
         
 
+def search_by_price_range():
+    """Searches books priced in between two prices, cheapest first, gets user input and handles validation cases"""
+    # Get user prices input
+    print("Minimum price")
+    low = get_price()
+    print("Maximum price")
+    high = get_price()
+    
+    # Searches the books priced in the range by range on the price index
+    books = Book.price_between(session, min(low, high), max(low, high), limit=50)
+    if books:
+        Book.display_metadata(books)
+    else:
+        print("The library doesn't own any books in that price range\n")
+        
+
+def search_by_publication_period():
+    """Searches books published in between two years, gets user input and handles validation cases"""
+    # Get user years input
+    start = get_year("Enter first year: ")
+    end = get_year("Enter last year: ")
+    
+    # Searches the books published in the period by range on the publication date index
+    books = Book.published_between(session, date(min(start, end), 1, 1), date(max(start, end), 12, 31))
+    if books:
+        Book.display_metadata(books)
+    else:
+        print("The library doesn't own any books published in that period\n")
+        
+
 def search_by_price():
     """Searches books by price, gets user input and handles validation cases"""
     # Get user price input
@@ -331,10 +430,105 @@ def search_by_price():
         print("The library doesn't own any books of that price\n")
         
         
+def get_keywords():
+    """Get keywords input from the user"""
+    while True:
+        print("Usage example: python fundamentals")
+        
+        # Get user input
+        keywords = input("Enter keywords: ")
+        
+        # Call auxiliar function to validate basic string attribute features
+        validation_result = basic_string_attribute_validation(keywords, attribute="Keywords")
+        
+        if isinstance(validation_result, str):
+            print(validation_result)
+            continue
+        
+        # Return valid keywords
+        return keywords
+
+
+def search_by_keyword():
+    """Searches books by keywords in the title, author, genre and description, gets user input and handles validation cases"""
+    # Get user keywords input
+    keywords = get_keywords()
+    
+    # Searches the full-text index for the most relevant books matching the keywords
+    books = Book.ranked_search(session, keywords)
+    if books:
+        Book.display_metadata(books)
+    else:
+        print("The library doesn't own any books matching those keywords\n")
+        
+        
+def get_search_criteria():
+    """Get the criteria of a combined search from the user, blank answers are skipped"""
+    print("Usage example: Fantasy genre by JK Rowling under 20.0, leave the other criteria blank")
+    criteria = {}
+    
+    # Get the string criteria
+    for attribute in ("title", "author", "publisher", "genre"):
+        while True:
+            value = input(f"Enter {attribute}: ")
+            if not value:
+                break
+            
+            # Call auxiliar function to validate basic string attribute features
+            validation_result = basic_string_attribute_validation(value, attribute=attribute.capitalize())
+            
+            if isinstance(validation_result, str):
+                print(validation_result)
+                continue
+            
+            criteria[attribute] = value
+            break
+    
+    # Get the price range criteria
+    for key, prompt in (("min_price", "Enter minimum price: "), ("max_price", "Enter maximum price: ")):
+        while True:
+            value = input(prompt)
+            if not value:
+                break
+            
+            # Validates price attribute - must be a positive float
+            try:
+                price = float(value)
+            except ValueError:
+                print("Price must be of type float\n")
+                continue
+            
+            if price <= 0.0:
+                print("Price must be a positive float number\n")
+                continue
+            
+            criteria[key] = price
+            break
+    
+    # Return the given criteria
+    return criteria
+
+
+def search_combined():
+    """Searches books matching several criteria at once, gets user input and handles validation cases"""
+    # Get user search criteria input
+    criteria = get_search_criteria()
+    if not criteria:
+        print("At least one criteria must be given\n")
+        return
+    
+    # Searches the books matching every criteria in a single query, cheapest first
+    books = Book.search_filters(session, order_by="price", limit=50, **criteria)
+    if books:
+        Book.display_metadata(books)
+    else:
+        print("The library doesn't own any books matching those criteria\n")
+        
+        
 def search_book_menu():
     """Search book"""
     # Create search book menu object
-    search_book_menu = Menu("Search Book", ["Show all books", "Search by title", "Search by author", "Search by publisher", "Search by genre", "Search by edition", "Search by publication date", "Search by price", "Exit"])
+    search_book_menu = Menu("Search Book", ["Show all books", "Search by title", "Search by author", "Search by publisher", "Search by genre", "Search by edition", "Search by publication date", "Search by price", "Search by keyword", "Combined search", "Search by publication period", "Search by price range", "Exit"])
     
     # Display search book menu and get user input
     while True:
@@ -358,6 +552,14 @@ def search_book_menu():
             case "8":
                 search_by_price()
             case "9":
+                search_by_keyword()
+            case "10":
+                search_combined()
+            case "11":
+                search_by_publication_period()
+            case "12":
+                search_by_price_range()
+            case "13":
                 return
             case _:
                 print("Invalid input\n")
@@ -369,34 +571,19 @@ def get_isbn():
     """Get ISBN input from the user and handles validation""" 
     # Get user ISBN
     while True:
-        print("Usage example: 111-2-33-444444-5")
+        print("Usage example: 978-0-13-235088-4 or 9780132350884")
         
         isbn = input("Enter ISBN: ").strip()
         
-        # Ensure input is not empty
-        if not isbn:
-            print("ISBN cannot be empty\n")
-            continue
-        
-        # Ensure input follows the format xxx-x-xx-xxxxxx-x
-        parts = isbn.split('-')
-        if len(parts) != 5 or not all(part.isdigit() for part in parts):
-            print("ISBN must be of format xxx-x-xx-xxxxxx-x\n")
-            continue
-        
-        # Validate length of each set of digits
-        lengths = [3, 1, 2, 6, 1]
-        valid = True
-        for part, length in zip(parts, lengths):
-            if len(part) != length:
-                print(f"ISBN set must be a number of {length} digits\n")
-                valid = False
-        
-        if not valid:
+        # Validate the digits and check digit of the ISBN
+        try:
+            key = parse_isbn(isbn)
+        except ValueError as error:
+            print(f"{error}\n")
             continue
         
-        # Return valid ISBN
-        return isbn
+        # Return valid ISBN in the format xxx-x-xx-xxxxxx-x
+        return format_isbn(key)
             
 
 def get_return_date():
@@ -560,70 +747,24 @@ def return_book(user):
 def list_books(_type=None):
     """List books by transaction type or all available books"""
     if _type:
-        # Get all transaction objects in the database
-        transactions = Transaction.get_all_type(session, transaction_type=_type)
+        # Get the book objects of a page of active transactions
+        def display(transactions):
+            Book.display_metadata([Book.authenticate_id(session, transaction.get_book_id()) for transaction in transactions])
         
-        if not transactions:
-            print("No transactions were found in the database\n")
-            return
-        
-        # Get all book objects that have transaction information
-        books = []
-        for transaction in transactions:
-            if transaction.get_status():
-                books.append(Book.authenticate_id(session, transaction.get_book_id()))
-
-        if books:
-            Book.display_metadata(books)
-        else:
-            print("There are no active rented books\n")
-            return
+        # Browse the active transactions a page at a time
+        browse(lambda after, before: Transaction.get_all_type_page(session, _type, True, after, before), display, "There are no active rented books\n")
     else:
-        # Get all available book objects
-        books = Book.get_all_available(session)
-        
-        if books:
-            Book.display_metadata(books)
-        else:
-            print("There are no available books\n")
-            return
+        # Browse the available books a page at a time
+        browse(lambda after, before: Book.get_all_available_page(session, after, before), Book.display_metadata, "There are no available books\n")
         
     
 def list_transactions(_type=None, status=None):
     """List transactions by type or all transactions""" 
-    # Get all transaction objects in the database
-    transactions = Transaction.get_all_type(session, transaction_type=_type)
-    
-    if not transactions:
-        print("No transactions were found in the database\n")
-        return
-    
-    # Get all books and users objects that have transaction information
-    books, users = [], []
-    for transaction in transactions:
-        books.append(Book.authenticate_id(session, transaction.get_book_id()))
-        users.append(User.authenticate_id(session, transaction.get_user_id()))
-    
-    # Get all book and user ids
-    book_isbns = []
-    for book in books:
-        if book is not None:
-            book_isbns.append(book.get_isbn())
-        else: 
-            book_isbns.append("Book doesn't exist anymore")
-    
-    user_usernames = []
-    for user in users:
-        if user is not None:
-            user_usernames.append(user.get_username())
-        else:
-            user_usernames.append("User doesn't exist anymore")
-
-    # Calls display method instance based on the listing request - by type or active rentals
-    if status is None:
-        Transaction.display(transactions, book_isbns, user_usernames)
-    else:
-        Transaction.display_active(transactions, book_isbns, user_usernames)
+    # Browse the transactions a page at a time, active rentals only when a status is given
+    active, empty_message = (True, "There's no active rentals at the moment\n") if status is not None else (None, "No transactions were found in the database\n")
+    # Each page of transactions comes with the ISBN of their books and username of their users from a single joined query
+    display = Transaction.display if status is None else Transaction.display_active
+    browse(lambda after, before: Transaction.get_all_type_listing_page(session, _type, active, after, before), display, empty_message)
     
 
 def list_users_fees():
@@ -682,32 +823,15 @@ def admin_search_user_transactions():
         print("There's no user registered in the database with that username\n")
         return
     
-    # Get all transaction objects made by the user
-    transactions = Transaction.get_all_username(session, user.get_id())
+    # Get all transactions made by the user with the ISBN of their books
+    rows = Transaction.get_all_username_listing(session, user.get_id())
     
-    if not transactions:
+    if not rows:
         print("No transactions made by user were found\n")
         return
     
-    # Get all books objects that have transaction information
-    books = []
-    for transaction in transactions:
-        books.append(Book.authenticate_id(session, transaction.get_book_id()))
-    
-    # Get all book and user ids
-    book_isbns = []
-    for book in books:
-        if book is not None:
-            book_isbns.append(book.get_isbn())
-        else: 
-            book_isbns.append("Book doesn't exist anymore")
-    
-    user_usernames = []
-    for _ in range(len(transactions)):
-        user_usernames.append(username)
-    
     # Print all user transactions
-    Transaction.display(transactions, book_isbns, user_usernames)
+    Transaction.display(rows)
     
     
 def admin_search_book_transactions():
@@ -722,32 +846,15 @@ def admin_search_book_transactions():
         print("There's no book registered in the database with that ISBN\n")
         return
     
-    # Get all transaction objects made for the book
-    transactions = Transaction.get_all_isbn(session, book.get_id())
+    # Get all transactions made for the book with the username of their users
+    rows = Transaction.get_all_isbn_listing(session, book.get_id())
     
-    if not transactions:
+    if not rows:
         print("No transactions for that book were found\n")
         return
     
-    # Get all users objects that have transaction information
-    users = []
-    for transaction in transactions:
-        users.append(User.authenticate_id(session, transaction.get_user_id()))
-    
-    # Get all book and user ids
-    user_usernames = []
-    for user in users:
-        if user is not None:
-            user_usernames.append(user.get_username())
-        else: 
-            user_usernames.append("User doesn't exist anymore")
-    
-    book_isbns = []
-    for _ in range(len(transactions)):
-        book_isbns.append(isbn)
-    
     # Print all book transactions
-    Transaction.display(transactions, book_isbns, user_usernames)
+    Transaction.display(rows)
     
 
 def admin_searching_menu():
@@ -878,6 +985,76 @@ def admin_show_balance():
     
     print(tabulate(table, headers, tablefmt="double_outline"))
 
+
+def admin_show_filter_stats():
+    """Display the size and false positive rates of the ISBN and username filters"""
+    headers = ["Filter", "Keys", "Capacity", "Size (bytes)", "Hashes", "Expected FP rate", "Probes", "Skipped queries", "False positives", "Observed FP rate"]
+    table = []
+    for name, stats in filter_stats(session).items():
+        table.append([name, stats["keys"], stats["capacity"], stats["bytes"], stats["hashes"], f"{stats['expected_error_rate']:.4%}", stats["probes"], stats["misses"], stats["false_positives"], f"{stats['false_positive_rate']:.2%}"])
+    
+    print(tabulate(table, headers, tablefmt="double_outline"))
+
+###################################################################################################
+####################################       EXPORT DATA        #####################################
+###################################################################################################
+def get_export_path():
+    """Get export file path input from the user"""
+    while True:
+        print("Usage example: books.csv or transactions.jsonl")
+        
+        # Get user input
+        file_path = input("Enter file path: ").strip()
+        
+        # Ensure input is not empty
+        if not file_path:
+            print("File path cannot be empty\n")
+            continue
+        
+        # Ensure the file format is supported
+        if not file_path.endswith(('.csv', '.jsonl')):
+            print("File path must end with .csv or .jsonl\n")
+            continue
+        
+        # Return valid file path
+        return file_path
+
+
+def admin_export(table):
+    """Exports a table to a csv or json lines file"""
+    # Get export file path input
+    file_path = get_export_path()
+    
+    try:
+        exported = export_table(session, table, file_path)
+    except OSError as error:
+        print(f"Failed to export {table}: {error}\n")
+        return
+    
+    print(f"Successfully exported {exported} {table} to {file_path}\n")
+
+
+def admin_export_menu():
+    """Export admin menu"""
+    # Create admin export menu object
+    export_menu = Menu("Export Menu", ["Export books", "Export users", "Export transactions", "Exit"])
+    
+    # Display admin export menu and get user input
+    while True:
+        choice = export_menu.display()
+        
+        match choice:
+            case "1":
+                admin_export("books")
+            case "2":
+                admin_export("users")
+            case "3":
+                admin_export("transactions")
+            case "4":
+                return
+            case _:
+                print("Invalid input\n")
+
 ###################################################################################################
 ################################       LOGIN/REGISTRATION        ##################################
 ###################################################################################################
@@ -1005,7 +1182,7 @@ def log_in_form():
 def admin_menu():
     """Displays admin menu"""
     # Create admin main menu object
-    admin_menu = Menu("Admin Menu", ["Listing", "Search", "Add book", "Remove Book", "Show balance", "Exit"])
+    admin_menu = Menu("Admin Menu", ["Listing", "Search", "Add book", "Remove Book", "Show balance", "Export data", "Show filter statistics", "Exit"])
     
     # Display admin menu and get user input
     while True:
@@ -1023,6 +1200,10 @@ def admin_menu():
             case "5":
                 admin_show_balance()
             case "6":
+                admin_export_menu()
+            case "7":
+                admin_show_filter_stats()
+            case "8":
                 sys.exit()
             case _:
                 print("Invalid input\n") 
@@ -1090,10 +1271,28 @@ def main():
     # Load admin accounts into the database
     load_admin_accounts(session, "admin_accounts.json")
     
-    # Check if books have been loaded into the database
-    if Book.get_all(session) is None:
-        # Load books into the database
-        load_books(session, "books.json")
+    # Synchronize the books of the catalog file, unchanged catalogs are skipped and a failed sync leaves the library as it was
+    try:
+        stats = sync_books(session, "books.json", report_path=SYNC_REPORT_PATH)
+    except (OSError, ValueError, SQLAlchemyError) as error:
+        session.rollback()
+        print(f"Failed to synchronize the catalog: {error}\n")
+    else:
+        if stats["inserted"] or stats["updated"]:
+            print(f"Catalog synchronized: {stats['inserted']} new and {stats['updated']} updated books\n")
+        if stats["rejected"]:
+            print(f"{stats['rejected']} invalid books of the catalog were rejected, see {SYNC_REPORT_PATH}\n")
+    
+    # Open the catalog snapshot, regenerated only if the catalog changed since the last start, and load the titles and authors completed while typing from it
+    snapshot = CatalogSnapshot.load(session, SNAPSHOT_PATH)
+    Book.load_completions(session, snapshot)
+    snapshot.close()
+    
+    # Load the ISBN and username filters and save them now and on exit, so the next start doesn't rebuild them
+    for name in FILTERED_KEYS:
+        get_filter(session, name)
+    save_filters(session)
+    atexit.register(save_filters, session)
     
     # Calls init menu to be displayed
     init_menu()
@@ -0,0 +1,114 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.book import Book
+from modules.config import bulk_load_books
+from modules.checkpoint import ImportCheckpoint
+from modules.migration import migrate
+from modules.autocomplete import PrefixIndex
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_autocomplete.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+###################################################################################################
+#################################       PREFIX INDEX TESTS       ##################################
+###################################################################################################
+def test_prefix_index_complete():
+    # Test completing a prefix ignoring case, in alphabetical order and up to the limit
+    index = PrefixIndex(["Dune", "Dune Messiah", "Dracula", "dune", "Emma", None])
+
+    assert index.complete("du") == ["Dune", "dune", "Dune Messiah"]
+    assert index.complete("DR") == ["Dracula"]
+    assert index.complete("dun", limit=1) == ["Dune"]
+    assert index.complete("x") == []
+    assert len(index.complete("")) == 5
+
+def test_prefix_index_counts():
+    # Test a value shared by several books is kept until the last one is removed
+    index = PrefixIndex(["Frank Herbert", "Frank Herbert"])
+    index.add("Frances Burney")
+
+    index.remove("Frank Herbert")
+    assert index.complete("fran") == ["Frances Burney", "Frank Herbert"]
+
+    index.remove("Frank Herbert")
+    index.remove("Frank Herbert")
+    assert index.complete("fran") == ["Frances Burney"]
+    assert len(index) == 1
+
+###################################################################################################
+###################################       COMPLETE TESTS       ####################################
+###################################################################################################
+def test_complete_not_loaded(monkeypatch):
+    # Test completing before the indexes are loaded is refused
+    monkeypatch.setattr(Book, "completions", None)
+
+    with pytest.raises(RuntimeError):
+        Book.complete("du")
+
+def test_complete(monkeypatch):
+    # Test the titles and authors of the books table are completed and kept up to date
+    monkeypatch.setattr(Book, "completions", None)
+    bulk_load_books(session, "catalog_test.json")
+    Book.load_completions(session)
+
+    assert Book.complete("the h") == ["The Hobbit"]
+    assert Book.complete("fr", attribute="author") == ["Frank Herbert"]
+
+    # Registered books are completed right away
+    book = Book.register(session, "The Hound of the Baskervilles", "Arthur Conan Doyle", "George Newnes", "Mystery", 1, "10-14-1902", "Sherlock Holmes investigates a legendary hound", 8.99, "978-0-00-000002-6")
+    assert Book.complete("the h") == ["The Hobbit", "The Hound of the Baskervilles"]
+    assert Book.complete("the h", limit=1) == ["The Hobbit"]
+
+    # Deleted books are not completed anymore
+    book.set_quantity(0)
+    Book.delete(session, book)
+    assert Book.complete("the h") == ["The Hobbit"]
+    assert Book.complete("arthur", attribute="author") == []
+
+    with pytest.raises(ValueError):
+        Book.complete("the", attribute="genre")
+
+def test_complete_bulk_load_rolled_back(monkeypatch, tmp_path):
+    # Test the books of a bulk load are only completed once committed
+    monkeypatch.setattr(Book, "completions", None)
+    Book.load_completions(session)
+
+    with open("catalog_test.json", 'r') as file:
+        book = json.load(file)["books"][0]
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps({"books": [dict(book, title="Clean Architecture", isbn="978-0-13-449416-6")]}))
+
+    # Interrupt the load after the chunk is written, before its commit
+    def interrupted_advance(self, offset):
+        raise RuntimeError("Interrupted")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ImportCheckpoint, "advance", interrupted_advance)
+        with pytest.raises(RuntimeError):
+            bulk_load_books(session, str(catalog_path))
+    session.rollback()
+    assert Book.complete("clean a") == []
+
+    bulk_load_books(session, str(catalog_path))
+    assert Book.complete("clean a") == ["Clean Architecture"]
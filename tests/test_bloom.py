@@ -0,0 +1,143 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import bloom
+from modules.bloom import BloomFilter, filter_stats, get_filter, save_filters
+from modules.book import Book
+from modules.user import User
+from modules.config import bulk_load_books
+from modules.migration import migrate
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Start from an empty database, the books registered below would collide with the ones of a previous run
+if os.path.exists('test_bloom.db'):
+    os.remove('test_bloom.db')
+
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_bloom.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+
+# Load the catalog and a user the filters are built over
+bulk_load_books(session, "catalog_test.json")
+User.register(session, "johndoe", "Password123!")
+###################################################################################################
+#################################       BLOOM FILTER TESTS       ##################################
+###################################################################################################
+def test_bloom_filter_members():
+    # Test every added key is found and the false positive rate stays close to the target
+    keys = [f"978-0-00-{number:06d}" for number in range(1000)]
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    for key in keys:
+        bloom_filter.add(key)
+
+    assert all(key in bloom_filter for key in keys)
+    false_positives = sum(f"979-0-00-{number:06d}" in bloom_filter for number in range(10000))
+    assert false_positives < 300
+
+    stats = bloom_filter.stats()
+    assert stats["keys"] == 1000 and stats["hashes"] == 7
+    assert stats["bytes"] * 8 >= stats["bits"] > 9000
+    assert 0.005 < stats["expected_error_rate"] < 0.02
+
+def test_bloom_filter_bits():
+    # Test a filter restored from its bits answers the same
+    bloom_filter = BloomFilter(capacity=100)
+    bloom_filter.add("johndoe")
+    restored = BloomFilter(100, bloom_filter.error_rate, bytes(bloom_filter.bits), bloom_filter.count)
+    assert "johndoe" in restored and restored.count == 1
+
+###################################################################################################
+#################################       KEY FILTER TESTS       ####################################
+###################################################################################################
+def test_probe_skips_query():
+    # Test a definite miss only costs the read of the insert counter and an existing key is still found
+    assert Book.authenticate_isbn(session, "978-0-26-110221-7") is not None
+    get_filter(session, "username")
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert Book.authenticate_isbn(session, "000-0-00-000000-0") is None
+        assert User.authenticate_username(session, "nobody") is None
+        assert User.validate(session, "nobody", "Password123!", "Password123!")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements and all(statement.startswith("SELECT _inserts FROM key_filters") for statement in statements)
+
+    assert User.authenticate_username(session, "johndoe") is not None
+    assert not User.validate(session, "johndoe", "Password123!", "Password123!")
+
+    stats = filter_stats(session)
+    assert stats["username"]["misses"] == 2
+    assert stats["isbn"]["misses"] >= 1
+
+def test_registered_keys():
+    # Test the keys registered through the session are added to its filters
+    get_filter(session, "isbn")
+    User.register(session, "janedoe", "Password123!")
+    Book.register(session, "Emma", "Jane Austen", "John Murray", "Fiction", 1, "12-23-1815", "A young woman meddles in the love lives of her friends", 7.99, "978-0-00-000006-4")
+
+    assert "janedoe" in get_filter(session, "username")
+    assert 9780000000064 in get_filter(session, "isbn")
+
+def test_saved_filter(monkeypatch):
+    # Test a saved filter is loaded by a new session instead of being rebuilt
+    get_filter(session, "isbn")
+    save_filters(session)
+
+    rebuilds = []
+    monkeypatch.setattr(bloom, "rebuild_filter", lambda *args: rebuilds.append(args))
+    other = Session()
+    assert 9780000000064 in get_filter(other, "isbn")
+    assert rebuilds == []
+    other.close()
+
+def test_stale_filter_rebuilt():
+    # Test keys inserted by another writer since the filter was saved cause a rebuild
+    get_filter(session, "username")
+    save_filters(session)
+
+    writer = Session()
+    User.register(writer, "richardroe", "Password123!")
+    writer.close()
+
+    reader = Session()
+    assert "richardroe" in get_filter(reader, "username")
+    assert User.authenticate_username(reader, "richardroe") is not None
+    reader.close()
+
+def test_keys_inserted_by_other_session():
+    # Test keys inserted by another session after the filter was loaded are not reported missing
+    reader = Session()
+    get_filter(reader, "username")
+    get_filter(reader, "isbn")
+
+    writer = Session()
+    User.register(writer, "bob", "Password123!")
+    Book.register(writer, "Persuasion", "Jane Austen", "John Murray", "Fiction", 1, "12-20-1817", "A young woman meets again the man she was persuaded to refuse", 6.99, "978-0-00-000011-8")
+    writer.close()
+
+    assert not User.validate(reader, "bob", "Password123!", "Password123!")
+    assert User.authenticate_username(reader, "bob") is not None
+    assert Book.authenticate_isbn(reader, "978-0-00-000011-8").get_title() == "Persuasion"
+    assert "bob" in get_filter(reader, "username")
+    reader.close()
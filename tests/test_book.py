@@ -4,25 +4,25 @@
 import sys
 import os
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from datetime import date, datetime
 
 # Add the parent directory (Library-Management) to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from modules.user import Base
+from modules.migration import migrate
 from modules.book import Book
 from modules.transaction import Transaction
-from modules.config import load_books
+from modules.config import load_books, bulk_load_books
 ###################################################################################################
 ####################################       CONFIGURATION       ####################################
 ###################################################################################################
 # Initialize the SQLAlchemy engine for sqlite
 engine = create_engine('sqlite:///test_book.db')  # Adjust the database URL as needed
 
-# Create the Base tables for each class
-Base.metadata.create_all(engine)
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
 
 # Create a Session class and bind the engine to it
 Session = sessionmaker(bind=engine)
@@ -218,7 +218,18 @@ def test_valid_publication_date():
     book = Book()
     valid_publication_date = "25-02-2024"
     book.set_publication_date(valid_publication_date)
-    assert book.get_publication_date() == valid_publication_date
+    assert book.get_publication_date() == date(2024, 2, 25)
+    
+    valid_publication_date = "02-25-2024"
+    book.set_publication_date(valid_publication_date)
+    assert book.get_publication_date() == date(2024, 2, 25)
+    
+    valid_publication_date = "2024-02-25"
+    book.set_publication_date(valid_publication_date)
+    assert book.get_publication_date() == date(2024, 2, 25)
+    
+    book.set_publication_date(date(1997, 6, 26))
+    assert book.get_publication_date() == date(1997, 6, 26)
     
 def test_invalid_publication_date():
     # Test invalid publication date input
@@ -302,6 +313,10 @@ def test_invalid_publication_date():
     invalid_publication_date = "25-02-1500" # Set of out of range dates
     with pytest.raises(ValueError):
         book.set_publication_date(invalid_publication_date)
+
+    invalid_publication_date = "02-30-2024" # Day that doesn't exist in the month
+    with pytest.raises(ValueError):
+        book.set_publication_date(invalid_publication_date)
     
 def test_valid_description():
     # Test valid description input
@@ -378,10 +393,17 @@ def test_invalid_price():
 def test_valid_isbn():
     # Test valid ISBN input
     book = Book()
-    valid_isbn = "123-4-56-789123-0"
+    valid_isbn = "123-4-56-789123-1"
     book.set_isbn(valid_isbn)
     assert book.get_isbn() == valid_isbn 
     
+    # Hyphens are optional and the ISBN is stored in the format xxx-x-xx-xxxxxx-x with its integer key
+    book.set_isbn("978-0-261-10221-7")
+    assert book.get_isbn() == "978-0-26-110221-7"
+    book.set_isbn("9780261102217")
+    assert book.get_isbn() == "978-0-26-110221-7"
+    assert book._isbn_key == 9780261102217
+    
 def test_invalid_isbn():
     # Test invalid publication date input
     book = Book()
@@ -484,6 +506,14 @@ def test_invalid_isbn():
     invalid_isbn = "11-1-11-111111-11" # Set out of range sets
     with pytest.raises(ValueError):
         book.set_isbn(invalid_isbn)
+    
+    invalid_isbn = "978-0-26-110221-8" # Wrong check digit
+    with pytest.raises(ValueError):
+        book.set_isbn(invalid_isbn)
+    
+    invalid_isbn = "978 0 26 110221 7" # Digits grouped by spaces
+    with pytest.raises(ValueError):
+        book.set_isbn(invalid_isbn)
            
 def test_valid_quantity():
     # Test valid quantity input
@@ -516,10 +546,10 @@ def test_invalid_quantity():
 ###################################################################################################
 def test_validate():
     # Test validation of book
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     assert book is not None
     
-    book = Book.authenticate_isbn(session, "999-8-77-666666-5")
+    book = Book.authenticate_isbn(session, "999-8-77-666666-1")
     assert book is None
      
 def test_register():
@@ -549,7 +579,7 @@ def test_register():
         "publication_date": "25-02-2024",
         "description": "Discover the essential principles and techniques of object-oriented programming in Python with this comprehensive guide, perfect for beginners and experienced programmers alike",
         "price": 9.99,
-        "isbn": "111-2-33-444444-5"
+        "isbn": "111-2-33-444444-9"
     }
     
     # Assert if register() returns False -> Book failed to register
@@ -567,7 +597,7 @@ def test_add():
         "publication_date": "26-06-1997",
         "description": "Young wizard Harry discovers a hidden world of magic at Hogwarts School, facing dark forces",
         "price": 24.99,
-        "isbn": "978-0-74-753269-6"
+        "isbn": "978-0-74-753269-9"
     }
     
     existing_book = Book.authenticate_isbn(session, valid_book["isbn"])
@@ -586,7 +616,7 @@ def test_add():
         "publication_date": "15-10-2020",
         "description": "Discover the essential principles and techniques of Java programming with this comprehensive guide, perfect for beginners and experienced programmers alike",
         "price": 12.99,
-        "isbn": "999-8-77-666666-5"
+        "isbn": "999-8-77-666666-1"
     }
     
     non_existing_book = Book.authenticate_isbn(session, invalid_book["isbn"])
@@ -668,10 +698,10 @@ def test_authenticate_price():
     
 def test_authenticate_isbn():
     # Test authentication of book isbn
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     assert book is not None
     
-    book = Book.authenticate_isbn(session, "111-1-11-111111-1")
+    book = Book.authenticate_isbn(session, "111-1-11-111111-6")
     assert book is None
     
 def test_get_all():
@@ -682,20 +712,20 @@ def test_get_all():
     
 def test_rent_book():
     # Test renting a book
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     if book is not None:
         if book.get_quantity() != 0:
             assert book.rent_book(session) == True
 
 def test_return_book():
     # Test returning a book
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     if book is not None:
         assert book.rent_book(session) == True
     
 def test_calculate_fee():
     # Test calculating a book fee
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     if book is not None:
         # Example strings representing dates
         current_date_str = "28-02-2024"
@@ -715,17 +745,212 @@ def test_get_all_available():
     
 def test_remove():
     # Test removing a book
-    book = Book.authenticate_isbn(session, "978-0-74-753269-6")
+    book = Book.authenticate_isbn(session, "978-0-74-753269-9")
     assert book.remove(session, book) == True
     
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     assert book.remove(session, book) == False
     
 def test_delete():
     # Test deleting a book
-    book = Book.authenticate_isbn(session, "978-0-74-753269-6")
+    book = Book.authenticate_isbn(session, "978-0-74-753269-9")
     assert book.delete(session, book) == False
     
-    book = Book.authenticate_isbn(session, "111-2-33-444444-5")
+    book = Book.authenticate_isbn(session, "111-2-33-444444-9")
     assert book.delete(session, book) == True
-    
\ No newline at end of file
+    
+
+def test_ranked_search():
+    # Test the matches are ranked by the weight of the field they match in
+    first = Book.register(session, "Arrakis", "Frank Herbert", "Chilton Books", "Science Fiction", 1, "01-01-2000", "Poetry of the desert", 9.99, "978-0-00-000007-1")
+    second = Book.register(session, "Sand Notes", "Jane Doe", "Chilton Books", "Poetry", 1, "01-01-2000", "Notes on the desert planet of arrakis", 9.99, "978-0-00-000010-1")
+
+    assert [book.get_title() for book in Book.ranked_search(session, "arrakis")] == ["Arrakis", "Sand Notes"]
+    assert [book.get_title() for book in Book.ranked_search(session, "arrakis", attributes=("title",))] == ["Arrakis"]
+    assert [book.get_title() for book in Book.ranked_search(session, "poetry")] == ["Sand Notes", "Arrakis"]
+    assert Book.ranked_search(session, "zeppelins") is None
+
+    with pytest.raises(ValueError):
+        Book.ranked_search(session, "arrakis", attributes=("isbn",))
+
+    for book in (first, second):
+        book.set_quantity(0)
+        Book.delete(session, book)
+
+def test_ranked_search_popularity():
+    # Test the most rented of equally relevant books ranks first, and only the books returned are loaded
+    first = Book.register(session, "Children of Dune", "Frank Herbert", "Putnam", "Science Fiction", 1, "04-01-1976", "The third Dune novel", 9.99, "978-0-00-000008-8")
+    second = Book.register(session, "Children of Dune", "Frank Herbert", "Putnam", "Science Fiction", 1, "04-01-1976", "The third Dune novel", 9.99, "978-0-00-000009-5")
+    rentals = [Transaction(_book_id=second.get_id(), _type="Rental"), Transaction(_book_id=second.get_id(), _type="Rental")]
+    session.add_all(rentals)
+    session.commit()
+
+    books = Book.ranked_search(session, "children", limit=2)
+    assert [book.get_id() for book in books] == [second.get_id(), first.get_id()]
+
+    other = Session()
+    books = Book.ranked_search(other, "children", limit=1)
+    assert [book.get_id() for book in books] == [second.get_id()]
+    assert len(other.identity_map) == 1
+    other.close()
+
+    # Remove the rentals and books of the test
+    for rental in rentals:
+        session.delete(rental)
+    session.commit()
+    for book in (first, second):
+        book.set_quantity(0)
+        Book.delete(session, book)
+
+###################################################################################################
+###################################       SEARCH TESTS       ######################################
+###################################################################################################
+def test_search():
+    # Test searching keywords in the title, author and description
+    bulk_load_books(session, "catalog_test.json")
+
+    assert [book.get_title() for book in Book.search(session, "Tolkien")] == ["The Hobbit"]
+    assert [book.get_title() for book in Book.search(session, "desert planet")] == ["Dune"]
+    assert Book.search(session, "dragons") is None
+    assert Book.search(session, "!?") is None
+
+def test_search_prefix():
+    # Test keywords match the start of the words
+    assert [book.get_title() for book in Book.search(session, "craftsman")] == ["Clean Code"]
+
+def test_search_rank():
+    # Test the books matching the keywords in short fields rank first
+    Book.register(session, "Frank Notes", "Jane Doe", "Chilton Books", "Educational", 1, "01-01-2000", "Notes on many science fiction novels, dune among them", 9.99, "978-0-00-000001-9")
+
+    books = Book.search(session, "dune")
+    assert [book.get_title() for book in books] == ["Dune", "Frank Notes"]
+    assert len(Book.search(session, "dune", limit=1)) == 1
+
+def test_search_updated_book():
+    # Test the index follows updates and deletes of the books
+    book = Book.authenticate_isbn(session, "978-0-00-000001-9")
+    book.set_title("Herbert Notes")
+    session.commit()
+    assert [book.get_title() for book in Book.search(session, "herbert notes")] == ["Herbert Notes"]
+
+    book.set_quantity(0)
+    Book.delete(session, book)
+    assert Book.search(session, "notes") is None
+
+def test_search_filters():
+    # Test combining equality and range criteria in a single search
+    books = Book.search_filters(session, genre="Science Fiction", author="Frank Herbert", max_price=20.0)
+    assert [book.get_title() for book in books] == ["Dune"]
+
+    assert Book.search_filters(session, genre="Science Fiction", max_price=10.0) is None
+    assert Book.search_filters(session, genre="Fantasy", available=False) is None
+
+    # Test an ISBN that doesn't parse matches no book, not the books without a key
+    session.execute(text("INSERT INTO books (_title, _genre) VALUES ('Untitled', 'Fantasy')"))
+    assert Book.search_filters(session, isbn="garbage") is None
+    session.rollback()
+
+def test_search_filters_order():
+    # Test ordering and limiting the combined search
+    books = Book.search_filters(session, min_price=10.0, order_by="-price")
+    assert [book.get_price() for book in books] == [33.99, 29.99, 24.99, 19.99, 14.99]
+
+    books = Book.search_filters(session, min_price=10.0, order_by="price", limit=2)
+    assert [book.get_title() for book in books] == ["The Hobbit", "Dune"]
+
+def test_search_filters_invalid():
+    # Test unknown criteria and orderings are refused
+    with pytest.raises(ValueError):
+        Book.search_filters(session, colour="red")
+
+    with pytest.raises(ValueError):
+        Book.search_filters(session, order_by="description")
+
+def test_fuzzy_search():
+    # Test misspelled titles and authors find the closest books
+    Book.register(session, "Animal Farm", "George Orwell", "Secker and Warburg", "Fiction", 1, "08-17-1945", "The animals of a farm rebel against their owner", 9.99, "978-0-00-000004-0")
+
+    assert [book.get_title() for book in Book.fuzzy_search(session, "Harry Poter")] == ["Harry Potter and The Philosopher's Stone"]
+    assert [book.get_title() for book in Book.fuzzy_search(session, "Orwel")] == ["Animal Farm"]
+    assert [book.get_title() for book in Book.fuzzy_search(session, "the hobit")][0] == "The Hobbit"
+    assert Book.fuzzy_search(session, "Xylophone") is None
+    assert Book.fuzzy_search(session, "ab") is None
+
+def test_fuzzy_search_limit():
+    # Test the most similar books are returned first, up to the limit
+    books = Book.fuzzy_search(session, "Frank Herbet", limit=1)
+    assert [book.get_title() for book in books] == ["Dune"]
+
+def test_published_between():
+    # Test the books published in a period are found oldest first
+    books = Book.published_between(session, date(1930, 1, 1), date(1970, 12, 31))
+    assert [book.get_title() for book in books] == ["The Hobbit", "Animal Farm", "Dune"]
+
+    books = Book.published_between(session, "01-01-1930", "12-31-1970", limit=1)
+    assert [book.get_title() for book in books] == ["The Hobbit"]
+    assert Book.published_between(session, date(1800, 1, 1), date(1900, 1, 1)) is None
+
+def test_published_in_year():
+    # Test the books published in a year are found
+    assert [book.get_title() for book in Book.published_in_year(session, 1997)] == ["Harry Potter and The Philosopher's Stone"]
+    assert Book.published_in_year(session, 1998) is None
+
+def test_search_filters_publication_date():
+    # Test publication date strings are converted in the combined search
+    books = Book.search_filters(session, min_publication_date="01-01-1960", max_publication_date="2000-01-01", order_by="publication_date")
+    assert [book.get_title() for book in books] == ["Dune", "A Song of Ice and Fire: A Game of Thrones", "Harry Potter and The Philosopher's Stone"]
+
+def test_price_between():
+    # Test the books priced in a range are found in price order
+    books = Book.price_between(session, 10.0, 20.0)
+    assert [book.get_price() for book in books] == [14.99, 19.99]
+
+    books = Book.price_between(session, high=19.99, order='desc', limit=2)
+    assert [book.get_title() for book in books] == ["Dune", "The Hobbit"]
+    assert Book.price_between(session, 100.0) is None
+
+    with pytest.raises(ValueError):
+        Book.price_between(session, order='random')
+
+def test_cheapest_most_expensive():
+    # Test the cheapest and most expensive books are found
+    assert [book.get_title() for book in Book.cheapest(session, 1)] == ["Animal Farm"]
+    assert [book.get_title() for book in Book.most_expensive(session, 1)] == ["Clean Code"]
+    assert [book.get_title() for book in Book.search_filters(session, price=9.99)] == ["Animal Farm"]
+
+###################################################################################################
+###################################       FACET TESTS       #######################################
+###################################################################################################
+def test_facets():
+    # Test the summary counts the titles and copies per genre
+    facets = Book.facets(session, "genre")
+    assert facets == Book.count_facets(session, "genre")
+    assert ("Fantasy", 3, 3) in facets
+
+    assert Book.facets(session, "edition") == [(1, 6, 7)]
+    assert len(Book.facets(session, "author", limit=2)) == 2
+
+    with pytest.raises(ValueError):
+        Book.facets(session, "title")
+
+def test_facets_incremental():
+    # Test the summary follows the registering, adding, removing and deleting of books
+    book = Book.register(session, "Emma", "Jane Austen", "John Murray", "Romance", 2, "12-23-1815", "A young woman meddles in the love lives of her friends", 7.99, "978-0-00-000005-7")
+    assert ("Romance", 1, 1) in Book.facets(session, "genre")
+    assert (2, 1, 1) in Book.facets(session, "edition")
+
+    Book.add(session, book)
+    assert ("Jane Austen", 1, 2) in Book.facets(session, "author")
+
+    Book.remove(session, book)
+    Book.remove(session, book)
+    assert ("Romance", 1, 0) in Book.facets(session, "genre")
+
+    book.set_genre("Classics")
+    session.commit()
+    assert ("Classics", 1, 0) in Book.facets(session, "genre")
+
+    Book.delete(session, book)
+    for attribute in ("genre", "author", "publisher", "edition"):
+        assert Book.facets(session, attribute) == Book.count_facets(session, attribute)
+    assert "Classics" not in [facet.value for facet in Book.facets(session, "genre")]
@@ -0,0 +1,201 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.book import Book
+from modules.config import bulk_load_books
+from modules.migration import migrate
+from modules.cache import ResultCache, clear_caches, configure_cache, get_cache, get_isbn_cache
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_cache.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+
+# Load the catalog the finders are cached over
+bulk_load_books(session, "catalog_test.json")
+###################################################################################################
+#################################       RESULT CACHE TESTS       ##################################
+###################################################################################################
+class Clock:
+    # Clock moved by hand to expire the results
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_result_cache_lru():
+    # Test the least recently used result is evicted over the size bound
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b", None) is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+def test_result_cache_ttl():
+    # Test a result is served until its time to live is over
+    clock = Clock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.put("a", None)
+
+    clock.now = 9.9
+    assert cache.get("a", "missing") is None
+    clock.now = 10
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+def test_result_cache_fetch_stats():
+    # Test the query only runs on a miss and the counters follow the lookups
+    cache = ResultCache()
+    calls = []
+    query = lambda: calls.append(1) or ["result"]
+
+    assert cache.fetch("a", query) == ["result"]
+    assert cache.fetch("a", query) == ["result"]
+    assert len(calls) == 1
+
+    cache.invalidate("a")
+    cache.fetch("a", query)
+    assert len(calls) == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 1 / 3)
+
+###################################################################################################
+###################################       FINDER TESTS       ######################################
+###################################################################################################
+def test_finder_cached():
+    # Test a repeated finder is served from the cache of the session
+    cache = configure_cache(session)
+
+    books = Book.authenticate_genre(session, "Fantasy")
+    assert Book.authenticate_genre(session, "Fantasy") == books
+    assert Book.authenticate_title(session, "Nonexistent") is None
+    assert Book.authenticate_title(session, "Nonexistent") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # Other sessions keep their own cache
+    assert get_cache(Session()) is not cache
+
+def test_finder_invalidated():
+    # Test registering and deleting a book drops the results holding it
+    configure_cache(session)
+    count = len(Book.authenticate_genre(session, "Fantasy"))
+    assert Book.authenticate_isbn(session, "978-0-00-000003-3") is None
+
+    book = Book.register(session, "The Hound of the Baskervilles", "Arthur Conan Doyle", "George Newnes", "Fantasy", 1, "10-14-1902", "Sherlock Holmes investigates a legendary hound", 8.99, "978-0-00-000003-3")
+    assert len(Book.authenticate_genre(session, "Fantasy")) == count + 1
+    assert Book.authenticate_isbn(session, "978-0-00-000003-3") == book
+
+    book.set_quantity(0)
+    Book.delete(session, book)
+    assert len(Book.authenticate_genre(session, "Fantasy")) == count
+    assert Book.authenticate_isbn(session, "978-0-00-000003-3") is None
+
+###################################################################################################
+##################################       ISBN CACHE TESTS       ###################################
+###################################################################################################
+def count_queries(statements):
+    # Record the statements the engine runs
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    return record
+
+def test_isbn_cache_hit():
+    # Test a repeated isbn lookup is served from the identity map without a query
+    clear_caches(session)
+    cache = get_isbn_cache(session)
+    assert Book.authenticate_isbn(session, "978-0-00-000004-0") is None
+
+    book = Book.register(session, "Emma", "Jane Austen", "John Murray", "Fiction", 1, "12-23-1815", "A young woman meddles in the love lives of her friends", 7.99, "978-0-00-000004-0")
+    book.get_title()
+
+    statements = []
+    record = count_queries(statements)
+    try:
+        assert Book.authenticate_isbn(session, "978-0-00-000004-0") is book
+        assert Book.authenticate_isbn(session, "978-0-00-000004-0") is book
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+
+    stats = cache.stats()
+    assert stats["hits"] >= 2 and stats["hit_rate"] > 0
+
+def test_isbn_cache_consistent():
+    # Test registering and deleting a book keeps the cached ids consistent
+    clear_caches(session)
+    assert Book.authenticate_isbn(session, "978-0-00-000005-7") is None
+
+    book = Book.register(session, "Persuasion", "Jane Austen", "John Murray", "Fiction", 1, "12-20-1817", "A woman meets again the man she was persuaded to refuse", 6.99, "978-0-00-000005-7")
+    assert Book.authenticate_isbn(session, "978-0-00-000005-7") is book
+
+    book.set_quantity(0)
+    Book.delete(session, book)
+    assert Book.authenticate_isbn(session, "978-0-00-000005-7") is None
+
+    # Books deleted by another writer are queried again
+    book = Book.register(session, "Persuasion", "Jane Austen", "John Murray", "Fiction", 1, "12-20-1817", "A woman meets again the man she was persuaded to refuse", 6.99, "978-0-00-000005-7")
+    session.query(Book).filter(Book._isbn == "978-0-00-000005-7").delete()
+    session.commit()
+    session.expunge_all()
+    assert Book.authenticate_isbn(session, "978-0-00-000005-7") is None
+
+def test_finder_cached_after_commit():
+    # Test a cached result expired by a commit is loaded back with a single query
+    configure_cache(session)
+    books = Book.authenticate_genre(session, "Fantasy")
+    session.commit()
+
+    statements = []
+    record = count_queries(statements)
+    try:
+        assert Book.authenticate_genre(session, "Fantasy") == books
+        assert [book.get_title() for book in books]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 1
+
+    # Loaded books are served without a query until the next commit
+    statements = []
+    record = count_queries(statements)
+    try:
+        assert Book.authenticate_genre(session, "Fantasy") == books
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+
+def test_isbn_cache_other_session():
+    # Test an ISBN missing for a session is found once another session registers it
+    reader = Session()
+    assert Book.authenticate_isbn(reader, "978-0-00-000012-5") is None
+
+    writer = Session()
+    Book.register(writer, "Mansfield Park", "Jane Austen", "Thomas Egerton", "Fiction", 1, "07-09-1814", "A poor relation grows up among her wealthy cousins", 6.99, "978-0-00-000012-5")
+    writer.close()
+
+    assert Book.authenticate_isbn(reader, "978-0-00-000012-5").get_title() == "Mansfield Park"
+    reader.close()
@@ -0,0 +1,175 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import io
+import json
+import shutil
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import modules.config
+from modules.user import Base
+from modules.book import Book
+from modules.transaction import Transaction
+from modules.checkpoint import ImportCheckpoint, ImportProgress
+from modules.config import bulk_load_books, import_books, bulk_load_transactions, load_admin_accounts
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_config.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class
+Base.metadata.create_all(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+###################################################################################################
+##################################       BULK LOAD TESTS       ####################################
+###################################################################################################
+def test_bulk_load_books():
+    # Test bulk loading the catalog, duplicated ISBNs are collapsed into quantities
+    book = Book.authenticate_isbn(session, "978-0-13-235088-4")
+    quantity = book.get_quantity() if book is not None else 0
+
+    stats = bulk_load_books(session, "catalog_test.json", chunk_size=2)
+    assert stats["records"] == 4
+    assert stats["inserted"] + stats["updated"] == 3
+    assert stats["rows_per_second"] > 0
+
+    book = Book.authenticate_isbn(session, "978-0-13-235088-4")
+    assert book.get_quantity() == quantity + 2
+
+    book = Book.authenticate_isbn(session, "978-0-44-117271-9")
+    assert book.get_title() == "Dune"
+
+def test_bulk_load_books_existing():
+    # Test bulk loading the catalog again only adds copies
+    books = len(Book.get_all(session))
+
+    stats = bulk_load_books(session, "catalog_test.json")
+    assert stats["inserted"] == 0
+    assert stats["updated"] == 3
+    assert len(Book.get_all(session)) == books
+
+def test_bulk_load_books_csv():
+    # Test bulk loading a supplier csv catalog through a column map
+    book = Book.authenticate_isbn(session, "978-0-26-110221-7")
+    quantity = book.get_quantity()
+
+    column_map = {"Book Title": "title", "Writer": "author", "Publisher": "publisher", "Genre": "genre", "Edition": "edition",
+                  "Published": "publication_date", "Summary": "description", "List Price": "price", "ISBN": "isbn"}
+    stats = bulk_load_books(session, "catalog_supplier_test.csv", column_map=column_map)
+    assert stats["records"] == 4
+    assert stats["updated"] == 3
+
+    book = Book.authenticate_isbn(session, "978-0-26-110221-7")
+    assert book.get_quantity() == quantity + 1
+    assert book.get_price() == 14.99
+
+###################################################################################################
+####################################       IMPORT TESTS       #####################################
+###################################################################################################
+def test_import_books(tmp_path):
+    # Test importing the catalog in parallel, invalid records are reported instead of loaded
+    report_path = tmp_path / "rejected.jsonl"
+
+    stats = import_books(session, "catalog_rejected_test.jsonl", report_path=str(report_path), workers=2, chunk_size=1)
+    assert stats["records"] == 3
+    assert stats["rejected"] == 2
+    assert Book.authenticate_isbn(session, "978-0-13-475759-9") is not None
+
+    with open(report_path, 'r') as report:
+        rejected = [json.loads(line) for line in report]
+    assert rejected[0]["error"] == "Price must be a float"
+    assert rejected[1]["error"] == "Missing isbn attribute"
+
+def test_bulk_load_transactions():
+    # Test loading transactions referencing users and books by id, username or ISBN
+    load_admin_accounts(session, "users_test.json")
+    transactions = len(Transaction.get_all_type(session))
+
+    stats = bulk_load_transactions(session, "transactions_history_test.jsonl", chunk_size=3)
+    assert stats["records"] == 4
+    assert stats["inserted"] == 2
+    assert stats["rejected"] == 2
+    assert len(Transaction.get_all_type(session)) == transactions + 2
+
+    book = Book.authenticate_isbn(session, "978-0-44-117271-9")
+    assert len(Transaction.get_all_isbn(session, book.get_id())) == 1
+
+###################################################################################################
+##################################       CHECKPOINT TESTS       ###################################
+###################################################################################################
+def test_bulk_load_books_resume(tmp_path, monkeypatch):
+    # Test an interrupted load resumes after the last committed chunk
+    catalog_path = str(tmp_path / "catalog.json")
+    shutil.copy("catalog_test.json", catalog_path)
+    quantity = Book.authenticate_isbn(session, "978-0-44-117271-9").get_quantity()
+
+    # Interrupt the load on the second chunk
+    write_books = modules.config.write_books
+    calls = []
+    def interrupted_write_books(session, books):
+        calls.append(books)
+        if len(calls) == 2:
+            raise RuntimeError("Interrupted")
+        return write_books(session, books)
+
+    monkeypatch.setattr(modules.config, "write_books", interrupted_write_books)
+    with pytest.raises(RuntimeError):
+        bulk_load_books(session, catalog_path, chunk_size=2)
+    session.rollback()
+    monkeypatch.undo()
+
+    assert ImportCheckpoint.resume(session, "books", catalog_path).get_offset() == 2
+
+    # Resume the load, only the records after the checkpoint are loaded
+    stats = bulk_load_books(session, catalog_path, chunk_size=2)
+    assert stats["records"] == 2
+    assert Book.authenticate_isbn(session, "978-0-44-117271-9").get_quantity() == quantity + 1
+    assert ImportCheckpoint.resume(session, "books", catalog_path).get_offset() == 0
+
+def test_load_empty_source(tmp_path):
+    # Test loading a source without records completes and leaves no checkpoint behind
+    books_path, empty_path = tmp_path / "books.json", tmp_path / "empty.jsonl"
+    books_path.write_text(json.dumps({"books": []}))
+    empty_path.write_text("")
+
+    assert bulk_load_books(session, str(books_path))["records"] == 0
+    assert bulk_load_books(session, str(empty_path))["records"] == 0
+    assert import_books(session, str(empty_path), workers=1)["records"] == 0
+    assert bulk_load_transactions(session, str(empty_path))["records"] == 0
+    assert session.query(ImportCheckpoint).filter(ImportCheckpoint._source.contains(str(tmp_path))).count() == 0
+
+def test_import_progress():
+    # Test the progress line reports records, rejected records and ETA
+    stream = io.StringIO()
+    progress = ImportProgress(total=100, interval=0, stream=stream)
+    progress.update(10, 2, done=50)
+    assert "10 records" in stream.getvalue()
+    assert "2 rejected" in stream.getvalue()
+    assert progress.eta() is not None
+
+    progress.finish()
+    assert progress.eta() == 0.0
+
+def test_import_progress_resumed():
+    # Test the ETA of a resumed import is measured from the part it resumed at
+    progress = ImportProgress(total=100, interval=0, stream=io.StringIO(), resumed=80)
+    assert progress.eta() is None
+
+    # 10 of the 20 parts left took 10 seconds, the other 10 take as long
+    progress.start = time.perf_counter() - 10
+    progress.update(5, done=90)
+    assert progress.eta() == pytest.approx(10, rel=0.01)
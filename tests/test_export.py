@@ -0,0 +1,78 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import csv
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.user import Base
+from modules.book import Book
+from modules.config import bulk_load_books, load_admin_accounts, load_transactions
+from modules.export import export_table
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_export.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class
+Base.metadata.create_all(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+
+# Load books, users and transactions into the test database
+if Book.get_all(session) is None:
+    bulk_load_books(session, "catalog_test.json")
+    load_admin_accounts(session, "users_test.json")
+    load_transactions(session, "transactions_test.json")
+###################################################################################################
+###################################       EXPORT TESTS       ######################################
+###################################################################################################
+def test_export_books_csv(tmp_path):
+    # Test exporting books to csv in small batches
+    file_path = str(tmp_path / "books.csv")
+    assert export_table(session, "books", file_path, batch_size=2) == 3
+
+    with open(file_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row["isbn"] for row in rows] == [book.get_isbn() for book in Book.get_all(session)]
+    assert rows[0]["title"] == "Clean Code"
+
+def test_export_transactions_jsonl(tmp_path):
+    # Test exporting transactions to json lines, dates are written in ISO format
+    file_path = str(tmp_path / "transactions.jsonl")
+    assert export_table(session, "transactions", file_path) == 3
+
+    with open(file_path) as file:
+        transactions = [json.loads(line) for line in file]
+    assert transactions[0]["checkout_date"] == "2024-03-01"
+    assert transactions[0]["type"] == "Rental"
+
+def test_export_users(tmp_path):
+    # Test exporting users never writes the password hashes
+    file_path = str(tmp_path / "users.jsonl")
+    assert export_table(session, "users", file_path) == 3
+
+    with open(file_path) as file:
+        users = [json.loads(line) for line in file]
+    assert "password" not in users[0]
+    assert users[0]["username"] == "ricardo"
+
+def test_export_invalid():
+    # Test exporting an unknown table or format
+    with pytest.raises(ValueError):
+        export_table(session, "admins", "admins.csv")
+
+    with pytest.raises(ValueError):
+        export_table(session, "books", "books.xml", format="xml")
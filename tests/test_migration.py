@@ -0,0 +1,205 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import shutil
+import subprocess
+import pytest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import or_
+from modules.book import Book
+from modules.transaction import Transaction
+from modules.config import bulk_load_books
+from modules.sync import sync_books
+from modules.migration import MIGRATIONS, migrate, get_version, explain
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_migration.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+###################################################################################################
+##################################       MIGRATION TESTS       ####################################
+###################################################################################################
+def test_migrate_version():
+    # Test the database is at the version of the last migration
+    with engine.connect() as connection:
+        assert get_version(connection) == len(MIGRATIONS)
+
+def test_migrate_idempotent():
+    # Test migrating an up to date database changes nothing
+    assert migrate(engine) == len(MIGRATIONS)
+
+def test_migrate_standalone(tmp_path):
+    # Test migrating in a fresh interpreter that only imported the migration module creates every table
+    script = f"""
+import sys
+sys.path.insert(0, {os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))!r})
+from sqlalchemy import create_engine
+from modules.migration import migrate
+print(migrate(create_engine({f"sqlite:///{tmp_path / 'standalone.db'}"!r})))
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(len(MIGRATIONS))
+
+def test_migrate_existing_books(tmp_path):
+    # Test books registered before the migration are indexed by it
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Book.metadata.create_all(old_engine)
+
+    old_session = sessionmaker(bind=old_engine)()
+    bulk_load_books(old_session, "catalog_test.json")
+    assert migrate(old_engine) == len(MIGRATIONS)
+
+    assert [book.get_title() for book in Book.search(old_session, "hobbit")] == ["The Hobbit"]
+    old_session.close()
+
+def test_migrate_publication_dates(tmp_path):
+    # Test the publication date strings are converted to ISO dates
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'dates.db'}")
+    Book.metadata.create_all(old_engine)
+
+    with old_engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO books (_title, _publication_date, _isbn) VALUES ('Dune', '08-01-1965', '1'), ('Emma', '23-12-1815', '2'), ('Ulysses', '1922-02-02', '3'), ('Persuasion', '02-30-1817', '4')")
+        connection.exec_driver_sql("PRAGMA user_version = 3")
+    migrate(old_engine)
+
+    with old_engine.connect() as connection:
+        dates = connection.exec_driver_sql("SELECT _publication_date FROM books ORDER BY _id").scalars().all()
+    assert dates == ["1965-08-01", "1815-12-23", "1922-02-02", None]
+
+    # The invalid date is cleared so the books can still be loaded
+    old_session = sessionmaker(bind=old_engine)()
+    assert old_session.get(Book, 1).get_publication_date() == date(1965, 8, 1)
+    assert len(Book.get_all_page(old_session).items) == 4
+    old_session.close()
+
+def test_migrate_price_cents(tmp_path):
+    # Test the real prices are converted to an integer column of cents
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}")
+    with old_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE books (_id INTEGER PRIMARY KEY, _title VARCHAR, _author VARCHAR, _publisher VARCHAR, _genre VARCHAR, _edition INTEGER, _publication_date VARCHAR, _description VARCHAR, _price FLOAT, _isbn VARCHAR UNIQUE, _quantity INTEGER)")
+        connection.exec_driver_sql("INSERT INTO books (_title, _price, _isbn) VALUES ('Dune', 19.99, '1'), ('Emma', 0.1, '2'), ('Ulysses', 12.0, '3')")
+    migrate(old_engine)
+
+    with old_engine.connect() as connection:
+        prices = connection.exec_driver_sql("SELECT _price, typeof(_price) FROM books ORDER BY _id").all()
+    assert prices == [(1999, "integer"), (10, "integer"), (1200, "integer")]
+
+    old_session = sessionmaker(bind=old_engine)()
+    assert old_session.get(Book, 1).get_price() == 19.99
+    old_session.close()
+
+def test_migrate_isbn_keys(tmp_path):
+    # Test the stored ISBNs of 13 digits get their integer key and are looked up by it
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'isbns.db'}")
+    with old_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE books (_id INTEGER PRIMARY KEY, _title VARCHAR, _author VARCHAR, _publisher VARCHAR, _genre VARCHAR, _edition INTEGER, _publication_date VARCHAR, _description VARCHAR, _price FLOAT, _isbn VARCHAR UNIQUE, _quantity INTEGER)")
+        connection.exec_driver_sql("INSERT INTO books (_title, _isbn) VALUES ('Dune', '978-0-44-117271-9'), ('Emma', '1')")
+    migrate(old_engine)
+
+    with old_engine.connect() as connection:
+        keys = connection.exec_driver_sql("SELECT _isbn_key FROM books ORDER BY _id").scalars().all()
+        indexes = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'books'").scalars().all()
+    assert keys == [9780441172719, None]
+    assert "ix_books_isbn_key" in indexes
+
+    old_session = sessionmaker(bind=old_engine)()
+    assert Book.authenticate_isbn(old_session, "9780441172719").get_title() == "Dune"
+    old_session.close()
+
+def test_migrate_isbn_check_digits(tmp_path):
+    # Test the ISBNs with a wrong check digit are corrected, merging the books they make the same into the one with the valid ISBN
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'digits.db'}")
+    with old_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE books (_id INTEGER PRIMARY KEY, _title VARCHAR, _author VARCHAR, _publisher VARCHAR, _genre VARCHAR, _edition INTEGER, _publication_date VARCHAR, _description VARCHAR, _price FLOAT, _isbn VARCHAR UNIQUE, _quantity INTEGER)")
+        connection.exec_driver_sql("INSERT INTO books (_title, _author, _isbn, _quantity) VALUES ('Dune', 'Frank Herbert', '978-0-44-117271-0', 2), ('Dune', 'Frank Herbert', '9780441172719', 3), ('Ulysses', 'James Joyce', '123-4-56-789012-3', 1)")
+        connection.exec_driver_sql("CREATE TABLE transactions (_id INTEGER PRIMARY KEY, _user_id INTEGER, _book_id INTEGER, _type VARCHAR, _checkout_date DATE, _return_date DATE, _fee FLOAT, _status BOOLEAN)")
+        connection.exec_driver_sql("INSERT INTO transactions (_user_id, _book_id, _type) VALUES (1, 1, 'Rental'), (1, 2, 'Rental')")
+    migrate(old_engine)
+
+    with old_engine.connect() as connection:
+        books = connection.exec_driver_sql("SELECT _id, _isbn, _isbn_key, _quantity FROM books ORDER BY _id").all()
+        transactions = connection.exec_driver_sql("SELECT _book_id FROM transactions ORDER BY _id").scalars().all()
+        facet = connection.exec_driver_sql("SELECT _titles, _copies FROM book_facets WHERE _attribute = 'author' AND _value = 'Frank Herbert'").one()
+    assert books == [(2, "978-0-44-117271-9", 9780441172719, 5), (3, "123-4-56-789012-8", 1234567890128, 1)]
+    assert transactions == [2, 2]
+    assert tuple(facet) == (1, 5)
+
+def test_migrate_baseline_library(tmp_path):
+    # Test the library database of the first release migrates to the books of the catalog, which the startup sync then updates instead of duplicating
+    shutil.copy("library_baseline.sqlite", tmp_path / "library.db")
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'library.db'}")
+    assert migrate(old_engine) == len(MIGRATIONS)
+
+    old_session = sessionmaker(bind=old_engine)()
+    stats = sync_books(old_session, os.path.join(os.path.dirname(__file__), '..', 'books.json'))
+    assert (stats["inserted"], stats["updated"]) == (0, 73)
+    assert old_session.query(Book).count() == 73
+
+    assert Book.authenticate_isbn(old_session, "123-4-56-789012-8").get_title() == "To Kill a Mockingbird"
+    assert all(Book.authenticate_isbn(old_session, book.get_isbn()) is book for book in old_session.query(Book))
+    old_session.close()
+
+def test_facets_migration(tmp_path):
+    # Test the summary counts the books registered before the migration
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'facets.db'}")
+    with old_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE books (_id INTEGER PRIMARY KEY, _title VARCHAR, _author VARCHAR, _publisher VARCHAR, _genre VARCHAR, _edition INTEGER, _publication_date VARCHAR, _description VARCHAR, _price FLOAT, _isbn VARCHAR UNIQUE, _quantity INTEGER)")
+        connection.exec_driver_sql("INSERT INTO books (_title, _genre, _edition, _isbn, _quantity) VALUES ('Dune', 'Science Fiction', 1, '1', 3), ('Emma', 'Romance', 1, '2', 1), ('Solaris', 'Science Fiction', 2, '3', 2)")
+    migrate(old_engine)
+
+    old_session = sessionmaker(bind=old_engine)()
+    assert Book.facets(old_session, "genre") == [("Science Fiction", 2, 5), ("Romance", 1, 1)]
+    assert Book.facets(old_session, "edition") == [(1, 2, 4), (2, 1, 2)]
+    old_session.close()
+
+###################################################################################################
+#################################       QUERY PLAN TESTS       ####################################
+###################################################################################################
+# Hot queries and the index each one must search with, a trailing underscore accepts any index with that prefix
+HOT_QUERIES = [
+    (lambda: session.query(Book).filter(Book._title == "Dune"), "ix_books_title"),
+    (lambda: session.query(Book).filter(Book._author == "Frank Herbert"), "ix_books_author"),
+    (lambda: session.query(Book).filter(Book._publisher == "Chilton Books"), "ix_books_publisher"),
+    (lambda: session.query(Book).filter(Book._genre == "Fantasy"), "ix_books_genre"),
+    (lambda: session.query(Book).filter(Book._isbn_key == 9780441172719), "sqlite_autoindex_books_1"),
+    (lambda: session.query(Book).filter(Book._publication_date.between(date(1990, 1, 1), date(2000, 12, 31))), "ix_books_publication_date"),
+    (lambda: session.query(Book).filter(Book._price.between(1000, 2000)).order_by(Book._price), "ix_books_price"),
+    (lambda: session.query(Transaction).filter(Transaction._user_id == 1, Transaction._book_id == 1, Transaction._type == "Rental"), "ix_transactions_user_book_type"),
+    (lambda: session.query(Transaction).filter(Transaction._user_id == 1, Transaction._type == "Rental", Transaction._status == True), "ix_transactions_user_type_status"),
+    (lambda: session.query(Transaction).filter(Transaction._book_id == 1, Transaction._type == "Rental", Transaction._status == True), "ix_transactions_book_type_status"),
+    (lambda: session.query(Transaction).filter(Transaction._user_id == 1), "ix_transactions_user_"),
+    (lambda: session.query(Transaction).filter(Transaction._book_id == 1), "ix_transactions_book_"),
+    (lambda: session.query(Transaction).filter(Transaction._type == "Rental"), "ix_transactions_type"),
+    (lambda: session.query(Transaction).filter(or_(Transaction._type == "Return", Transaction._type == "Early Return", Transaction._type == "Late Return")), "ix_transactions_type"),
+]
+
+@pytest.mark.parametrize("query, index", HOT_QUERIES)
+def test_hot_query_plan(query, index):
+    # Test the hot queries search an index instead of scanning the table
+    plan = explain(session, query().statement)
+    assert any(f"USING INDEX {index}" in step or f"USING COVERING INDEX {index}" in step for step in plan), plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
+
+def test_search_filters_plan():
+    # Test the combined search is a single indexed query
+    statement = Book.filters_query(session, genre="Fantasy", author="JK Rowling", max_price=20.0).statement
+    plan = explain(session, statement)
+    assert len(plan) == 1 and plan[0].startswith("SEARCH books USING INDEX"), plan
@@ -0,0 +1,167 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.book import Book, isbn_check_digit
+from modules.transaction import DELETED_BOOK, DELETED_USER, Transaction
+from modules.user import User
+from modules.config import load_transactions
+from modules.migration import migrate
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Start from an empty database, the books registered below would collide with the ones of a previous run
+if os.path.exists('test_pagination.db'):
+    os.remove('test_pagination.db')
+
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_pagination.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+
+# Register books with ISBNs 978-0-00-000000-2 to 978-0-00-000024-8, every third one out of stock
+for number in range(25):
+    book = Book.register(session, f"Book {number:02d}", "Jane Doe", "Chilton Books", "Fantasy" if number % 2 else "Fiction", 1, "01-01-2000", "A book", 9.99, f"978-0-00-{number:06d}-{isbn_check_digit(f'978000{number:06d}')}")
+    if number % 3 == 0:
+        book.set_quantity(0)
+session.commit()
+###################################################################################################
+####################################       BOOK PAGE TESTS       ##################################
+###################################################################################################
+def titles(page):
+    return [book.get_title() for book in page.items]
+
+def test_get_all_page_forward():
+    # Test walking the pages forward until the last one
+    page = Book.get_all_page(session, size=10)
+    assert titles(page) == [f"Book {number:02d}" for number in range(10)]
+    assert page.previous is None
+
+    page = Book.get_all_page(session, after=page.next, size=10)
+    assert titles(page) == [f"Book {number:02d}" for number in range(10, 20)]
+    assert page.previous is not None
+
+    page = Book.get_all_page(session, after=page.next, size=10)
+    assert titles(page) == [f"Book {number:02d}" for number in range(20, 25)]
+    assert page.next is None
+
+def test_get_all_page_backward():
+    # Test walking back to the first page
+    last = Book.get_all_page(session, after=Book.get_all_page(session, size=20).next, size=20)
+
+    page = Book.get_all_page(session, before=last.previous, size=10)
+    assert titles(page) == [f"Book {number:02d}" for number in range(10, 20)]
+    assert page.next == last.previous - 1
+
+    page = Book.get_all_page(session, before=page.previous, size=10)
+    assert titles(page) == [f"Book {number:02d}" for number in range(10)]
+    assert page.previous is None
+
+def test_get_all_page_exact_size():
+    # Test a listing filling its last page exactly has no next page
+    page = Book.get_all_page(session, size=25)
+    assert len(page.items) == 25
+    assert page.next is None
+
+def test_get_all_available_page():
+    # Test only the books in stock are listed
+    page = Book.get_all_available_page(session, size=100)
+    assert titles(page) == [f"Book {number:02d}" for number in range(25) if number % 3]
+
+def test_authenticate_page():
+    # Test paginating the books with an attribute value
+    page = Book.authenticate_page(session, "genre", "Fantasy", size=5)
+    assert titles(page) == ["Book 01", "Book 03", "Book 05", "Book 07", "Book 09"]
+
+    page = Book.authenticate_page(session, "genre", "Fantasy", after=page.next, size=5)
+    assert titles(page) == ["Book 11", "Book 13", "Book 15", "Book 17", "Book 19"]
+
+    with pytest.raises(ValueError):
+        Book.authenticate_page(session, "description", "A book")
+
+def test_authenticate_page_converted_values():
+    # Test paginating the books with a price given in dollars
+    page = Book.authenticate_page(session, "price", 9.99, size=5)
+    assert titles(page) == [f"Book {number:02d}" for number in range(5)]
+    assert Book.authenticate_page(session, "price", 10.99).items == []
+
+    # Test paginating the books with a publication date given as a string or a date
+    page = Book.authenticate_page(session, "publication_date", "01-01-2000", size=5)
+    assert titles(page) == [f"Book {number:02d}" for number in range(5)]
+    page = Book.authenticate_page(session, "publication_date", date(2000, 1, 1), size=5)
+    assert titles(page) == [f"Book {number:02d}" for number in range(5)]
+
+    # Test paginating the books with an ISBN spelled with or without hyphens
+    isbn = f"978000000012{isbn_check_digit('978000000012')}"
+    assert titles(Book.authenticate_page(session, "isbn", isbn)) == ["Book 12"]
+    assert titles(Book.authenticate_page(session, "isbn", f"978-0-00-000012-{isbn[-1]}")) == ["Book 12"]
+
+###################################################################################################
+################################       TRANSACTION PAGE TESTS       ###############################
+###################################################################################################
+def test_get_all_type_page():
+    # Test paginating the transactions by type and status
+    load_transactions(session, "transactions_test.json")
+
+    page = Transaction.get_all_type_page(session, size=2)
+    assert [transaction.get_type() for transaction in page.items] == ["Rental", "Early Return"]
+
+    page = Transaction.get_all_type_page(session, after=page.next, size=2)
+    assert [transaction.get_type() for transaction in page.items] == ["Rental"]
+    assert page.next is None
+
+    page = Transaction.get_all_type_page(session, "Return")
+    assert [transaction.get_type() for transaction in page.items] == ["Early Return"]
+
+    page = Transaction.get_all_type_page(session, "Rental", status=True, size=1)
+    assert len(page.items) == 1 and page.next is not None
+
+    assert Transaction.get_all_type_page(session, "Lost").items == []
+
+def test_get_all_type_listing_page():
+    # Test the transactions are listed with the ISBN and username of each one from a single query
+    User.register(session, "johndoe", "Password123!")
+    Transaction.register(session, 2, 999, date(2024, 3, 3), date(2024, 4, 3), 9.99, True, "Rental")
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        page = Transaction.get_all_type_listing_page(session, "Rental", size=2)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 1
+
+    assert [(isbn, username) for _, isbn, username in page.items] == [("978-0-00-000000-2", "johndoe"), ("978-0-00-000001-9", "johndoe")]
+    assert page.items[0][0].get_type() == "Rental"
+
+    page = Transaction.get_all_type_listing_page(session, "Rental", after=page.next, size=2)
+    assert [(isbn, username) for _, isbn, username in page.items] == [(DELETED_BOOK, DELETED_USER)]
+    assert page.next is None and page.previous is not None
+
+    assert Transaction.get_all_type_listing_page(session, "Lost").items == []
+
+def test_listing_user_book():
+    # Test the transactions of a user or book are listed with the ISBN and username of each one
+    rows = Transaction.get_all_username_listing(session, 1)
+    assert [isbn for _, isbn, _ in rows] == ["978-0-00-000000-2", "978-0-00-000000-2", "978-0-00-000001-9"]
+
+    rows = Transaction.get_all_isbn_listing(session, 999)
+    assert [username for _, _, username in rows] == [DELETED_USER]
@@ -0,0 +1,74 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import json
+import pytest
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import modules.reader
+from modules.reader import JSONArrayReader, JSONLinesReader, CSVReader, CSV_TYPES, open_reader
+###################################################################################################
+##################################       JSON READER TESTS       ##################################
+###################################################################################################
+def test_json_array_reader():
+    # Test streaming the records of a json file matches loading it whole
+    with open("catalog_test.json", 'r') as file:
+        books = json.load(file)["books"]
+
+    assert list(JSONArrayReader("catalog_test.json", "books")) == books
+
+def test_json_array_reader_small_blocks(monkeypatch):
+    # Test records split in between blocks are decoded once complete
+    monkeypatch.setattr(modules.reader, "BLOCK_SIZE", 7)
+
+    with open("transactions_test.json", 'r') as file:
+        transactions = json.load(file)["transactions"]
+
+    assert list(JSONArrayReader("transactions_test.json", "transactions")) == transactions
+
+def test_json_array_reader_missing_key():
+    # Test reading a key that doesn't exist yields no records
+    assert list(JSONArrayReader("catalog_test.json", "admins")) == []
+
+def test_json_lines_reader():
+    # Test json lines records match the json array records
+    assert list(JSONLinesReader("catalog_test.jsonl")) == list(JSONArrayReader("catalog_test.json", "books"))
+
+def test_open_reader():
+    # Test the reader is picked by the file extension
+    assert isinstance(open_reader("catalog_test.jsonl", "books"), JSONLinesReader)
+    assert isinstance(open_reader("catalog_test.json", "books"), JSONArrayReader)
+
+def test_open_reader_unknown_format():
+    # Test an unknown format is refused
+    with pytest.raises(ValueError):
+        open_reader("catalog_test.json", "books", format="xml")
+
+###################################################################################################
+##################################       CSV READER TESTS       ###################################
+###################################################################################################
+# Supplier column names of the csv catalog mapped to the book keys
+SUPPLIER_COLUMNS = {"Book Title": "title", "Writer": "author", "Publisher": "publisher", "Genre": "genre", "Edition": "edition",
+                    "Published": "publication_date", "Summary": "description", "List Price": "price", "ISBN": "isbn"}
+
+def test_csv_reader_types(tmp_path):
+    # Test the typed columns are converted and the ones that fail are left as strings
+    file_path = tmp_path / "books.csv"
+    file_path.write_text("title,edition,price\nDune,1,19.99\nEmma,first,9.99\n")
+
+    records = list(CSVReader(str(file_path), CSV_TYPES["books"]))
+    assert records == [{"title": "Dune", "edition": 1, "price": 19.99}, {"title": "Emma", "edition": "first", "price": 9.99}]
+
+def test_open_reader_column_map():
+    # Test the supplier csv columns are renamed to match the json lines records
+    reader = open_reader("catalog_supplier_test.csv", "books", column_map=SUPPLIER_COLUMNS)
+    assert list(reader) == list(JSONLinesReader("catalog_test.jsonl"))
+    assert reader.position == os.path.getsize("catalog_supplier_test.csv")
+
+def test_open_reader_format():
+    # Test the format given overrides the file extension
+    assert isinstance(open_reader("catalog_supplier_test.csv", "books", format="csv"), CSVReader)
@@ -0,0 +1,110 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.migration import migrate
+from modules.book import Book
+from modules.config import bulk_load_books
+from modules.snapshot import CatalogSnapshot, precedes
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_snapshot.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class and apply the schema migrations
+migrate(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+
+# Load books into the test database
+if Book.get_all(session) is None:
+    bulk_load_books(session, "catalog_test.json")
+###################################################################################################
+##################################       SNAPSHOT TESTS       #####################################
+###################################################################################################
+def test_snapshot_lookups(tmp_path):
+    # Test lookups served by the snapshot match the books table
+    snapshot = CatalogSnapshot.load(session, str(tmp_path / "catalog.snapshot"))
+    assert len(snapshot) == 3
+
+    record = snapshot.find_isbn("978-0-26-110221-7")
+    book = Book.authenticate_isbn(session, "978-0-26-110221-7")
+    assert record.id == book.get_id()
+    assert record.title == book.get_title()
+    assert record.price == book.get_price()
+    assert snapshot.find_isbn("111-1-11-111111-6") is None
+
+    assert [record.isbn for record in snapshot.find_author("Robert Martin")] == ["978-0-13-235088-4"]
+    assert [record.author for record in snapshot.find_title("Dune")] == ["Frank Herbert"]
+    assert snapshot.find_title("Emma") == []
+    snapshot.close()
+
+def test_precedes():
+    # Test the view comparison orders keys like bytes do, including prefixes and empty keys
+    keys = [b"", b"D", b"Dune", b"Dunes", b"Dung", b"Emma", "\u00c9mile".encode()]
+    for first in keys:
+        for second in keys:
+            assert precedes(memoryview(first), memoryview(second)) == (first < second), (first, second)
+
+def test_snapshot_regenerated(tmp_path):
+    # Test the snapshot is regenerated once the catalog changes
+    snapshot_path = str(tmp_path / "catalog.snapshot")
+    CatalogSnapshot.load(session, snapshot_path).close()
+
+    book = Book.authenticate_isbn(session, "978-0-44-117271-9")
+    Book.add(session, book)
+
+    snapshot = CatalogSnapshot.load(session, snapshot_path)
+    assert snapshot.find_isbn("978-0-44-117271-9").quantity == book.get_quantity()
+    snapshot.close()
+
+def test_snapshot_regenerated_metadata(tmp_path):
+    # Test the snapshot is regenerated once a book is updated without changing the number of books or copies
+    snapshot_path = str(tmp_path / "catalog.snapshot")
+    CatalogSnapshot.load(session, snapshot_path).close()
+
+    book = Book.authenticate_isbn(session, "978-0-13-235088-4")
+    title, price = book.get_title(), book.get_price()
+    book.set_title("Clean Code Second Edition")
+    book.set_price(43.99)
+    session.commit()
+
+    snapshot = CatalogSnapshot.load(session, snapshot_path)
+    record = snapshot.find_isbn("978-0-13-235088-4")
+    assert (record.title, record.price) == ("Clean Code Second Edition", 43.99)
+    snapshot.close()
+
+    book.set_title(title)
+    book.set_price(price)
+    session.commit()
+
+def test_snapshot_unreadable(tmp_path):
+    # Test a snapshot file that isn't one is regenerated
+    snapshot_path = tmp_path / "catalog.snapshot"
+    snapshot_path.write_bytes(b"")
+
+    snapshot = CatalogSnapshot.load(session, str(snapshot_path))
+    assert len(snapshot) == len(Book.get_all(session))
+    snapshot.close()
+
+def test_snapshot_completions(tmp_path):
+    # Test the autocompletion is loaded from the snapshot
+    snapshot = CatalogSnapshot.load(session, str(tmp_path / "catalog.snapshot"))
+    Book.load_completions(session, snapshot)
+    snapshot.close()
+
+    assert Book.complete("du") == ["Dune"]
+    assert Book.complete("frank", attribute='author') == ["Frank Herbert"]
+    Book.completions = None
@@ -0,0 +1,103 @@
+###################################################################################################
+#######################################       IMPORTS       #######################################
+###################################################################################################
+import sys
+import os
+import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory (Library-Management) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.user import Base
+from modules.book import Book
+from modules.sync import sync_books
+###################################################################################################
+####################################       CONFIGURATION       ####################################
+###################################################################################################
+# Initialize the SQLAlchemy engine for sqlite
+engine = create_engine('sqlite:///test_sync.db')  # Adjust the database URL as needed
+
+# Create the Base tables for each class
+Base.metadata.create_all(engine)
+
+# Create a Session class and bind the engine to it
+Session = sessionmaker(bind=engine)
+
+# Create session object
+session = Session()
+###################################################################################################
+####################################       SYNC TESTS       #######################################
+###################################################################################################
+def test_sync_books(tmp_path):
+    # Test syncing only applies the new or changed records of the catalog
+    with open("catalog_test.json", 'r') as file:
+        catalog = json.load(file)
+
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps(catalog))
+
+    stats = sync_books(session, str(catalog_path))
+    assert stats["inserted"] == 3
+    assert Book.authenticate_isbn(session, "978-0-13-235088-4").get_quantity() == 2
+
+    # Unchanged catalog is skipped
+    stats = sync_books(session, str(catalog_path))
+    assert stats["skipped"] == True
+
+    # Changed price of one book and one copy less of another
+    catalog["books"][2]["price"] = 12.99
+    catalog["books"].pop(0)
+    catalog_path.write_text(json.dumps(catalog))
+
+    stats = sync_books(session, str(catalog_path))
+    assert stats["skipped"] == False
+    assert stats["inserted"] == 0
+    assert stats["updated"] == 2
+    assert Book.authenticate_isbn(session, "978-0-13-235088-4").get_quantity() == 1
+    assert Book.authenticate_isbn(session, "978-0-26-110221-7").get_price() == 12.99
+
+def test_sync_books_rejected(tmp_path):
+    # Test invalid records are reported instead of failing the sync, and applied once corrected
+    with open("catalog_test.json", 'r') as file:
+        books = json.load(file)["books"]
+
+    valid = dict(books[0], title="Clean Architecture", isbn="978-0-13-449416-6")
+    invalid = dict(books[0], title="Refactoring", isbn="978-0-13-475759-9", price=-1)
+    catalog_path, report_path = tmp_path / "catalog.json", tmp_path / "rejected.jsonl"
+    catalog_path.write_text(json.dumps({"books": [valid, invalid, {"title": "No ISBN"}]}))
+
+    stats = sync_books(session, str(catalog_path), report_path=str(report_path))
+    assert (stats["inserted"], stats["rejected"]) == (1, 2)
+    assert Book.authenticate_isbn(session, "978-0-13-449416-6").get_title() == "Clean Architecture"
+    assert Book.authenticate_isbn(session, "978-0-13-475759-9") is None
+
+    with open(report_path, 'r') as report:
+        rejected = [json.loads(line) for line in report]
+    assert [entry["error"] for entry in rejected] == ["Missing isbn attribute", "Price must be a float"]
+
+    # Corrected record is applied by the next sync
+    catalog_path.write_text(json.dumps({"books": [valid, dict(invalid, price=47.99)]}))
+    stats = sync_books(session, str(catalog_path))
+    assert (stats["inserted"], stats["updated"], stats["rejected"]) == (1, 0, 0)
+    assert Book.authenticate_isbn(session, "978-0-13-475759-9").get_price() == 47.99
+
+def test_sync_books_isbn_spellings(tmp_path):
+    # Test the spellings of an ISBN are synced as copies of one book and invalid ISBNs are rejected
+    with open("catalog_test.json", 'r') as file:
+        book = json.load(file)["books"][0]
+
+    hyphenated = dict(book, title="The Pragmatic Programmer", isbn="978-0-13-595705-9")
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps({"books": [hyphenated, dict(hyphenated, isbn="9780135957059"), dict(hyphenated, isbn="978-0-13-595705-0")]}))
+
+    stats = sync_books(session, str(catalog_path))
+    assert (stats["inserted"], stats["rejected"]) == (1, 1)
+    assert Book.authenticate_isbn(session, "9780135957059").get_quantity() == 2
+
+    # Respelling the ISBN changes nothing but the fingerprint of the book
+    catalog_path.write_text(json.dumps({"books": [dict(hyphenated, isbn="9780135957059"), hyphenated]}))
+    stats = sync_books(session, str(catalog_path))
+    assert (stats["inserted"], stats["rejected"]) == (0, 0)
+    assert Book.authenticate_isbn(session, "978-0-13-595705-9").get_quantity() == 2
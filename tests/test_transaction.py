@@ -267,7 +267,7 @@ def test_get_all_username():
 def test_get_all_isbn():
     # Test get all transactions by ISBN
     
-    book = Book.register(session, "OOP Python Fundamentals", "Ricardo Silva", "HaperCollins", "Educational", 1, "25-02-2024", "Discover", 9.99, "111-2-33-444444-5")
+    book = Book.register(session, "OOP Python Fundamentals", "Ricardo Silva", "HaperCollins", "Educational", 1, "25-02-2024", "Discover", 9.99, "111-2-33-444444-9")
     
     # Register transaction for that ISBN
     checkout_date = datetime.strptime("2024-03-05", '%Y-%m-%d').date()
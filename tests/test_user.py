@@ -3,16 +3,16 @@
 ###################################################################################################
 import sys
 import os
+import json
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
 
 # Add the parent directory (Library-Management) to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from modules.user import User, Base
-from modules.transaction import Transaction
+from werkzeug.security import generate_password_hash
 from modules.config import load_admin_accounts
 ###################################################################################################
 ####################################       CONFIGURATION       ####################################
@@ -81,6 +81,22 @@ def test_invalid_password():
     with pytest.raises(ValueError):
         user.set_password("pass word")   # String containing spaces
 
+def test_valid_password_hash():
+    # Test valid password hash
+    user = User()
+    password_hash = generate_password_hash("valid_password")
+    user.set_password_hash(password_hash)
+    assert user.get_password() == password_hash
+
+def test_invalid_password_hash():
+    # Test invalid password hash
+    user = User()
+    with pytest.raises(ValueError):
+        user.set_password_hash(1)   # Not string
+
+    with pytest.raises(ValueError):
+        user.set_password_hash("password")   # Not a werkzeug hash
+
 def test_valid_is_admin():
     # Test valid is_admin
     user = User()
@@ -185,3 +201,19 @@ def test_remove():
     user = User.authenticate_username(session, "new_user")
     
     assert User.remove(session, user) == True
+
+def test_load_admin_accounts(tmp_path):
+    # Test loading pre-hashed and plaintext admin accounts, existing accounts are skipped
+    accounts_path = tmp_path / "admins.json"
+    accounts_path.write_text(json.dumps({"admins": [
+        {"username": "ricardo", "password": "password1"},
+        {"username": "hashed_admin", "password_hash": generate_password_hash("password4")},
+        {"username": "plain_admin", "password": "password5"},
+        {"username": "other_admin", "password": "password6"},
+    ]}))
+
+    assert load_admin_accounts(session, str(accounts_path), workers=2) == 3
+    assert User.authenticate(session, "hashed_admin", "password4").get_is_admin() == True
+    assert User.authenticate(session, "plain_admin", "password5").get_is_admin() == True
+
+    assert load_admin_accounts(session, str(accounts_path)) == 0